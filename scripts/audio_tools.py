@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+ffmpeg/ffprobe helpers for the transcription scripts.
+"""
+
+import re
+import subprocess
+import tempfile
+from pathlib import Path
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+class AudioToolError(RuntimeError):
+    """Raised when ffmpeg or ffprobe fails."""
+
+
+def _run(cmd: list[str], text: bool = True) -> subprocess.CompletedProcess:
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=text)
+    except FileNotFoundError:
+        raise AudioToolError(f"{cmd[0]} not found. Install ffmpeg to process audio.")
+    if result.returncode != 0:
+        stderr = result.stderr if text else result.stderr.decode(errors="replace")
+        raise AudioToolError(f"{cmd[0]} failed: {stderr.strip()[-500:]}")
+    return result
+
+
+def probe_duration(audio_path: Path) -> float:
+    """Duration of an audio file in seconds."""
+    result = _run([
+        'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', str(audio_path)
+    ])
+    return float(result.stdout.strip())
+
+
+def detect_silences(audio_path: Path, noise_db: float = -35.0,
+                    min_silence: float = 0.5) -> list[tuple[float, float]]:
+    """
+    Find silent stretches using ffmpeg's silencedetect filter.
+
+    Args:
+        audio_path: Audio file to analyse
+        noise_db: Level (dB) below which audio counts as silence
+        min_silence: Minimum silence length in seconds
+
+    Returns:
+        List of (start, end) times in seconds
+    """
+    result = _run([
+        'ffmpeg', '-hide_banner', '-nostats', '-i', str(audio_path),
+        '-af', f'silencedetect=noise={noise_db}dB:d={min_silence}',
+        '-f', 'null', '-'
+    ])
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = _SILENCE_START.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = _SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def extract_segment(audio_path: Path, start: float, end: float, output_path: Path) -> Path:
+    """Cut [start, end) seconds of audio into a mono MP3 file."""
+    _run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-ss', f'{start:.3f}', '-t', f'{end - start:.3f}', '-i', str(audio_path),
+        '-ac', '1', '-b:a', '96k', str(output_path), '-y'
+    ])
+    return output_path
+
+
+# Gemini's inline request limit is 20MB; stay a little under it
+MAX_UPLOAD_BYTES = 19 * 1024 * 1024
+
+# Upload encodings, best first. Bitrates are mono kbps; Opus stays
+# intelligible for speech down to 6 kbps, MP3 needs a lower sample rate.
+CODECS = {
+    "opus": {"encoder": "libopus", "format": "ogg", "suffix": ".ogg",
+             "min_kbps": 6, "max_kbps": 32, "args": ["-application", "voip"]},
+    "mp3": {"encoder": "libmp3lame", "format": "mp3", "suffix": ".mp3",
+            "min_kbps": 8, "max_kbps": 64, "args": ["-ar", "22050"]},
+}
+
+# Share of the byte budget given to audio; the rest covers container overhead
+# and encoder overshoot
+_BUDGET_FRACTION = 0.94
+
+
+def target_bitrate(duration: float, max_bytes: int, codec: str = "opus") -> int:
+    """
+    Bitrate (kbps) that fits duration seconds of audio into max_bytes.
+
+    Capped at the codec's max_kbps, so short files are not encoded at
+    needlessly high quality.
+
+    Raises:
+        AudioToolError: If even the codec's lowest bitrate would not fit
+    """
+    spec = CODECS[codec]
+    kbps = int(max_bytes * 8 * _BUDGET_FRACTION / max(duration, 0.001) / 1000)
+    if kbps < spec["min_kbps"]:
+        raise AudioToolError(
+            f"{duration / 60:.0f} min of audio does not fit in {max_bytes / 1024 / 1024:.0f}MB "
+            f"at {spec['min_kbps']} kbps {codec}; transcribe it in segments instead")
+    return min(kbps, spec["max_kbps"])
+
+
+def encode_audio(input_path: Path, kbps: int, codec: str = "opus") -> bytes:
+    """
+    Encode audio as mono at kbps and return the encoded bytes.
+
+    ffmpeg writes to a pipe, so no intermediate file is created.
+    """
+    spec = CODECS[codec]
+    result = _run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', str(input_path),
+        '-vn', '-ac', '1', '-c:a', spec["encoder"], '-b:a', f'{kbps}k', *spec["args"],
+        '-f', spec["format"], 'pipe:1'
+    ], text=False)
+    return result.stdout
+
+
+def encode_to_size(input_path: Path, max_bytes: int = MAX_UPLOAD_BYTES,
+                   codec: str = "opus") -> tuple[bytes, str]:
+    """
+    Encode audio as small as needed to fit max_bytes, probing its duration first.
+
+    If the encoder overshoots, the file is encoded once more at a bitrate
+    scaled down by the overshoot. Opus falls back to MP3 when ffmpeg lacks
+    libopus.
+
+    Returns:
+        Tuple of (encoded bytes, codec used)
+
+    Raises:
+        AudioToolError: If ffmpeg fails or the audio cannot fit max_bytes
+    """
+    duration = probe_duration(input_path)
+    kbps = target_bitrate(duration, max_bytes, codec)
+    try:
+        data = encode_audio(input_path, kbps, codec)
+    except AudioToolError as e:
+        if codec != "opus" or "libopus" not in str(e):
+            raise
+        return encode_to_size(input_path, max_bytes, "mp3")
+    if len(data) > max_bytes:
+        kbps = int(kbps * max_bytes * _BUDGET_FRACTION / len(data))
+        if kbps < CODECS[codec]["min_kbps"]:
+            raise AudioToolError(f"Could not encode {input_path} under {max_bytes} bytes")
+        data = encode_audio(input_path, kbps, codec)
+        if len(data) > max_bytes:
+            raise AudioToolError(f"Could not encode {input_path} under {max_bytes} bytes")
+    return data, codec
+
+
+def compress_for_upload(input_path: str, output_dir: str,
+                        max_bytes: int = MAX_UPLOAD_BYTES, codec: str = "opus") -> str:
+    """
+    Re-encode audio larger than max_bytes to fit it (see encode_to_size()).
+
+    Smaller files are returned unchanged. The encoded file is written to a
+    uniquely named file in output_dir, so files with the same name from
+    different directories can be compressed concurrently.
+
+    Returns:
+        Path of the file to upload
+    """
+    source = Path(input_path)
+    if source.stat().st_size <= max_bytes:
+        return str(source)
+    data, used = encode_to_size(source, max_bytes, codec)
+    fd, output_path = tempfile.mkstemp(prefix=f"{source.stem}_", suffix=CODECS[used]["suffix"],
+                                       dir=output_dir)
+    with open(fd, 'wb') as f:
+        f.write(data)
+    return output_path
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Asynchronous batch transcription.
+
+Transcribes many audio files concurrently through a TranscriptionClient,
+with a concurrency limit, per-file timeouts and retries with jittered
+exponential backoff. Each transcript is written as soon as its file
+completes.
+"""
+
+import asyncio
+import glob
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from gemini_client import TranscriptionClient
+from latency_trace import Tracer, audio_seconds, prompt_attributes, trace_phase
+from upload_cache import submission_path
+
+T = TypeVar("T")
+
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".ogg", ".opus", ".flac", ".aac", ".webm"}
+
+
+def collect_audio_files(spec: str) -> list[Path]:
+    """
+    Resolve a directory or glob pattern to a sorted list of audio files.
+
+    Args:
+        spec: Directory path or glob pattern (e.g. "notes/*.mp3")
+    """
+    path = Path(spec)
+    if path.is_dir():
+        candidates = path.iterdir()
+    else:
+        candidates = (Path(p) for p in glob.glob(spec, recursive=True))
+    return sorted(p for p in candidates
+                  if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff delay for a retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def default_output_path(audio_path: Path, output_dir: Optional[Path] = None) -> Path:
+    """Transcript path for an audio file: <stem>_transcript.md."""
+    directory = output_dir if output_dir is not None else audio_path.parent
+    return directory / f"{audio_path.stem}_transcript.md"
+
+
+def output_paths(audio_paths: list[Path], output_dir: Optional[Path] = None) -> dict[Path, Path]:
+    """
+    Transcript path for every audio file, with no two files sharing one.
+
+    Files are named by default_output_path(). Files with the same stem in
+    one directory (a.mp3, a.wav) keep their extension in the name
+    (a_mp3_transcript.md). With output_dir, files from different
+    directories that would still collide keep their directory relative to
+    the files' common parent.
+
+    Raises:
+        ValueError: If two inputs would still write the same transcript
+    """
+    audio_paths = [Path(p) for p in audio_paths]
+    stems = {}
+    for path in audio_paths:
+        stems[path.parent, path.stem] = stems.get((path.parent, path.stem), 0) + 1
+
+    def name(path: Path) -> str:
+        if stems[path.parent, path.stem] == 1:
+            return default_output_path(path).name
+        return f"{path.stem}_{path.suffix.lstrip('.').lower()}_transcript.md"
+
+    outputs = {path: (output_dir if output_dir is not None else path.parent) / name(path)
+               for path in audio_paths}
+    if output_dir is not None and len(set(outputs.values())) < len(outputs):
+        common = Path(os.path.commonpath([str(p.resolve().parent) for p in audio_paths]))
+        outputs = {path: output_dir / path.resolve().parent.relative_to(common) / name(path)
+                   for path in audio_paths}
+
+    seen = {}
+    for path, output in outputs.items():
+        if output in seen:
+            raise ValueError(f"{seen[output]} and {path} would both be written to {output}")
+        seen[output] = path
+    return outputs
+
+
+def write_transcript(output_path: Path, audio_path: Path, transcript: str) -> None:
+    """Write a transcript in the same layout as transcribe_gemini.py."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        f.write(f"# Transcript: {audio_path.name}\n\n")
+        f.write(transcript)
+
+
+class TranscriptionFailed(RuntimeError):
+    """Raised when a file still fails after all retries."""
+
+    def __init__(self, message: str, attempts: int):
+        super().__init__(message)
+        self.attempts = attempts
+
+
+async def call_with_retries(call: Callable[[], Awaitable[T]], timeout: float = 300.0,
+                            retries: int = 3, backoff: float = 1.0) -> tuple[T, int]:
+    """
+    Await call() with a per-attempt timeout, retrying with jittered backoff.
+
+    Args:
+        call: Returns a new awaitable for every attempt
+        timeout: Per-attempt timeout in seconds
+        retries: Retries after the first attempt
+        backoff: Base delay for backoff_delay()
+
+    Returns:
+        Tuple of (result, attempts)
+
+    Raises:
+        TranscriptionFailed: If every attempt fails
+    """
+    last_error = None
+    for attempt in range(retries + 1):
+        try:
+            return await asyncio.wait_for(call(), timeout), attempt + 1
+        except asyncio.TimeoutError:
+            last_error = f"timed out after {timeout}s"
+        except Exception as e:
+            last_error = str(e) or type(e).__name__
+
+        if attempt < retries:
+            await asyncio.sleep(backoff_delay(attempt, backoff))
+
+    raise TranscriptionFailed(last_error, retries + 1)
+
+
+async def transcribe_with_retries(client: TranscriptionClient, prompt: str, audio_path: Path,
+                                  timeout: float = 300.0, retries: int = 3,
+                                  backoff: float = 1.0,
+                                  tracer: Optional[Tracer] = None) -> tuple[str, int]:
+    """
+    Upload and transcribe one file, retrying on errors and timeouts.
+
+    With a tracer, every attempt's upload and generate phases are recorded.
+
+    Returns:
+        Tuple of (transcript, attempts)
+
+    Raises:
+        TranscriptionFailed: If every attempt fails
+    """
+    audio, prompt_info = {"audio": str(audio_path)}, {}
+    if tracer is not None:
+        audio.update(bytes=audio_path.stat().st_size,
+                     audio_seconds=await asyncio.to_thread(audio_seconds, audio_path))
+        prompt_info = prompt_attributes(prompt)
+
+    attempt = 0
+
+    async def run():
+        nonlocal attempt
+        attempt += 1
+        with trace_phase(tracer, "upload", attempt=attempt, **audio) as trace:
+            handle = await client.upload(audio_path)
+            trace["path"] = submission_path(handle)
+        with trace_phase(tracer, "generate", audio=str(audio_path), attempt=attempt,
+                         **prompt_info) as trace:
+            transcript = await client.generate(prompt, handle)
+            trace["output_chars"] = len(transcript)
+        return transcript
+
+    return await call_with_retries(run, timeout, retries, backoff)
+
+
+async def transcribe_file(client: TranscriptionClient, prompt: str, audio_path: Path,
+                          output_path: Path, timeout: float = 300.0,
+                          retries: int = 3, backoff: float = 1.0,
+                          tracer: Optional[Tracer] = None) -> dict:
+    """
+    Transcribe one file with retries and write its transcript.
+
+    Returns:
+        Result dictionary with status, attempts, seconds and output/error
+    """
+    start = time.perf_counter()
+    try:
+        transcript, attempts = await transcribe_with_retries(
+            client, prompt, audio_path, timeout, retries, backoff, tracer)
+    except TranscriptionFailed as e:
+        return {
+            "audio": str(audio_path),
+            "status": "error",
+            "error": str(e),
+            "attempts": e.attempts,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    with trace_phase(tracer, "write", audio=str(audio_path), output=str(output_path)) as trace:
+        await asyncio.to_thread(write_transcript, output_path, audio_path, transcript)
+        trace["bytes"] = output_path.stat().st_size
+    return {
+        "audio": str(audio_path),
+        "status": "ok",
+        "output": str(output_path),
+        "attempts": attempts,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+async def transcribe_batch(client: TranscriptionClient, prompt: str, audio_paths: list[Path],
+                           output_dir: Optional[Path] = None, concurrency: int = 4,
+                           timeout: float = 300.0, retries: int = 3, backoff: float = 1.0,
+                           on_result: Optional[Callable[[dict], None]] = None,
+                           tracer: Optional[Tracer] = None) -> list[dict]:
+    """
+    Transcribe many files concurrently.
+
+    Args:
+        client: Model backend
+        prompt: System prompt sent with every file
+        audio_paths: Files to transcribe
+        output_dir: Directory for transcripts (default: next to each input)
+        concurrency: Maximum files in flight at once
+        timeout: Per-attempt timeout in seconds
+        retries: Retries per file after the first attempt
+        backoff: Base delay for jittered exponential backoff
+        on_result: Called with each result as soon as its file completes
+        tracer: Records per-phase timings of every file
+
+    Returns:
+        Results in completion order
+
+    Raises:
+        ValueError: If two files would be written to the same transcript (see output_paths())
+    """
+    outputs = output_paths(audio_paths, output_dir)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(audio_path: Path) -> dict:
+        async with semaphore:
+            return await transcribe_file(client, prompt, audio_path,
+                                         outputs[Path(audio_path)],
+                                         timeout, retries, backoff, tracer)
+
+    results = []
+    for next_done in asyncio.as_completed([limited(p) for p in audio_paths]):
+        result = await next_done
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    return results
+
+
+def print_result(result: dict) -> None:
+    """Progress printer for transcribe_batch(on_result=...)."""
+    name = Path(result["audio"]).name
+    if result["status"] == "ok":
+        print(f"[ok] {name} -> {result['output']} "
+              f"({result['seconds']}s, {result['attempts']} attempt(s))")
+    else:
+        print(f"[error] {name}: {result['error']} ({result['attempts']} attempt(s))",
+              file=sys.stderr)
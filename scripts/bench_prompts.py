@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for prompt assembly and document generation.
+
+Times extract_foundational_instructions, generate_foundational_prompt,
+concatenate_stack (over every stack) and generate_typst against the real
+layer tree and against synthetic trees with thousands of layers and
+hundreds of stacks. Each benchmark reports the median wall time over
+several runs and the peak memory (tracemalloc) of one run.
+
+Results can be saved as a baseline and later runs compared against it;
+a benchmark that got slower or bigger than the threshold is reported as a
+regression and the script exits non-zero.
+
+Usage:
+    python scripts/bench_prompts.py                          # real + synthetic trees
+    python scripts/bench_prompts.py --trees real small       # a subset
+    python scripts/bench_prompts.py --save-baseline          # record a baseline
+    python scripts/bench_prompts.py --compare                # compare with it
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from prompt_stack import (
+    PromptStackConcatenator,
+    extract_foundational_instructions,
+    generate_foundational_prompt,
+    load_layers_config,
+)
+
+REPO_ROOT = Path(__file__).parent.parent
+DEFAULT_BASELINE = REPO_ROOT / "generated" / "bench" / "baseline.json"
+
+# Synthetic tree sizes: name -> (foundational layers, elements per layer,
+# stylistic categories, options per category, stacks)
+SYNTHETIC_TREES = {
+    "small": (10, 20, 5, 20, 20),
+    "medium": (25, 40, 10, 50, 100),
+    "large": (50, 60, 20, 100, 500),
+}
+
+_WORDS = ("the speaker transcript audio paragraph sentence punctuation clarity tone "
+          "format remove preserve correct intended meaning filler words spelling "
+          "numbers dates names emphasis structure heading list email note draft "
+          "concise formal casual reader context instruction output text edit").split()
+
+
+def _paragraphs(rng: random.Random, sentences: int) -> str:
+    lines = []
+    for _ in range(sentences):
+        words = rng.choices(_WORDS, k=rng.randint(8, 24))
+        lines.append(" ".join(words).capitalize() + ".")
+    return "\n\n".join(" ".join(lines[i:i + 4]) for i in range(0, len(lines), 4))
+
+
+def make_synthetic_tree(root: Path, foundational_layers: int, elements_per_layer: int,
+                        stylistic_categories: int, options_per_category: int,
+                        stacks: int, seed: int = 0) -> Dict[str, int]:
+    """
+    Write a synthetic repository (layers/, layers.json, stacks/) under root.
+
+    Content is generated from a fixed seed, so a given size always
+    produces the same tree.
+
+    Returns:
+        Counts of layer files and stacks written
+    """
+    rng = random.Random(seed)
+    config = {
+        "meta": {
+            "version": "synthetic",
+            "description": "Synthetic benchmark tree",
+            "architecture": {"foundational": "Synthetic foundational layers.",
+                             "stylistic": "Synthetic stylistic layers."},
+        },
+        "foundational": {"layers": []},
+        "stylistic": {"layers": []},
+    }
+
+    def write_layer(rel: str, sentences: int) -> None:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_paragraphs(rng, sentences) + "\n")
+
+    foundational_paths = []
+    for i in range(foundational_layers):
+        folder = f"{i + 1:02d}-synthetic-{i}"
+        elements = []
+        for j in range(elements_per_layer):
+            rel = f"layers/foundational/{folder}/element-{j}.md"
+            write_layer(rel, rng.randint(2, 12))
+            elements.append({"name": f"element-{j}", "file_path": rel})
+            foundational_paths.append(rel)
+        config["foundational"]["layers"].append({
+            "order": i + 1, "folder": folder, "name": f"Synthetic {i}",
+            "description": f"Synthetic foundational layer {i}", "elements": elements,
+        })
+
+    categories = []
+    for i in range(stylistic_categories):
+        folder = f"category-{i}"
+        elements = []
+        for j in range(options_per_category):
+            rel = f"layers/stylistic/{folder}/option-{j}.md"
+            write_layer(rel, rng.randint(1, 6))
+            elements.append({"name": f"option-{j}", "file_path": rel})
+        categories.append([e["file_path"] for e in elements])
+        config["stylistic"]["layers"].append({
+            "order": foundational_layers + i + 1, "folder": folder,
+            "name": f"Category {i}", "description": f"Synthetic category {i}",
+            "elements": elements,
+        })
+
+    (root / "layers.json").write_text(json.dumps(config, indent=2) + "\n")
+
+    # Stacks: a slice of foundational elements plus one option per category
+    (root / "stacks").mkdir(parents=True, exist_ok=True)
+    for s in range(stacks):
+        layers = rng.sample(foundational_paths, min(len(foundational_paths), 20))
+        layers += [rng.choice(options) for options in categories]
+        lines = [f"name: Synthetic Stack {s}", "layers:"] + [f"  - {p}" for p in layers]
+        (root / "stacks" / f"stack-{s}.yaml").write_text("\n".join(lines) + "\n")
+
+    return {"layers": len(foundational_paths) + stylistic_categories * options_per_category,
+            "stacks": stacks}
+
+
+def stack_configs(repo_root: Path) -> List[Dict]:
+    """
+    Parsed stacks under repo_root/stacks whose layers all exist.
+
+    If none resolve (the real tree's stacks still point at pre-v2 paths),
+    stacks are derived from layers.json instead: every foundational element
+    plus one rotating option per stylistic category.
+    """
+    import yaml
+
+    configs = []
+    for stack_file in sorted((repo_root / "stacks").glob("*.yaml")):
+        config = yaml.safe_load(stack_file.read_text()) or {}
+        layers = config.get("layers") or []
+        if layers and all((repo_root / p).is_file() for p in layers):
+            configs.append(config)
+    if configs:
+        return configs
+
+    layers_config = load_layers_config(repo_root)
+    foundational = [e["file_path"] for layer in layers_config["foundational"]["layers"]
+                    for e in layer["elements"] if e.get("file_path")]
+    categories = [[e["file_path"] for e in layer["elements"] if e.get("file_path")]
+                  for layer in layers_config.get("stylistic", {}).get("layers", [])]
+    categories = [c for c in categories if c]
+    count = max((len(c) for c in categories), default=1)
+    return [{"layers": foundational + [c[i % len(c)] for c in categories]}
+            for i in range(count)]
+
+
+def benchmarks(repo_root: Path) -> Dict[str, Callable[[], object]]:
+    """The benchmarked operations for one tree, as zero-argument callables."""
+    from generate_pdf import generate_typst
+
+    config = load_layers_config(repo_root)
+    instructions = extract_foundational_instructions(config, repo_root)
+    stacks = stack_configs(repo_root)
+    concatenator = PromptStackConcatenator(repo_root)
+
+    return {
+        "extract_foundational_instructions":
+            lambda: extract_foundational_instructions(config, repo_root),
+        "generate_foundational_prompt":
+            lambda: generate_foundational_prompt(instructions),
+        "concatenate_stack (every stack)":
+            lambda: [concatenator.concatenate_stack(stack) for stack in stacks],
+        "generate_typst":
+            lambda: generate_typst(config, repo_root=repo_root),
+    }
+
+
+def measure(fn: Callable[[], object], runs: int = 5) -> Dict[str, float]:
+    """
+    Median and minimum wall time over runs (after one warm-up), and tracemalloc peak.
+
+    Memory is measured in a separate run, so tracing overhead does not
+    affect the timings.
+    """
+    fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_tree(name: str, runs: int, seed: int) -> Dict:
+    """Build (if synthetic) and benchmark one tree."""
+    if name == "real":
+        size = {"layers": len(list((REPO_ROOT / "layers").rglob("*.md"))),
+                "stacks": len(stack_configs(REPO_ROOT))}
+        return {"size": size, "results": {label: measure(fn, runs)
+                                          for label, fn in benchmarks(REPO_ROOT).items()}}
+
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as tmp:
+        root = Path(tmp)
+        size = make_synthetic_tree(root, *SYNTHETIC_TREES[name], seed=seed)
+        return {"size": size, "results": {label: measure(fn, runs)
+                                          for label, fn in benchmarks(root).items()}}
+
+
+def compare(report: Dict, baseline: Dict, threshold: float = 0.2,
+            min_delta_ms: float = 0.5) -> List[str]:
+    """
+    Regressions of report against baseline.
+
+    A benchmark regresses if its minimum time grew by more than threshold
+    (and by at least min_delta_ms, to ignore timer noise on fast
+    benchmarks) or its peak memory grew by more than threshold. The
+    minimum is compared because it is far less sensitive to machine load
+    than the median.
+
+    Returns:
+        One message per regression
+    """
+    regressions = []
+    for tree, data in report["trees"].items():
+        old_tree = baseline.get("trees", {}).get(tree)
+        if not old_tree:
+            continue
+        for label, result in data["results"].items():
+            old = old_tree["results"].get(label)
+            if not old:
+                continue
+            delta = result["min_ms"] - old["min_ms"]
+            if delta > min_delta_ms and result["min_ms"] > old["min_ms"] * (1 + threshold):
+                regressions.append(f"{tree}/{label}: {old['min_ms']:.2f}ms -> "
+                                   f"{result['min_ms']:.2f}ms")
+            if result["peak_kb"] > old["peak_kb"] * (1 + threshold):
+                regressions.append(f"{tree}/{label}: peak {old['peak_kb']:.0f}KB -> "
+                                   f"{result['peak_kb']:.0f}KB")
+    return regressions
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None) -> None:
+    """Table of results, with the change against the baseline when given."""
+    print(f"{'Tree':<8} {'Benchmark':<34} {'Median':>10} {'Min':>10} {'Peak':>10}  vs baseline")
+    for tree, data in report["trees"].items():
+        old_results = (baseline or {}).get("trees", {}).get(tree, {}).get("results", {})
+        for label, result in data["results"].items():
+            old = old_results.get(label)
+            change = ""
+            if old and old["min_ms"]:
+                change = f"{(result['min_ms'] / old['min_ms'] - 1) * 100:+.0f}% time"
+                if old["peak_kb"]:
+                    change += f", {(result['peak_kb'] / old['peak_kb'] - 1) * 100:+.0f}% mem"
+            print(f"{tree:<8} {label:<34} {result['median_ms']:>8.2f}ms "
+                  f"{result['min_ms']:>8.2f}ms {result['peak_kb']:>8.0f}KB  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark prompt assembly and document generation",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Everything, compared against the saved baseline if there is one
+  %(prog)s --compare
+
+  # Record a new baseline after an intentional change
+  %(prog)s --save-baseline
+
+  # Quick check on the real tree only
+  %(prog)s --trees real --runs 3
+        """
+    )
+    parser.add_argument("--trees", nargs="+", default=["real", *SYNTHETIC_TREES],
+                        choices=["real", *SYNTHETIC_TREES],
+                        help="Trees to benchmark (default: all)")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="Timed runs per benchmark; the median is reported (default: 5)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for synthetic tree content (default: 0)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE),
+                        help="Baseline file (default: generated/bench/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to the baseline file")
+    parser.add_argument("--compare", action="store_true",
+                        help="Fail if a benchmark regressed against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown or memory growth as a fraction (default: 0.2)")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE")
+    args = parser.parse_args()
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(baseline_path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"Error loading baseline: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    report = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "runs": args.runs,
+        "seed": args.seed,
+        "trees": {},
+    }
+    for tree in args.trees:
+        report["trees"][tree] = run_tree(tree, args.runs, args.seed)
+        size = report["trees"][tree]["size"]
+        print(f"Benchmarked {tree} tree ({size['layers']} layers, {size['stacks']} stacks)",
+              file=sys.stderr)
+
+    print_report(report, baseline)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nBaseline saved to: {baseline_path}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {baseline_path}:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo regressions against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
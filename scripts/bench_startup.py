@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget check for the CLI entry points.
+
+Runs each entry point under `python -X importtime`, sums the cumulative
+import time of top-level modules and fails if it exceeds the entry point's
+budget, if a heavy module that the code path should not need (yaml,
+google.generativeai, dotenv) was imported, or if the process exited with an
+unexpected status (a crash part-way through importing looks fast).
+
+Entry points that write caches run against a temporary copy of the
+repository so the working tree is left untouched.
+
+Usage:
+    python scripts/bench_startup.py            # check all budgets
+    python scripts/bench_startup.py --scale 2  # allow 2x on slow machines
+"""
+
+import argparse
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+REPO_ROOT = SCRIPTS_DIR.parent
+
+# Copied into the temporary repository root substituted for "{repo}"
+REPO_CONTENTS = ("layers.json", "layers", "stacks", "archive")
+
+# (label, argv, import budget in ms, modules that must not be imported, allowed exit codes)
+ENTRY_POINTS = [
+    ("concatenate --list", ["concatenate.py", "--list"], 100, ["yaml"], (0,)),
+    ("concatenate --help", ["concatenate.py", "--help"], 100, ["yaml"], (0,)),
+    # Reads the cached layer registry, so YAML is only parsed when a stack changed;
+    # exits 1 when a stack references missing layers
+    ("concatenate --validate", ["concatenate.py", "--validate", "-r", "{repo}"], 100,
+     ["yaml"], (0, 1)),
+    ("generate-foundational --help", ["generate-foundational.py", "--help"], 100,
+     ["yaml"], (0,)),
+    ("transcribe_gemini --help", ["transcribe_gemini.py", "--help"], 80,
+     ["google.generativeai", "dotenv", "yaml"], (0,)),
+    ("test-foundational --help", ["test-foundational.py", "--help"], 100,
+     ["google.generativeai", "yaml"], (0,)),
+]
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def copy_repo(destination: Path) -> None:
+    """Copy the files the entry points read into a temporary repository root."""
+    for name in REPO_CONTENTS:
+        source = REPO_ROOT / name
+        if source.is_dir():
+            shutil.copytree(source, destination / name)
+        elif source.exists():
+            shutil.copy2(source, destination / name)
+
+
+def measure(argv: list[str]) -> tuple[float, set[str], int]:
+    """
+    Run a script under -X importtime.
+
+    Returns:
+        Tuple of (total import time in ms, names of imported modules, exit code)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        capture_output=True, text=True, cwd=SCRIPTS_DIR
+    )
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.add(name)
+        if len(indent) == 1:
+            total_us += int(cumulative)
+    return total_us / 1000, modules, result.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI import-time budgets")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="Runs per entry point; the median is used (default: 5)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every budget by this factor (default: 1.0)")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'Entry point':<32} {'Median':>9} {'Budget':>9}  Result")
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as repo:
+        copy_repo(Path(repo))
+        for label, argv, budget_ms, forbidden, exit_codes in ENTRY_POINTS:
+            argv = [arg.replace("{repo}", repo) for arg in argv]
+            # Warm-up run so .pyc compilation (and cache building) is not counted
+            measure(argv)
+            timings = []
+            imported = set()
+            bad_exits = set()
+            for _ in range(args.runs):
+                elapsed, modules, returncode = measure(argv)
+                timings.append(elapsed)
+                imported |= modules
+                if returncode not in exit_codes:
+                    bad_exits.add(returncode)
+
+            median = statistics.median(timings)
+            budget = budget_ms * args.scale
+            problems = []
+            if bad_exits:
+                problems.append(f"exited {', '.join(map(str, sorted(bad_exits)))}")
+            if median > budget:
+                problems.append("over budget")
+            unexpected = sorted(m for m in forbidden if m in imported)
+            if unexpected:
+                problems.append(f"imported {', '.join(unexpected)}")
+
+            status = "FAIL: " + "; ".join(problems) if problems else "ok"
+            failures += bool(problems)
+            print(f"{label:<32} {median:>7.1f}ms {budget:>7.0f}ms  {status}")
+
+    if failures:
+        print(f"\n{failures} entry point(s) failed their startup budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,124 +7,87 @@ layer files into a single prompt for use with LLMs.
 """
 
 import argparse
+import json
 import sys
 from pathlib import Path
-from typing import List, Dict, Optional
-import yaml
 
+from prompt_stack import CompiledPromptCache, MissingLayerError, PromptStackConcatenator
+from prompt_stack.bundle import LayerBundle, default_bundle_path, write_bundle
+from prompt_stack.compact import compact_sections, describe_reduction
+from prompt_stack.prefix import render_stack_file_prefix_stable
+from prompt_stack.registry import LayerRegistry, format_problems
 
-class PromptStackConcatenator:
-    """Concatenates prompt layers into a complete transformation prompt."""
 
-    def __init__(self, repo_root: Optional[Path] = None):
-        """
-        Initialize the concatenator.
-
-        Args:
-            repo_root: Path to repository root. If None, uses script directory.
-        """
-        if repo_root is None:
-            self.repo_root = Path(__file__).parent.parent
+def print_render_results(results, output_dir: Path) -> None:
+    """Print one line per rendered output or error."""
+    for name, info in results.items():
+        if 'error' in info:
+            print(f"Error rendering {name}: {info['error']}", file=sys.stderr)
         else:
-            self.repo_root = Path(repo_root)
+            print(f"Rendered {name}: {output_dir / info['file']} ({info['bytes']} bytes)")
 
-    def load_stack_config(self, stack_path: Path) -> Dict:
-        """
-        Load a stack configuration file.
 
-        Args:
-            stack_path: Path to stack YAML file
+def watch(concatenator: PromptStackConcatenator, output_dir: Path, separator: str,
+          jobs=None, polling: bool = False, debounce: float = 0.1) -> None:
+    """Render everything once, then re-render affected outputs on every change."""
+    import time
 
-        Returns:
-            Dictionary containing stack configuration
-        """
-        try:
-            with open(stack_path, 'r') as f:
-                config = yaml.safe_load(f)
-            return config
-        except FileNotFoundError:
-            print(f"Error: Stack file not found: {stack_path}", file=sys.stderr)
-            sys.exit(1)
-        except yaml.YAMLError as e:
-            print(f"Error parsing YAML: {e}", file=sys.stderr)
-            sys.exit(1)
-
-    def load_layer(self, layer_path: Path) -> str:
-        """
-        Load a single layer file.
-
-        Args:
-            layer_path: Path to layer markdown file
-
-        Returns:
-            Content of the layer file
-        """
-        full_path = self.repo_root / layer_path
-        try:
-            with open(full_path, 'r') as f:
-                content = f.read().strip()
-            return content
-        except FileNotFoundError:
-            print(f"Error: Layer file not found: {full_path}", file=sys.stderr)
-            sys.exit(1)
-
-    def concatenate_stack(self, stack_config: Dict, separator: str = "\n\n") -> str:
-        """
-        Concatenate all layers in a stack.
-
-        Args:
-            stack_config: Stack configuration dictionary
-            separator: String to use between layers
-
-        Returns:
-            Concatenated prompt string
-        """
-        layers = stack_config.get('layers', [])
-        if not layers:
-            print("Error: No layers defined in stack configuration", file=sys.stderr)
-            sys.exit(1)
-
-        layer_contents = []
-        for layer_path in layers:
-            content = self.load_layer(Path(layer_path))
-            layer_contents.append(content)
-
-        return separator.join(layer_contents)
-
-    def concatenate_from_file(self, stack_file: str, separator: str = "\n\n") -> str:
-        """
-        Load and concatenate a stack from a file path.
-
-        Args:
-            stack_file: Path to stack configuration file
-            separator: String to use between layers
-
-        Returns:
-            Concatenated prompt string
-        """
-        stack_path = Path(stack_file)
-        if not stack_path.is_absolute():
-            # Try in stacks directory first
-            stack_path = self.repo_root / "stacks" / stack_file
-            if not stack_path.exists():
-                # Try as relative path from repo root
-                stack_path = self.repo_root / stack_file
-
-        config = self.load_stack_config(stack_path)
-        return self.concatenate_stack(config, separator)
-
-    def list_available_stacks(self) -> List[str]:
-        """
-        List all available stack configurations.
+    from file_watcher import create_watcher
+    from prompt_stack.incremental import IncrementalRenderer
 
-        Returns:
-            List of stack file names
-        """
-        stacks_dir = self.repo_root / "stacks"
-        if not stacks_dir.exists():
-            return []
+    renderer = IncrementalRenderer(concatenator, output_dir, separator, jobs)
+    start = time.perf_counter()
+    try:
+        results = renderer.render_all()
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print_render_results(results, output_dir)
+    print(f"Rendered {len(results)} output(s) in {(time.perf_counter() - start) * 1000:.0f}ms; "
+          f"watching for changes (Ctrl+C to stop)", file=sys.stderr)
 
-        return sorted([f.name for f in stacks_dir.glob("*.yaml")])
+    watcher = create_watcher(renderer.watch_roots(), polling=polling)
+    try:
+        for changed in watcher.changes(debounce=debounce):
+            try:
+                update = renderer.update(changed)
+            except Exception as e:
+                print(f"Error: {e}", file=sys.stderr)
+                continue
+            if not update["rendered"] and not update["removed"]:
+                continue
+            print_render_results(update["rendered"], output_dir)
+            for name in update["removed"]:
+                print(f"Removed {name}")
+            print(f"Updated {len(update['rendered'])} output(s) in "
+                  f"{update['seconds'] * 1000:.0f}ms", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        renderer.close()
+
+
+def report_missing_layers(concatenator: PromptStackConcatenator, stack: str) -> None:
+    """
+    After a failed render, list every missing layer of the stack with suggestions.
+
+    Rendering stops at the first missing layer; the registry finds them all.
+    Only runs for stacks in stacks/ read from loose files.
+    """
+    stack_path = concatenator.resolve_stack_path(stack)
+    if concatenator.bundle is not None or \
+            stack_path.parent.resolve() != (concatenator.repo_root / "stacks").resolve():
+        return
+    try:
+        problems = LayerRegistry.load(concatenator.repo_root).validate(
+            [stack_path.name], include_layers_json=False)
+    except (OSError, ValueError):
+        return
+    if problems:
+        print("Error: stack references missing layers", file=sys.stderr)
+        for line in format_problems(problems):
+            print(line, file=sys.stderr)
 
 
 def main():
@@ -143,8 +106,33 @@ Examples:
   # Use custom separator
   %(prog)s business-email.yaml -s " "
 
+  # Compact render with an audit map of which layer each sentence came from
+  %(prog)s business-email.yaml --compact --compact-map map.json
+
+  # Canonical foundational prefix first, then the stack's stylistic layers
+  %(prog)s business-email.yaml --prefix-stable
+
+  # Reuse compiled prompts across runs (stored in generated/cache/)
+  %(prog)s business-email.yaml --cache
+
+  # Render every stack and the foundational prompt into generated/stacks/
+  %(prog)s --all
+
+  # Render everything into a chosen directory
+  %(prog)s --batch build/prompts
+
+  # Keep generated/stacks/ current, re-rendering only what an edit affects
+  %(prog)s --all --watch
+
+  # Pack every layer into one file, then assemble prompts from it
+  %(prog)s --write-bundle
+  %(prog)s business-email.yaml --bundle
+
   # List available stacks
   %(prog)s --list
+
+  # Report every broken layer reference in every stack and layers.json
+  %(prog)s --validate
         """
     )
 
@@ -162,8 +150,8 @@ Examples:
 
     parser.add_argument(
         '-s', '--separator',
-        help='Separator between layers (default: double newline)',
-        default='\n\n',
+        help='Separator between layers (default: double newline; '
+             'with --compact, a single newline)',
         type=str
     )
 
@@ -173,17 +161,133 @@ Examples:
         action='store_true'
     )
 
+    parser.add_argument(
+        '--write-bundle',
+        metavar='FILE',
+        nargs='?',
+        const='',
+        help='Write every layer file into a single bundle (default: generated/cache/layers.bundle)'
+    )
+
+    parser.add_argument(
+        '--bundle',
+        metavar='FILE',
+        nargs='?',
+        const='',
+        help='Read layers from a bundle instead of the layer files (default: generated/cache/layers.bundle)'
+    )
+
+    parser.add_argument(
+        '--validate',
+        help='Check all stacks (or the given stack) and layers.json for broken layer references',
+        action='store_true'
+    )
+
     parser.add_argument(
         '-r', '--repo-root',
         help='Repository root directory (default: script directory)',
         type=str
     )
 
+    parser.add_argument(
+        '--compact',
+        help='Strip markdown, collapse whitespace and drop near-duplicate sentences across layers',
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '--compact-map',
+        help='With --compact, write the sentence-to-layer audit map to this JSON file',
+        type=str
+    )
+
+    parser.add_argument(
+        '--similarity',
+        help='With --compact, word-overlap ratio at which sentences count as duplicates (default: 0.8)',
+        default=0.8,
+        type=float
+    )
+
+    parser.add_argument(
+        '--prefix-stable',
+        help='Start with the canonical foundational prompt and append the stack\'s other '
+             'layers, so every stack shares a cacheable prefix (hash printed to stderr)',
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '--cache',
+        help='Cache compiled prompts on disk under generated/cache/',
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '--all',
+        help='Render every stack plus the foundational prompt (default dir: generated/stacks/)',
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '--batch',
+        metavar='DIR',
+        help='Render every stack plus the foundational prompt into DIR',
+        type=str
+    )
+
+    parser.add_argument(
+        '-j', '--jobs',
+        help='Worker threads for --all/--batch (default: automatic)',
+        type=int
+    )
+
+    parser.add_argument(
+        '--watch',
+        help='With --all/--batch, keep running and re-render only the outputs affected by each change',
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '--poll',
+        help='With --watch, poll file modification times instead of using inotify',
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '--debounce',
+        help='With --watch, quiet period in seconds that ends a batch of changes (default: 0.1)',
+        default=0.1,
+        type=float
+    )
+
     args = parser.parse_args()
+    # --compact joins layers with a single newline unless --separator is given
+    compact_separator = args.separator if args.separator is not None else "\n"
+    if args.separator is None:
+        args.separator = "\n\n"
 
     # Initialize concatenator
     repo_root = Path(args.repo_root) if args.repo_root else None
     concatenator = PromptStackConcatenator(repo_root)
+    if args.cache:
+        concatenator.cache = CompiledPromptCache(cache_dir=concatenator.default_cache_dir())
+
+    if args.write_bundle is not None:
+        output = Path(args.write_bundle) if args.write_bundle else default_bundle_path(concatenator.repo_root)
+        index = write_bundle(output, concatenator.repo_root)
+        print(f"Bundled {len(index['layers'])} layers into: {output} ({output.stat().st_size} bytes)")
+        return
+
+    if args.bundle is not None:
+        path = Path(args.bundle) if args.bundle else default_bundle_path(concatenator.repo_root)
+        try:
+            concatenator.bundle = LayerBundle(path)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot open bundle: {e}", file=sys.stderr)
+            sys.exit(1)
+        stale = concatenator.bundle.stale_layers(concatenator.repo_root, concatenator.bundle.layers)
+        if stale:
+            print(f"Warning: {len(stale)} layer file(s) changed since the bundle was written "
+                  f"(e.g. {stale[0]}); run --write-bundle to refresh it", file=sys.stderr)
 
     # List stacks if requested
     if args.list:
@@ -196,13 +300,72 @@ Examples:
             print("No stacks found in stacks/ directory")
         return
 
+    if args.validate:
+        registry = LayerRegistry.load(concatenator.repo_root)
+        stacks = [concatenator.resolve_stack_path(args.stack).name] if args.stack else None
+        problems = registry.validate(stacks, include_layers_json=not args.stack)
+        if problems:
+            for line in format_problems(problems):
+                print(line, file=sys.stderr)
+            sys.exit(1)
+        checked = len(stacks) if stacks else len(registry.stacks)
+        print(f"OK: {checked} stack(s) reference only existing layers")
+        return
+
+    if args.watch and not (args.all or args.batch):
+        parser.error("--watch requires --all or --batch")
+    if args.watch and args.bundle is not None:
+        parser.error("--watch reads layer files directly and cannot be combined with --bundle")
+
+    # Render everything if requested
+    if args.all or args.batch:
+        output_dir = Path(args.batch) if args.batch else concatenator.repo_root / "generated" / "stacks"
+        if args.watch:
+            watch(concatenator, output_dir, args.separator, args.jobs, args.poll, args.debounce)
+            return
+        try:
+            manifest = concatenator.render_all(output_dir, args.separator, args.jobs)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        for name, info in manifest['outputs'].items():
+            print(f"Rendered {name}: {output_dir / info['file']} ({info['bytes']} bytes)")
+        for name, error in manifest['errors'].items():
+            print(f"Error rendering {name}: {error}", file=sys.stderr)
+        print(f"Manifest written to: {output_dir / 'manifest.json'}", file=sys.stderr)
+        if manifest['errors']:
+            sys.exit(1)
+        return
+
     # Require stack argument if not listing
     if not args.stack:
-        parser.error("stack argument is required (unless using --list)")
+        parser.error("stack argument is required (unless using --list, --all or --batch)")
+
+    if args.compact_map and not args.compact:
+        parser.error("--compact-map requires --compact")
+    if args.compact and args.prefix_stable:
+        parser.error("--compact and --prefix-stable cannot be combined")
 
     # Concatenate the stack
     try:
-        prompt = concatenator.concatenate_from_file(args.stack, args.separator)
+        if args.compact:
+            config = concatenator.load_stack_config(concatenator.resolve_stack_path(args.stack))
+            sections = concatenator.stack_sections(config)
+            baseline = args.separator.join(content for _, content in sections)
+            prompt, report = compact_sections(sections, similarity=args.similarity,
+                                              baseline=baseline, separator=compact_separator)
+            print(describe_reduction(report), file=sys.stderr)
+            if args.compact_map:
+                with open(args.compact_map, 'w') as f:
+                    json.dump(report, f, indent=2)
+                print(f"Compact map written to: {args.compact_map}", file=sys.stderr)
+        elif args.prefix_stable:
+            rendered = render_stack_file_prefix_stable(concatenator, args.stack, args.separator)
+            prompt = rendered['prompt']
+            print(f"Prefix hash: {rendered['prefix_hash']}", file=sys.stderr)
+        else:
+            prompt = concatenator.concatenate_from_file(args.stack, args.separator)
 
         # Output to file or stdout
         if args.output:
@@ -212,6 +375,9 @@ Examples:
         else:
             print(prompt)
 
+    except MissingLayerError:
+        report_missing_layers(concatenator, args.stack)
+        raise
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Reuse of Gemini cached-content handles for shared prompt prefixes.
+
+The canonical foundational prefix (see prompt_stack.prefix) is stored once
+as provider-side cached content. The handle is recorded in
+generated/cache/context_caches.json keyed on model and prefix hash, so
+later runs and other stacks with the same prefix reuse it instead of
+sending the prefix again.
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from prompt_stack.prefix import prefix_hash
+from upload_cache import UploadCache, cache_for_api_key
+
+# How long the provider keeps a cached prefix
+DEFAULT_CONTEXT_TTL = timedelta(hours=1)
+
+
+def default_cache_path() -> Path:
+    """Location of the cached-content handle map inside the repository."""
+    return Path(__file__).parent.parent / "generated" / "cache" / "context_caches.json"
+
+
+def context_cache_for_api_key(api_key: str, path: Optional[Path] = None) -> UploadCache:
+    """Handle map namespaced by a hash of the API key."""
+    return cache_for_api_key(api_key, path or default_cache_path())
+
+
+def cached_content_for_prefix(genai, model_name: str, prefix: str,
+                              cache: Optional[UploadCache] = None,
+                              ttl: timedelta = DEFAULT_CONTEXT_TTL):
+    """
+    Return a cached-content handle for a prompt prefix, creating it if needed.
+
+    Args:
+        genai: The google.generativeai module (already configured)
+        model_name: Model the cached content is created for
+        prefix: Prompt prefix to cache
+        cache: Local map of prefix hash -> handle, or None to always create
+        ttl: Lifetime of newly created cached content
+
+    Returns:
+        The CachedContent, or None if the provider refused to cache it
+        (e.g. the prefix is below the model's minimum cacheable size)
+    """
+    digest = f"{model_name}:{prefix_hash(prefix)}"
+    if cache is not None:
+        entry = cache.lookup(digest)
+        if entry is not None:
+            try:
+                return genai.caching.CachedContent.get(entry["name"])
+            except Exception:
+                cache.evict(digest)
+
+    try:
+        cached = genai.caching.CachedContent.create(model=model_name, contents=[prefix], ttl=ttl)
+    except Exception as e:
+        print(f"Warning: context caching unavailable, sending full prompt ({e})", file=sys.stderr)
+        return None
+
+    if cache is not None:
+        expires_at = getattr(cached, "expire_time", None) or datetime.now(timezone.utc) + ttl
+        cache.store(digest, cached.name, expires_at=expires_at)
+    return cached
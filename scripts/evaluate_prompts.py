@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Prompt Evaluation Runner
+
+Transcribes a corpus of audio files with reference transcripts using each
+prompt version in generated/foundational/, then reports word error rate,
+character difference and latency per prompt version, so prompt size can be
+traded against quality and speed.
+
+Corpus manifest (JSON; paths are relative to the manifest):
+    {
+      "items": [
+        {"audio": "clips/meeting.mp3", "reference": "clips/meeting.txt"},
+        {"audio": "clips/todo.wav", "reference_text": "Buy milk. Call the bank."}
+      ]
+    }
+
+Usage:
+    python evaluate_prompts.py corpus.json                # every prompt version, Gemini
+    python evaluate_prompts.py corpus.json --fake         # deterministic offline client
+    python evaluate_prompts.py corpus.json --baseline generated/eval/old.json
+"""
+
+import argparse
+import asyncio
+import difflib
+import hashlib
+import json
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from batch_transcribe import TranscriptionFailed, call_with_retries
+from gemini_client import FakeClient, TranscriptionClient
+from prompt_stack.tokens import heuristic_count
+
+REPO_ROOT = Path(__file__).parent.parent
+PROMPTS_DIR = REPO_ROOT / "generated" / "foundational"
+REPORTS_DIR = REPO_ROOT / "generated" / "eval"
+MODEL_NAME = "gemini-2.5-flash"
+
+_WORD = re.compile(r"[\w']+")
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercased words with punctuation removed, for WER."""
+    return _WORD.findall(text.lower())
+
+
+def word_edits(reference: List[str], hypothesis: List[str]) -> int:
+    """Levenshtein distance between two word sequences."""
+    if not reference:
+        return len(hypothesis)
+    ids: Dict[str, int] = {}
+    ref = [ids.setdefault(w, len(ids)) for w in reference]
+    hyp = [ids.setdefault(w, len(ids)) for w in hypothesis]
+
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1,            # deletion
+                               current[j - 1] + 1,         # insertion
+                               previous[j - 1] + (r != h)))  # substitution
+        previous = current
+    return previous[-1]
+
+
+def word_error_rate(reference: str, hypothesis: str) -> tuple[float, int, int]:
+    """
+    WER of a hypothesis against a reference, on normalized words.
+
+    Returns:
+        Tuple of (wer, word edits, reference word count)
+    """
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    edits = word_edits(ref, hyp)
+    return (edits / len(ref) if ref else float(bool(hyp))), edits, len(ref)
+
+
+def char_diff(reference: str, hypothesis: str) -> float:
+    """Fraction of characters that differ (1 - difflib similarity), whitespace collapsed."""
+    a = " ".join(reference.split())
+    b = " ".join(hypothesis.split())
+    return 1.0 - difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def latency_stats(values: List[float]) -> Dict[str, Optional[float]]:
+    """Mean, median, p95 and max of a list of latencies in seconds."""
+    if not values:
+        return {"mean": None, "p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "mean": round(statistics.fmean(ordered), 4),
+        "p50": round(statistics.median(ordered), 4),
+        "p95": round(p95, 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def load_corpus(manifest_path: Path) -> List[Dict]:
+    """
+    Load a corpus manifest.
+
+    Returns:
+        List of {"audio": Path, "reference": str}
+
+    Raises:
+        ValueError: If the manifest is malformed or a file is missing
+    """
+    base = manifest_path.parent
+    data = json.loads(manifest_path.read_text())
+    items = []
+    for entry in data.get("items", []):
+        audio = base / entry["audio"]
+        if not audio.exists():
+            raise ValueError(f"Audio file not found: {audio}")
+        if "reference_text" in entry:
+            reference = entry["reference_text"]
+        elif "reference" in entry:
+            reference = (base / entry["reference"]).read_text()
+        else:
+            raise ValueError(f"No reference for {entry['audio']}")
+        items.append({"audio": audio, "reference": reference})
+    if not items:
+        raise ValueError(f"No items in corpus manifest: {manifest_path}")
+    return items
+
+
+class ReferenceFakeClient(FakeClient):
+    """
+    Deterministic offline client that answers with a perturbed reference.
+
+    Each reference word is dropped with probability `noise`, decided by a
+    hash of the prompt and word position, so a given prompt always yields
+    the same transcript. Latency grows with prompt size, like a real model.
+    """
+
+    def __init__(self, references: Dict[str, str], noise: float = 0.05,
+                 generate_latency: float = 0.0, latency_per_1k_tokens: float = 0.0):
+        super().__init__(generate_latency=generate_latency)
+        self.references = references
+        self.noise = noise
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+
+    async def upload(self, audio_path: Path):
+        handle = await super().upload(audio_path)
+        handle["path"] = str(Path(audio_path).resolve())
+        return handle
+
+    async def generate(self, prompt: str, audio_handle) -> str:
+        self.calls["generate"] += 1
+        await asyncio.sleep(self.generate_latency +
+                            self.latency_per_1k_tokens * heuristic_count(prompt) / 1000)
+        seed = hashlib.sha256(prompt.encode("utf-8")).digest()
+        kept = []
+        for i, word in enumerate(self.references[audio_handle["path"]].split()):
+            digest = hashlib.sha256(seed + i.to_bytes(4, "little")).digest()
+            if int.from_bytes(digest[:4], "little") / 2 ** 32 >= self.noise:
+                kept.append(word)
+        return " ".join(kept)
+
+
+async def generate_with_retries(client: TranscriptionClient, prompt: str, handle,
+                                timeout: float, retries: int,
+                                backoff: float = 1.0) -> tuple[str, float, int]:
+    """
+    Generate one transcript with batch_transcribe.call_with_retries().
+
+    Returns:
+        Tuple of (transcript, seconds for the successful attempt, attempts)
+
+    Raises:
+        TranscriptionFailed: If every attempt fails
+    """
+    async def timed():
+        start = time.perf_counter()
+        text = await client.generate(prompt, handle)
+        return text, time.perf_counter() - start
+
+    (text, seconds), attempts = await call_with_retries(timed, timeout, retries, backoff)
+    return text, seconds, attempts
+
+
+async def evaluate(client: TranscriptionClient, prompts: Dict[str, str], items: List[Dict],
+                   concurrency: int = 4, timeout: float = 300.0,
+                   retries: int = 2) -> List[Dict]:
+    """
+    Run every prompt over every corpus item.
+
+    Each audio file is uploaded once (with the same timeout and retries)
+    and reused for all prompts. Items whose upload fails are recorded as
+    failures for every prompt.
+
+    Args:
+        client: Model backend
+        prompts: Prompt version name -> prompt text
+        items: Corpus items from load_corpus()
+        concurrency: Maximum requests in flight
+        timeout: Per-attempt timeout in seconds
+        retries: Retries per request after the first attempt
+
+    Returns:
+        One result per prompt version (see build_prompt_result())
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def upload(item):
+        async with semaphore:
+            try:
+                handle, _ = await call_with_retries(lambda: client.upload(item["audio"]),
+                                                    timeout, retries)
+                return handle
+            except TranscriptionFailed as e:
+                return e
+
+    handles = await asyncio.gather(*(upload(item) for item in items))
+
+    async def run(name: str, index: int) -> Dict:
+        item = items[index]
+        if isinstance(handles[index], TranscriptionFailed):
+            failure = handles[index]
+            return {"audio": str(item["audio"]), "error": f"upload failed: {failure}",
+                    "attempts": failure.attempts}
+        async with semaphore:
+            try:
+                text, seconds, attempts = await generate_with_retries(
+                    client, prompts[name], handles[index], timeout, retries)
+            except TranscriptionFailed as e:
+                return {"audio": str(item["audio"]), "error": str(e), "attempts": e.attempts}
+        wer, edits, words = word_error_rate(item["reference"], text)
+        return {
+            "audio": str(item["audio"]),
+            "wer": round(wer, 4),
+            "edits": edits,
+            "reference_words": words,
+            "char_diff": round(char_diff(item["reference"], text), 4),
+            "latency": round(seconds, 4),
+            "attempts": attempts,
+        }
+
+    tasks = {name: [asyncio.ensure_future(run(name, i)) for i in range(len(items))]
+             for name in prompts}
+    results = []
+    for name, futures in tasks.items():
+        item_results = [await f for f in futures]
+        results.append(build_prompt_result(name, prompts[name], item_results))
+    return results
+
+
+def build_prompt_result(name: str, prompt: str, item_results: List[Dict]) -> Dict:
+    """Aggregate per-item results for one prompt version."""
+    ok = [r for r in item_results if "error" not in r]
+    edits = sum(r["edits"] for r in ok)
+    words = sum(r["reference_words"] for r in ok)
+    return {
+        "name": name,
+        "sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "chars": len(prompt),
+        "tokens": heuristic_count(prompt),
+        "wer": round(edits / words, 4) if words else None,
+        "char_diff": round(statistics.fmean(r["char_diff"] for r in ok), 4) if ok else None,
+        "latency": latency_stats([r["latency"] for r in ok]),
+        "failures": len(item_results) - len(ok),
+        "items": item_results,
+    }
+
+
+def load_prompts(paths: List[str]) -> Dict[str, str]:
+    """Prompt version name (file name) -> text; default: every file in generated/foundational/."""
+    files = [Path(p) for p in paths] if paths else sorted(PROMPTS_DIR.glob("*.md"))
+    return {f.name: f.read_text() for f in files}
+
+
+def _fmt(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None) -> None:
+    """Print one row per prompt version, with deltas against a baseline report."""
+    previous = {}
+    if baseline:
+        for result in baseline.get("prompts", []):
+            previous[result["name"]] = result
+            previous[result["sha256"]] = result
+
+    print(f"{'Prompt':<40} {'Tokens':>7} {'WER':>7} {'CharDiff':>9} "
+          f"{'p50 s':>7} {'p95 s':>7} {'Fail':>5}")
+    for result in report["prompts"]:
+        print(f"{result['name']:<40} {result['tokens']:>7} {_fmt(result['wer'], '.4f'):>7} "
+              f"{_fmt(result['char_diff'], '.4f'):>9} {_fmt(result['latency']['p50'], '.3f'):>7} "
+              f"{_fmt(result['latency']['p95'], '.3f'):>7} {result['failures']:>5}")
+        old = previous.get(result["sha256"]) or previous.get(result["name"])
+        if old and old.get("wer") is not None and result["wer"] is not None:
+            print(f"{'  vs baseline':<40} {result['tokens'] - old['tokens']:>+7} "
+                  f"{result['wer'] - old['wer']:>+7.4f} "
+                  f"{(result['char_diff'] or 0) - (old['char_diff'] or 0):>+9.4f} "
+                  f"{(result['latency']['p50'] or 0) - (old['latency']['p50'] or 0):>+7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate prompt versions against a corpus of reference transcripts",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Every prompt in generated/foundational/ with Gemini
+  %(prog)s corpus.json
+
+  # Offline, deterministic run of two prompt versions
+  %(prog)s corpus.json --fake --prompts generated/foundational/foundational_221225.md \\
+      generated/foundational/foundational_301225.md
+
+  # Compare with an earlier report
+  %(prog)s corpus.json --baseline generated/eval/corpus_20260101-120000.json
+        """
+    )
+    parser.add_argument("corpus", help="Corpus manifest (JSON)")
+    parser.add_argument("--prompts", nargs="+",
+                        help="Prompt files to evaluate (default: generated/foundational/*.md)")
+    parser.add_argument("--fake", action="store_true",
+                        help="Use a deterministic offline client built from the references")
+    parser.add_argument("--fake-noise", type=float, default=0.05,
+                        help="With --fake, fraction of reference words dropped (default: 0.05)")
+    parser.add_argument("--model", default=MODEL_NAME, help=f"Gemini model (default: {MODEL_NAME})")
+    parser.add_argument("-j", "--concurrency", type=int, default=4,
+                        help="Requests in flight at once (default: 4)")
+    parser.add_argument("--timeout", type=float, default=300.0,
+                        help="Per-request timeout in seconds (default: 300)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Retries per request (default: 2)")
+    parser.add_argument("-o", "--output",
+                        help="Report file (default: generated/eval/<corpus>_<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    corpus_path = Path(args.corpus)
+    try:
+        items = load_corpus(corpus_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading corpus: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        prompts = load_prompts(args.prompts)
+    except OSError as e:
+        print(f"Error loading prompts: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not prompts:
+        print(f"Error: No prompt versions found in {PROMPTS_DIR}", file=sys.stderr)
+        sys.exit(1)
+
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = json.loads(Path(args.baseline).read_text())
+        except (OSError, ValueError) as e:
+            print(f"Error loading baseline: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.fake:
+        references = {str(item["audio"].resolve()): item["reference"] for item in items}
+        client = ReferenceFakeClient(references, noise=args.fake_noise)
+        model = "fake"
+    else:
+        import os
+        from gemini_client import GeminiClient
+        from transcribe_gemini import load_environment
+
+        load_environment()
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            print("Error: GEMINI_API_KEY not found in environment", file=sys.stderr)
+            sys.exit(1)
+        client = GeminiClient(api_key, args.model)
+        model = args.model
+
+    print(f"Evaluating {len(prompts)} prompt version(s) on {len(items)} file(s) with {model}...")
+    results = asyncio.run(evaluate(client, prompts, items, args.concurrency,
+                                   args.timeout, args.retries))
+
+    report = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "corpus": str(corpus_path),
+        "model": model,
+        "items": len(items),
+        "prompts": results,
+    }
+    output = Path(args.output) if args.output else \
+        REPORTS_DIR / f"{corpus_path.stem}_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+
+    print_report(report, baseline)
+    print(f"\nReport written to: {output}")
+    if any(result["failures"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
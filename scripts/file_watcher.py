@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+File change watcher for the prompt stack tooling.
+
+Uses Linux inotify (through ctypes) when available and falls back to
+polling file modification times everywhere else. Changes are reported in
+debounced batches of absolute file paths.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+# inotify event masks (from <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_ATTRIB)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detects changes by periodically comparing file mtimes and sizes."""
+
+    def __init__(self, roots: Iterable[Path], interval: float = 0.5):
+        """
+        Initialize the watcher.
+
+        Args:
+            roots: Files or directories to watch (directories recursively)
+            interval: Seconds between scans
+        """
+        self.roots = [Path(r).resolve() for r in roots]
+        self.interval = interval
+        self._stop = threading.Event()
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            paths = root.rglob("*") if root.is_dir() else [root]
+            for path in paths:
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                if not path.is_dir():
+                    snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def _wait_for_changes(self, timeout: Optional[float]) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stop.is_set():
+            current = self._scan()
+            changed = {p for p in current.keys() | self._snapshot.keys()
+                       if current.get(p) != self._snapshot.get(p)}
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            self._stop.wait(self.interval)
+        return set()
+
+    def changes(self, debounce: float = 0.1) -> Iterator[Set[Path]]:
+        """
+        Yield batches of changed files until stop() is called.
+
+        Args:
+            debounce: Quiet period (seconds) that closes a batch
+        """
+        while not self._stop.is_set():
+            batch = self._wait_for_changes(None)
+            while batch and not self._stop.is_set():
+                more = self._wait_for_changes(max(debounce, self.interval))
+                if not more:
+                    break
+                batch |= more
+            if batch:
+                yield batch
+
+    def stop(self) -> None:
+        """Stop yielding changes."""
+        self._stop.set()
+
+    def close(self) -> None:
+        """Release resources (nothing to release when polling)."""
+        self.stop()
+
+
+class InotifyWatcher:
+    """Detects changes using Linux inotify watches on every directory."""
+
+    def __init__(self, roots: Iterable[Path]):
+        """
+        Initialize the watcher.
+
+        Args:
+            roots: Files or directories to watch (directories recursively)
+
+        Raises:
+            OSError: If inotify is not available on this system
+        """
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._dirs: Dict[int, Path] = {}
+        self._tree_dirs: Set[Path] = set()
+        self._files: Set[Path] = set()
+        self._stop = threading.Event()
+        for root in roots:
+            root = Path(root).resolve()
+            if root.is_dir():
+                self._add_tree(root)
+            else:
+                # Watch the parent and filter to the named file
+                self._files.add(root)
+                self._add_dir(root.parent)
+
+    def _add_dir(self, directory: Path) -> None:
+        if directory in self._dirs.values():
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+        self._dirs[wd] = directory
+
+    def _add_tree(self, root: Path) -> None:
+        for directory in [root] + [p for p in root.rglob("*") if p.is_dir()]:
+            self._add_dir(directory)
+            self._tree_dirs.add(directory)
+
+    def _read_events(self, timeout: Optional[float]) -> Set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        data = os.read(self._fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and directory in self._tree_dirs:
+                    self._add_tree(path)
+                    changed.update(p for p in path.rglob("*") if p.is_file())
+                continue
+            if path in self._files or directory in self._tree_dirs:
+                changed.add(path)
+        return changed
+
+    def changes(self, debounce: float = 0.1) -> Iterator[Set[Path]]:
+        """
+        Yield batches of changed files until stop() is called.
+
+        Args:
+            debounce: Quiet period (seconds) that closes a batch
+        """
+        while not self._stop.is_set():
+            batch = self._read_events(0.5)
+            while batch and not self._stop.is_set():
+                more = self._read_events(debounce)
+                if not more:
+                    break
+                batch |= more
+            if batch:
+                yield batch
+
+    def stop(self) -> None:
+        """Stop yielding changes."""
+        self._stop.set()
+
+    def close(self) -> None:
+        """Stop and close the inotify file descriptor."""
+        self.stop()
+        os.close(self._fd)
+
+
+def create_watcher(roots: Iterable[Path], interval: float = 0.5, polling: bool = False):
+    """
+    Create the best available watcher for the given roots.
+
+    Args:
+        roots: Files or directories to watch
+        interval: Polling interval used by the fallback watcher
+        polling: Force the polling watcher even if inotify is available
+
+    Returns:
+        An InotifyWatcher or PollingWatcher
+    """
+    roots = [Path(r) for r in roots if Path(r).exists()]
+    if not polling:
+        try:
+            return InotifyWatcher(roots)
+        except OSError:
+            pass
+    return PollingWatcher(roots, interval)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Model client interface for the transcription scripts.
+
+TranscriptionClient is the seam between the transcription logic and the
+model backend. GeminiClient talks to the Gemini API; FakeClient is a
+deterministic offline stand-in used for testing and benchmarking.
+
+Clients can cache a shared prompt prefix provider-side (prepare_prefix);
+generate() then sends only the part of the prompt after that prefix.
+generate_stream() yields the transcript in chunks as the model produces it.
+"""
+
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+
+class TranscriptionClient:
+    """Interface for uploading audio and generating transcripts."""
+
+    async def upload(self, audio_path: Path):
+        """
+        Upload an audio file and return a handle usable by generate().
+
+        Clients may send small files inline instead; upload_cache.submission_path()
+        tells which path a handle took.
+        """
+        raise NotImplementedError
+
+    async def generate(self, prompt: str, audio_handle) -> str:
+        """Generate a transcript for uploaded audio using the given prompt."""
+        raise NotImplementedError
+
+    async def generate_stream(self, prompt: str, audio_handle) -> AsyncIterator[str]:
+        """
+        Yield the transcript in chunks as they are generated.
+
+        The default implementation yields the complete generate() result once.
+        """
+        yield await self.generate(prompt, audio_handle)
+
+    async def prepare_prefix(self, prefix: str):
+        """
+        Cache a prompt prefix so later prompts starting with it reuse it.
+
+        Returns:
+            A cached-content handle, or None if the backend does not cache
+        """
+        return None
+
+
+class GeminiClient(TranscriptionClient):
+    """TranscriptionClient backed by the Gemini API."""
+
+    def __init__(self, api_key: str, model_name: str = "gemini-2.5-flash",
+                 upload_cache: bool = True, generation_config: Optional[dict] = None,
+                 inline_max_bytes: Optional[int] = None):
+        import google.generativeai as genai
+        from upload_cache import INLINE_MAX_BYTES, cache_for_api_key
+
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.api_key = api_key
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        self.upload_cache = cache_for_api_key(api_key) if upload_cache else None
+        self.generation_config = generation_config or None
+        self.inline_max_bytes = INLINE_MAX_BYTES if inline_max_bytes is None else inline_max_bytes
+        self.submissions = {"inline": 0, "upload": 0, "reused": 0}
+        self._prefix = None
+        self._prefix_model = None
+
+    async def upload(self, audio_path: Path):
+        from upload_cache import submit_audio
+
+        # The SDK upload is blocking, so run it off the event loop
+        audio_part, path = await asyncio.to_thread(
+            submit_audio, self.genai, audio_path, self.upload_cache, self.inline_max_bytes)
+        self.submissions[path] += 1
+        return audio_part
+
+    def _request(self, prompt: str, audio_handle):
+        """Model and contents for a prompt, using the cached prefix when it applies."""
+        if self._prefix_model is not None and prompt.startswith(self._prefix):
+            rest = prompt[len(self._prefix):].strip()
+            return self._prefix_model, [rest, audio_handle] if rest else [audio_handle]
+        return self.model, [prompt, audio_handle]
+
+    async def generate(self, prompt: str, audio_handle) -> str:
+        model, contents = self._request(prompt, audio_handle)
+        response = await model.generate_content_async(
+            contents, generation_config=self.generation_config)
+        return response.text
+
+    async def generate_stream(self, prompt: str, audio_handle) -> AsyncIterator[str]:
+        model, contents = self._request(prompt, audio_handle)
+        response = await model.generate_content_async(
+            contents, generation_config=self.generation_config, stream=True)
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. only finish metadata)
+                continue
+            if text:
+                yield text
+
+    async def prepare_prefix(self, prefix: str):
+        from context_cache import cached_content_for_prefix, context_cache_for_api_key
+
+        cached = await asyncio.to_thread(
+            cached_content_for_prefix, self.genai, self.model_name, prefix,
+            context_cache_for_api_key(self.api_key))
+        if cached is not None:
+            self._prefix = prefix
+            self._prefix_model = self.genai.GenerativeModel.from_cached_content(cached_content=cached)
+        return cached
+
+
+class FakeClient(TranscriptionClient):
+    """
+    Deterministic offline client.
+
+    The "transcript" is derived from the audio file name, size and prompt
+    hash, so identical inputs always give identical output. Latency and
+    transient failures can be simulated.
+    """
+
+    def __init__(self, upload_latency: float = 0.0, generate_latency: float = 0.0,
+                 fail_times: int = 0, model_name: str = "fake-model",
+                 chunk_size: int = 16, chunk_latency: float = 0.0,
+                 inline_max_bytes: int = 0):
+        """
+        Initialize the fake client.
+
+        Args:
+            upload_latency: Seconds each upload takes
+            generate_latency: Seconds each generation takes (for streams,
+                the delay before the first chunk)
+            fail_times: Number of initial generate() calls per file that fail
+            model_name: Name reported as the model
+            chunk_size: Characters per streamed chunk
+            chunk_latency: Seconds between streamed chunks
+            inline_max_bytes: Files up to this size skip upload_latency, as
+                if sent inline (0: every file is "uploaded")
+        """
+        self.upload_latency = upload_latency
+        self.generate_latency = generate_latency
+        self.chunk_size = chunk_size
+        self.chunk_latency = chunk_latency
+        self.fail_times = fail_times
+        self.model_name = model_name
+        self.inline_max_bytes = inline_max_bytes
+        self.calls = {"upload": 0, "generate": 0, "prefix_cache": 0, "prefix_hits": 0}
+        self.submissions = {"inline": 0, "upload": 0, "reused": 0}
+        self._failures = {}
+        self._prefixes = {}
+        self._prefix = None
+
+    async def upload(self, audio_path: Path):
+        self.calls["upload"] += 1
+        audio_path = Path(audio_path)
+        size = audio_path.stat().st_size
+        if size <= self.inline_max_bytes:
+            self.submissions["inline"] += 1
+            return {"name": audio_path.name, "size": size, "inline": True}
+        self.submissions["upload"] += 1
+        await asyncio.sleep(self.upload_latency)
+        return {"name": audio_path.name, "size": size}
+
+    async def generate(self, prompt: str, audio_handle) -> str:
+        self.calls["generate"] += 1
+        await asyncio.sleep(self.generate_latency)
+
+        name = audio_handle["name"]
+        failures = self._failures.get(name, 0)
+        if failures < self.fail_times:
+            self._failures[name] = failures + 1
+            raise RuntimeError(f"Simulated failure {failures + 1} for {name}")
+
+        if self._prefix is not None and prompt.startswith(self._prefix):
+            self.calls["prefix_hits"] += 1
+
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return (f"Transcript of {name} ({audio_handle['size']} bytes) "
+                f"generated with prompt {prompt_hash}.")
+
+    async def prepare_prefix(self, prefix: str):
+        """Record the prefix locally; the handle mimics a provider cache name."""
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        if digest not in self._prefixes:
+            self.calls["prefix_cache"] += 1
+            self._prefixes[digest] = {"name": f"cachedContents/fake-{digest[:12]}",
+                                      "prefix_hash": digest}
+        self._prefix = prefix
+        return self._prefixes[digest]
+
+    async def generate_stream(self, prompt: str, audio_handle) -> AsyncIterator[str]:
+        """Yield the generate() text in chunk_size pieces, chunk_latency apart."""
+        text = await self.generate(prompt, audio_handle)
+        for start in range(0, len(text), self.chunk_size):
+            if start:
+                await asyncio.sleep(self.chunk_latency)
+            yield text[start:start + self.chunk_size]
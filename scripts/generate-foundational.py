@@ -5,6 +5,7 @@ Foundational Prompt Generator
 Generates the concatenated foundational cleanup prompt from layers.json.
 Reads content from markdown files referenced in the config.
 Outputs are version-controlled with date-stamped filenames (ddmmyy format).
+Outputs whose inputs are unchanged since the last build are skipped.
 """
 
 import json
@@ -12,104 +13,16 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-
-def load_layers_config(repo_root: Path) -> dict:
-    """Load the layers.json configuration file."""
-    config_path = repo_root / "layers.json"
-    with open(config_path, 'r') as f:
-        return json.load(f)
-
-
-def read_markdown_file(repo_root: Path, file_path: str) -> str:
-    """Read content from a markdown file."""
-    full_path = repo_root / file_path
-    if full_path.exists():
-        return full_path.read_text().strip()
-    return ""
-
-
-def extract_foundational_instructions(config: dict, repo_root: Path) -> list[tuple[str, str, str, bool]]:
-    """
-    Extract all foundational layer instructions in optimized order.
-
-    Order: Context -> Personalization -> Exclusions -> Corrections -> Inference
-
-    Returns:
-        List of tuples: (layer_name, element_name, instruction, no_header)
-    """
-    instructions = []
-
-    foundational = config.get("foundational", {})
-    layers = foundational.get("layers", [])
-
-    # Custom order: context first, then personalization, then the rest
-    # This puts user identity info near the start for better prompt flow
-    order_map = {
-        "01-context": 1,
-        "05-personalization": 2,  # Move personalization early
-        "02-exclusions": 3,
-        "03-corrections": 4,
-        "04-inference": 5,
-    }
-
-    sorted_layers = sorted(
-        layers,
-        key=lambda x: order_map.get(x.get("folder", ""), x.get("order", 99))
-    )
-
-    for layer in sorted_layers:
-        layer_name = layer.get("name", "Unknown")
-        elements = layer.get("elements", [])
-
-        for element in elements:
-            element_name = element.get("name", "unknown")
-            file_path = element.get("file_path", "")
-            no_header = element.get("no_header", False)
-
-            # Read from file if file_path exists, otherwise fall back to instruction
-            if file_path:
-                instruction = read_markdown_file(repo_root, file_path)
-            else:
-                instruction = element.get("instruction", "")
-
-            if instruction:
-                instructions.append((layer_name, element_name, instruction, no_header))
-
-    return instructions
-
-
-def format_element_name(element_name: str) -> str:
-    """Convert element-name to Title Case Header."""
-    return element_name.replace("-", " ").title()
-
-
-def generate_foundational_prompt(instructions: list[tuple[str, str, str, bool]],
-                                  include_headers: bool = True) -> str:
-    """
-    Generate the concatenated foundational prompt.
-
-    Args:
-        instructions: List of (layer_name, element_name, instruction, no_header) tuples
-        include_headers: If True, include section headers for each element (default: True)
-
-    Returns:
-        Concatenated prompt string
-    """
-    if include_headers:
-        sections = []
-
-        for layer_name, element_name, instruction, no_header in instructions:
-            if no_header:
-                # No header for this element (e.g., task-definition)
-                sections.append(instruction)
-            else:
-                header = format_element_name(element_name)
-                sections.append(f"## {header}\n\n{instruction}")
-
-        return "\n\n".join(sections)
-    else:
-        # Simple concatenation without headers
-        return "\n\n".join(instruction for _, _, instruction, _ in instructions)
+from prompt_stack import (
+    extract_foundational_instructions,
+    generate_foundational_prompt,
+    load_layers_config,
+)
+from prompt_stack import compact as compact_module
+from prompt_stack import layers as layers_module
+from prompt_stack.bundle import LayerBundle, default_bundle_path
+from prompt_stack.build import BuildManifest, default_manifest_path, foundational_inputs
+from prompt_stack.compact import compact_sections, describe_reduction
 
 
 def get_output_filenames(date: datetime = None) -> tuple[str, str]:
@@ -146,6 +59,15 @@ Examples:
 
   # Output to stdout instead of file
   %(prog)s --stdout
+
+  # Read layers from the single-file bundle
+  %(prog)s --bundle
+
+  # Rebuild even if layers.json and the layer files are unchanged
+  %(prog)s --force
+
+  # Compact render (no markdown, duplicate sentences dropped) with an audit map
+  %(prog)s --compact --compact-map compact-map.json
         """
     )
 
@@ -167,6 +89,41 @@ Examples:
         action='store_true'
     )
 
+    parser.add_argument(
+        '--compact',
+        help='Write a compact prompt: markdown stripped, whitespace collapsed and '
+             'near-duplicate sentences across layers dropped',
+        action='store_true'
+    )
+
+    parser.add_argument(
+        '--compact-map',
+        help='With --compact, write the sentence-to-layer audit map to this JSON file',
+        type=str
+    )
+
+    parser.add_argument(
+        '--similarity',
+        help='With --compact, word-overlap ratio at which sentences count as duplicates (default: 0.8)',
+        default=0.8,
+        type=float
+    )
+
+    parser.add_argument(
+        '--bundle',
+        metavar='FILE',
+        nargs='?',
+        const='',
+        help='Read layers from a bundle written by concatenate.py --write-bundle '
+             '(default: generated/cache/layers.bundle)'
+    )
+
+    parser.add_argument(
+        '--force',
+        help='Rebuild outputs even if no input has changed',
+        action='store_true'
+    )
+
     parser.add_argument(
         '-r', '--repo-root',
         help='Repository root directory (default: script directory)',
@@ -201,8 +158,45 @@ Examples:
         print(f"Error parsing layers.json: {e}", file=sys.stderr)
         sys.exit(1)
 
+    if args.compact_map and not args.compact:
+        parser.error("--compact-map requires --compact")
+
+    # Skip the build when no input has changed since the outputs were written
+    output_dir = repo_root / "generated" / "foundational"
+    if args.compact:
+        # Kept apart from the dated files so the editable version is never replaced
+        outputs = [output_dir / f"foundational_compact_{date.strftime('%d%m%y')}.md"]
+        params = f"headers={int(not args.no_headers)};compact={args.similarity}"
+    else:
+        outputs = [output_dir / name for name in get_output_filenames(date)]
+        params = f"headers={int(not args.no_headers)}"
+    bundle = None
+    if args.bundle is not None:
+        bundle_path = Path(args.bundle) if args.bundle else default_bundle_path(repo_root)
+        try:
+            bundle = LayerBundle(bundle_path)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot open bundle: {e}", file=sys.stderr)
+            sys.exit(1)
+        inputs = [repo_root / "layers.json", bundle_path]
+    else:
+        inputs = foundational_inputs(config, repo_root)
+    inputs += [Path(__file__), Path(layers_module.__file__)]
+    if args.compact:
+        inputs.append(Path(compact_module.__file__))
+
+    manifest = BuildManifest(default_manifest_path(repo_root), force=args.force)
+    if not args.stdout and not args.compact_map and all(
+            manifest.is_current(output, inputs, params) for output in outputs):
+        for output in outputs:
+            print(f"Up to date: {output}")
+        return
+
     # Extract and concatenate
-    instructions = extract_foundational_instructions(config, repo_root)
+    if bundle is not None:
+        instructions = extract_foundational_instructions(config, repo_root, reader=bundle.read)
+    else:
+        instructions = extract_foundational_instructions(config, repo_root)
 
     if not instructions:
         print("Error: No foundational instructions found", file=sys.stderr)
@@ -210,28 +204,37 @@ Examples:
 
     prompt = generate_foundational_prompt(instructions, include_headers=not args.no_headers)
 
+    if args.compact:
+        sections = [(f"{layer}/{element}", text) for layer, element, text, _ in instructions]
+        prompt, report = compact_sections(sections, similarity=args.similarity, baseline=prompt)
+        print(describe_reduction(report), file=sys.stderr)
+        if args.compact_map:
+            with open(args.compact_map, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Compact map written to: {args.compact_map}", file=sys.stderr)
+
     # Output
     if args.stdout:
         print(prompt)
-    else:
-        output_dir = repo_root / "generated" / "foundational"
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        auto_filename, manual_filename = get_output_filenames(date)
+        return
 
-        # Write auto-generated version
-        auto_path = output_dir / auto_filename
-        with open(auto_path, 'w') as f:
-            f.write(prompt)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Write manual editing version (same content, for user to customize)
-        manual_path = output_dir / manual_filename
-        with open(manual_path, 'w') as f:
+    # The auto-generated version, plus (unless compact) a manual editing
+    # version with the same content for the user to customize
+    for output in outputs:
+        if manifest.is_current(output, inputs, params):
+            print(f"Up to date: {output}")
+            continue
+        with open(output, 'w') as f:
             f.write(prompt)
+        manifest.record(output, inputs, params)
+        print(f"Generated: {output}")
+    manifest.save()
 
-        print(f"Generated: {auto_path}")
-        print(f"For editing: {manual_path}")
-        print(f"Layers included: {len(instructions)}")
+    if not args.compact:
+        print(f"For editing: {outputs[1]}")
+    print(f"Layers included: {len(instructions)}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Stylistic Combination Generator
+
+Enumerates every combination of stylistic layers from layers.json (one
+element per category) on top of the foundational prompt. The foundational
+prefix and each partial combination are joined once and shared by every
+combination that extends them, and results are streamed to disk.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+from prompt_stack import (
+    atomic_write_text,
+    extract_foundational_instructions,
+    generate_foundational_prompt,
+    load_layers_config,
+    read_markdown_file,
+)
+
+# A category is (folder, [(element_name, rendered_section_bytes), ...])
+Category = tuple[str, list[tuple[str, bytes]]]
+
+
+def load_stylistic_categories(config: dict, repo_root: Path,
+                              include_headers: bool = True,
+                              select: dict[str, set[str]] = None,
+                              exclude: set[str] = None) -> list[Category]:
+    """
+    Load and pre-render every stylistic element, grouped by category.
+
+    Args:
+        config: Parsed layers.json
+        repo_root: Repository root the file paths are relative to
+        include_headers: Render each element with a "## Title" header
+        select: Optional {category: {element, ...}} filter
+        exclude: Optional set of categories to leave out entirely
+
+    Returns:
+        Categories in layers.json order, each with its rendered sections
+
+    Raises:
+        ValueError: If a selected category has no element with instruction text
+    """
+    select = select or {}
+    exclude = exclude or set()
+
+    layers = config.get("stylistic", {}).get("layers", [])
+    categories = []
+    for layer in sorted(layers, key=lambda x: x.get("order", 99)):
+        folder = layer.get("folder", "")
+        if folder in exclude:
+            continue
+
+        wanted = select.get(folder)
+        sections = []
+        for element in layer.get("elements", []):
+            element_name = element.get("name", "unknown")
+            if wanted is not None and element_name not in wanted:
+                continue
+
+            file_path = element.get("file_path", "")
+            instruction = read_markdown_file(repo_root, file_path) if file_path else ""
+            instruction = instruction or element.get("instruction", "")
+            if not instruction:
+                continue
+
+            section = generate_foundational_prompt(
+                [(layer.get("name", folder), element_name, instruction, False)],
+                include_headers=include_headers)
+            sections.append((element_name, section.encode("utf-8")))
+
+        if sections:
+            categories.append((folder, sections))
+        elif wanted is not None:
+            raise ValueError(f"No instruction text for selected {folder} elements: "
+                             f"{', '.join(sorted(wanted))}")
+
+    return categories
+
+
+def count_combinations(categories: list[Category]) -> int:
+    """Number of combinations the categories produce."""
+    total = 1
+    for _, sections in categories:
+        total *= len(sections)
+    return total
+
+
+def iter_combinations(prefix: bytes, categories: list[Category],
+                      separator: bytes = b"\n\n") -> Iterator[tuple[tuple[str, ...], bytes, bytes]]:
+    """
+    Yield every combination as (selection, shared_prefix, tail).
+
+    The full prompt is shared_prefix + tail. Prefixes are built depth-first
+    and reused by all combinations below them, so each partial join is
+    performed once rather than once per combination.
+    """
+    if not categories:
+        yield (), b"", prefix
+        return
+
+    last = len(categories) - 1
+
+    def walk(depth: int, joined: bytes, selection: tuple[str, ...]):
+        _, sections = categories[depth]
+        if depth == last:
+            for name, section in sections:
+                yield selection + (name,), joined, separator + section
+            return
+        for name, section in sections:
+            yield from walk(depth + 1, joined + separator + section, selection + (name,))
+
+    yield from walk(0, prefix, ())
+
+
+def combination_id(selection: tuple[str, ...]) -> str:
+    """Stable identifier for a combination, used for file names and index keys."""
+    return "__".join(selection) or "foundational"
+
+
+def write_directory(output_dir: Path,
+                    combinations: Iterator[tuple[tuple[str, ...], bytes, bytes]]) -> int:
+    """Write one markdown file per combination. Returns the number written."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for selection, head, tail in combinations:
+        with open(output_dir / f"{combination_id(selection)}.md", "wb") as f:
+            f.write(head)
+            f.write(tail)
+        count += 1
+    return count
+
+
+def write_indexed(output_file: Path, categories: list[Category],
+                  combinations: Iterator[tuple[tuple[str, ...], bytes, bytes]]) -> int:
+    """
+    Write every combination into a single file plus a JSON offset index.
+
+    The index (<output_file>.index.json) maps each combination id to its byte
+    offset and length in the output file and the element chosen per category.
+    Returns the number written.
+    """
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    folders = [folder for folder, _ in categories]
+    entries = {}
+    offset = 0
+    with open(output_file, "wb") as f:
+        for selection, head, tail in combinations:
+            f.write(head)
+            f.write(tail)
+            length = len(head) + len(tail)
+            entries[combination_id(selection)] = {
+                "offset": offset,
+                "length": length,
+                "layers": dict(zip(folders, selection)),
+            }
+            offset += length
+
+    index = {"file": output_file.name, "categories": folders, "combinations": entries}
+    atomic_write_text(output_file.with_name(output_file.name + ".index.json"),
+                      json.dumps(index, indent=1) + "\n")
+    return len(entries)
+
+
+def parse_select(values: list[str]) -> dict[str, set[str]]:
+    """Parse repeated CATEGORY=a,b options into a filter dictionary."""
+    select = {}
+    for value in values or []:
+        category, sep, names = value.partition("=")
+        if not sep or not names:
+            raise ValueError(f"Invalid --select '{value}'. Use CATEGORY=element[,element]")
+        select.setdefault(category, set()).update(n.strip() for n in names.split(","))
+    return select
+
+
+def check_selection(config: dict, select: dict[str, set[str]], exclude: set[str]) -> None:
+    """
+    Check --select/--exclude names against the stylistic layers in layers.json.
+
+    Raises:
+        ValueError: Naming every unknown category or element
+    """
+    known = {layer.get("folder", ""): {e.get("name", "unknown") for e in layer.get("elements", [])}
+             for layer in config.get("stylistic", {}).get("layers", [])}
+    problems = []
+    for category in sorted(set(select) | exclude):
+        if category not in known:
+            problems.append(f"unknown category '{category}' "
+                            f"(choose from {', '.join(sorted(known))})")
+    for category, names in sorted(select.items()):
+        unknown = sorted(names - known.get(category, names))
+        if unknown:
+            problems.append(f"unknown {category} element(s) {', '.join(unknown)} "
+                            f"(choose from {', '.join(sorted(known[category]))})")
+    if problems:
+        raise ValueError("; ".join(problems))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate every stylistic combination on top of the foundational prompt",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # All combinations into one indexed file (generated/combinations/)
+  %(prog)s
+
+  # Only business tones, one file per combination
+  %(prog)s --select tone=business-appropriate,maximum-formality -o out/
+
+  # Leave out the emotional category
+  %(prog)s --exclude emotional
+
+  # Just count combinations
+  %(prog)s --count
+        """
+    )
+
+    parser.add_argument('-o', '--output-dir', help='Write one file per combination into this directory')
+    parser.add_argument('--indexed', help='Single output file with offset index '
+                        '(default: generated/combinations/stylistic-combinations.md)')
+    parser.add_argument('--select', action='append', metavar='CATEGORY=a,b',
+                        help='Restrict a category to the listed elements (repeatable)')
+    parser.add_argument('--exclude', action='append', metavar='CATEGORY',
+                        help='Leave a category out of the combinations (repeatable)')
+    parser.add_argument('--no-headers', action='store_true', help='Omit section headers')
+    parser.add_argument('--count', action='store_true', help='Print the number of combinations and exit')
+    parser.add_argument(
+        '-r', '--repo-root',
+        help='Repository root directory (default: script directory)',
+        type=str
+    )
+
+    args = parser.parse_args()
+
+    repo_root = Path(args.repo_root) if args.repo_root else Path(__file__).parent.parent
+
+    try:
+        config = load_layers_config(repo_root)
+        select = parse_select(args.select)
+    except FileNotFoundError:
+        print(f"Error: layers.json not found in {repo_root}", file=sys.stderr)
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing layers.json: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    exclude = set(args.exclude or [])
+    try:
+        check_selection(config, select, exclude)
+    except ValueError as e:
+        parser.error(str(e))
+
+    include_headers = not args.no_headers
+    try:
+        categories = load_stylistic_categories(config, repo_root, include_headers,
+                                               select, exclude)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    total = count_combinations(categories)
+
+    if args.count:
+        print(total)
+        return
+
+    instructions = extract_foundational_instructions(config, repo_root)
+    if not instructions:
+        print("Error: No foundational instructions found", file=sys.stderr)
+        sys.exit(1)
+    prefix = generate_foundational_prompt(instructions, include_headers).encode("utf-8")
+
+    start = time.perf_counter()
+    combinations = iter_combinations(prefix, categories)
+    if args.output_dir:
+        target = Path(args.output_dir)
+        written = write_directory(target, combinations)
+    else:
+        target = Path(args.indexed) if args.indexed else (
+            repo_root / "generated" / "combinations" / "stylistic-combinations.md")
+        written = write_indexed(target, categories, combinations)
+    elapsed = time.perf_counter() - start
+
+    print(f"Generated {written} combinations in {elapsed:.3f}s")
+    print(f"Output: {target}")
+
+
+if __name__ == '__main__':
+    main()
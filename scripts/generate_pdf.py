@@ -4,6 +4,9 @@ Generate a PDF documentation of the foundational prompt stack.
 
 Reads layers.json and generates a Typst document that compiles to a
 version-controlled PDF showing all layers and their exact prompts.
+
+Steps whose inputs are unchanged since the last run (recorded in
+generated/cache/build-manifest.json) are skipped; use --force to rebuild.
 """
 
 import json
@@ -12,6 +15,10 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+from prompt_stack import extract_foundational_instructions, generate_foundational_prompt
+from prompt_stack import layers as layers_module
+from prompt_stack.build import BuildManifest, default_manifest_path, foundational_inputs
+
 # Paths
 REPO_ROOT = Path(__file__).parent.parent
 LAYERS_JSON = REPO_ROOT / "layers.json"
@@ -42,22 +49,18 @@ def escape_typst(text: str) -> str:
     return text
 
 
-def generate_typst(data: dict, version: str = "2.0") -> str:
-    """Generate Typst document content from layers data."""
+def generate_typst(data: dict, version: str = "2.0", repo_root: Path = REPO_ROOT) -> str:
+    """Generate Typst document content from layers data (layer files relative to repo_root)."""
 
     meta = data["meta"]
     foundational = data["foundational"]
     today = datetime.now().strftime("%B %d, %Y")
 
-    # Build the complete foundational prompt by concatenating all elements
-    complete_prompt_parts = []
-    for layer in foundational["layers"]:
-        for element in layer["elements"]:
-            prompt_text = element.get("prompt_text", "")
-            if prompt_text:
-                complete_prompt_parts.append(prompt_text)
-
-    complete_prompt = "\n\n".join(complete_prompt_parts)
+    # Build the complete foundational prompt exactly as generate-foundational.py does,
+    # and use the same layer file contents for the per-element sections
+    instructions = extract_foundational_instructions(data, repo_root)
+    element_text = {(layer, element): text for layer, element, text, _ in instructions}
+    complete_prompt = generate_foundational_prompt(instructions)
     complete_prompt_escaped = escape_typst(complete_prompt)
 
     # Start building the Typst document
@@ -250,7 +253,9 @@ This document details the *Foundational Stack*—the layers that are always appl
         # Add each element with flat numbering
         for i, element in enumerate(elements, 1):
             elem_name = escape_typst(element["name"])
-            prompt_text = escape_typst(element.get("prompt_text", "No prompt text available."))
+            prompt_text = escape_typst(element_text.get(
+                (layer["name"], element["name"]),
+                element.get("prompt_text", "No prompt text available.")))
             display_name = elem_name.replace("-", " ").title()
 
             typst += f'''
@@ -290,7 +295,7 @@ This document details the *Foundational Stack*—the layers that are always appl
 #text(16pt, weight: "bold")[Complete Foundational Prompt]
 #v(0.5em)
 
-The following is the complete foundational system prompt, formed by concatenating all layer elements in order. This represents the full instruction set provided to the audio multimodal model.
+The following is the complete foundational system prompt, formed by concatenating all layer elements in prompt order. This represents the full instruction set provided to the audio multimodal model.
 
 #v(1em)
 
@@ -329,6 +334,14 @@ def compile_pdf(typst_file: Path) -> Path:
 
 def main():
     """Main entry point."""
+    import argparse
+    import shutil
+
+    parser = argparse.ArgumentParser(description="Generate the foundational stack PDF")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild the Typst file and PDF even if no input has changed")
+    args = parser.parse_args()
+
     # Ensure exports directory exists
     EXPORTS_DIR.mkdir(exist_ok=True)
 
@@ -338,25 +351,44 @@ def main():
 
     # Get version from meta
     version = data["meta"]["version"]
+    pdf_file = TYPST_TEMPLATE.with_suffix(".pdf")
+    versioned_pdf = EXPORTS_DIR / f"foundational-stack-v{version.replace('.', '-')}.pdf"
 
-    # Generate Typst content
-    print(f"Generating Typst document (version {version})...")
-    typst_content = generate_typst(data, version)
-
-    # Write Typst file
-    TYPST_TEMPLATE.write_text(typst_content)
-    print(f"Wrote Typst file: {TYPST_TEMPLATE}")
-
-    # Compile to PDF
-    print("Compiling to PDF...")
-    pdf_file = compile_pdf(TYPST_TEMPLATE)
-    print(f"Generated PDF: {pdf_file}")
+    # Each step runs only if its inputs changed: layers -> .typ -> .pdf -> versioned copy
+    manifest = BuildManifest(default_manifest_path(REPO_ROOT), force=args.force)
+    typst_inputs = foundational_inputs(data, REPO_ROOT) + [Path(__file__), Path(layers_module.__file__)]
+
+    if manifest.is_current(TYPST_TEMPLATE, typst_inputs, version):
+        print(f"Up to date: {TYPST_TEMPLATE}")
+    else:
+        # Generate Typst content
+        print(f"Generating Typst document (version {version})...")
+        typst_content = generate_typst(data, version)
+
+        # Write Typst file
+        TYPST_TEMPLATE.write_text(typst_content)
+        manifest.record(TYPST_TEMPLATE, typst_inputs, version)
+        manifest.save()
+        print(f"Wrote Typst file: {TYPST_TEMPLATE}")
+
+    if manifest.is_current(pdf_file, [TYPST_TEMPLATE]):
+        print(f"Up to date: {pdf_file}")
+    else:
+        # Compile to PDF
+        print("Compiling to PDF...")
+        pdf_file = compile_pdf(TYPST_TEMPLATE)
+        manifest.record(pdf_file, [TYPST_TEMPLATE])
+        manifest.save()
+        print(f"Generated PDF: {pdf_file}")
 
     # Also create a versioned copy
-    versioned_pdf = EXPORTS_DIR / f"foundational-stack-v{version.replace('.', '-')}.pdf"
-    import shutil
-    shutil.copy(pdf_file, versioned_pdf)
-    print(f"Created versioned copy: {versioned_pdf}")
+    if manifest.is_current(versioned_pdf, [pdf_file]):
+        print(f"Up to date: {versioned_pdf}")
+    else:
+        shutil.copy(pdf_file, versioned_pdf)
+        manifest.record(versioned_pdf, [pdf_file])
+        manifest.save()
+        print(f"Created versioned copy: {versioned_pdf}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Per-phase latency tracing for the transcription scripts.
+
+Each phase of a run (compress, upload, generate, write, ...) is timed and
+emitted as one JSON line with its duration and attributes such as byte
+counts, audio duration and prompt size. Trace files from many runs can be
+concatenated and loaded into any tool that reads JSONL to build latency
+histograms; summarize() gives a quick per-phase table for a single run.
+
+Record fields:
+    run       Identifier shared by every record of one run
+    script    Script that produced the record
+    phase     Phase name
+    start     Unix time the phase started
+    seconds   Phase duration
+    status    "ok" or "error" (with "error" holding the message)
+    ...       Phase attributes (audio, bytes, audio_seconds, prompt_chars, ...)
+"""
+
+import json
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+def default_trace_path() -> Path:
+    """Location of the shared trace file inside the repository."""
+    return Path(__file__).parent.parent / "generated" / "traces" / "transcription.jsonl"
+
+
+def audio_seconds(audio_path: Path) -> Optional[float]:
+    """Audio duration for trace records, or None if ffprobe is unavailable or fails."""
+    from audio_tools import AudioToolError, probe_duration
+
+    try:
+        return round(probe_duration(audio_path), 3)
+    except (AudioToolError, ValueError):
+        return None
+
+
+def prompt_attributes(prompt: str) -> Dict[str, int]:
+    """Prompt size attributes for trace records."""
+    from prompt_stack.tokens import heuristic_count
+
+    return {"prompt_chars": len(prompt), "prompt_tokens": heuristic_count(prompt)}
+
+
+class Tracer:
+    """Collects phase timings and appends them to a JSONL file."""
+
+    def __init__(self, path: Optional[Path] = None, script: str = "", **context):
+        """
+        Initialize the tracer.
+
+        Args:
+            path: JSONL file to append records to (None: keep them in memory only)
+            script: Script name recorded with every record
+            **context: Extra attributes recorded with every record (e.g. model)
+        """
+        self.path = Path(path) if path else None
+        self.run = uuid.uuid4().hex[:12]
+        self.context = {"script": script, **context}
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str, **attributes) -> Iterator[Dict]:
+        """
+        Time a block as one phase.
+
+        Yields the attribute dictionary, so values only known at the end of
+        the phase (output bytes, transcript length, ...) can be added inside
+        the block. Exceptions are recorded with status "error" and re-raised.
+        Works around awaits as well as blocking calls.
+        """
+        start_wall = time.time()
+        start = time.perf_counter()
+        status, error = "ok", None
+        try:
+            yield attributes
+        except BaseException as e:
+            status, error = "error", str(e) or type(e).__name__
+            raise
+        finally:
+            record = {"run": self.run, **self.context, "phase": name,
+                      "start": round(start_wall, 3),
+                      "seconds": round(time.perf_counter() - start, 6),
+                      "status": status}
+            if error is not None:
+                record["error"] = error
+            record.update(attributes)
+            self.emit(record)
+
+    def emit(self, record: Dict) -> None:
+        """Store a record and append it to the trace file."""
+        with self._lock:
+            self.records.append(record)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+    def summary(self) -> List[Dict]:
+        """Per-phase statistics for this run (see summarize())."""
+        return summarize(self.records)
+
+
+def trace_phase(tracer: Optional[Tracer], name: str, **attributes):
+    """tracer.phase(name, ...), or a no-op context yielding a scratch dict when tracer is None."""
+    if tracer is None:
+        return nullcontext(attributes)
+    return tracer.phase(name, **attributes)
+
+
+def read_trace(path: Path) -> List[Dict]:
+    """Load records from a JSONL trace file, skipping malformed lines."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(records: List[Dict]) -> List[Dict]:
+    """
+    Aggregate trace records by phase, in first-seen order.
+
+    Returns:
+        List of {"phase", "count", "errors", "total", "mean", "p50", "p95", "max", "bytes"}
+    """
+    phases: Dict[str, List[Dict]] = {}
+    for record in records:
+        phases.setdefault(record["phase"], []).append(record)
+
+    rows = []
+    for phase, items in phases.items():
+        seconds = sorted(r["seconds"] for r in items)
+        rows.append({
+            "phase": phase,
+            "count": len(items),
+            "errors": sum(r.get("status") == "error" for r in items),
+            "total": sum(seconds),
+            "mean": statistics.fmean(seconds),
+            "p50": statistics.median(seconds),
+            "p95": _percentile(seconds, 0.95),
+            "max": seconds[-1],
+            "bytes": sum(r.get("bytes") or 0 for r in items),
+        })
+    return rows
+
+
+def format_summary(rows: List[Dict]) -> str:
+    """Table of summarize() output."""
+    lines = [f"{'Phase':<16} {'Count':>6} {'Errors':>6} {'Total s':>9} {'Mean s':>8} "
+             f"{'p50 s':>8} {'p95 s':>8} {'Max s':>8} {'MB':>8}"]
+    for row in rows:
+        lines.append(f"{row['phase']:<16} {row['count']:>6} {row['errors']:>6} "
+                     f"{row['total']:>9.3f} {row['mean']:>8.3f} {row['p50']:>8.3f} "
+                     f"{row['p95']:>8.3f} {row['max']:>8.3f} {row['bytes'] / 1024 / 1024:>8.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Summarize transcription latency traces by phase",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                   # generated/traces/transcription.jsonl
+  %(prog)s traces/*.jsonl --script transcribe_gemini
+  %(prog)s --json > phases.json
+        """
+    )
+    parser.add_argument("traces", nargs="*", help="Trace files (default: the shared trace file)")
+    parser.add_argument("--script", help="Only records from this script")
+    parser.add_argument("--phase", help="Only records for this phase")
+    parser.add_argument("--json", action="store_true", help="Output the summary as JSON")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.traces] or [default_trace_path()]
+    records = []
+    for path in paths:
+        try:
+            records.extend(read_trace(path))
+        except OSError as e:
+            print(f"Error reading trace: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    records = [r for r in records
+               if (not args.script or r.get("script") == args.script)
+               and (not args.phase or r.get("phase") == args.phase)]
+    if not records:
+        print("Error: No trace records found", file=sys.stderr)
+        sys.exit(1)
+
+    rows = summarize(records)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{len({r.get('run') for r in records})} run(s), {len(records)} records")
+        print(format_summary(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Pipelined multi-file transcription.
+
+Each file passes through four stages, compress -> upload -> generate ->
+write. Every stage has its own pool of workers and the stages are
+connected by bounded queues. File N+1 uploads while file N is generating,
+and several ffmpeg encodes run at once. Throughput therefore
+approaches that of the slowest stage rather than the sum of all stages,
+and the bounded queues keep fast stages from running far ahead.
+
+With FakeClient and simulated_compress the pipeline runs fully offline
+and deterministically, so it can be benchmarked (see --bench).
+"""
+
+import asyncio
+import functools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from audio_tools import MAX_UPLOAD_BYTES, compress_for_upload
+from batch_transcribe import (TranscriptionFailed, call_with_retries, output_paths,
+                              write_transcript)
+from gemini_client import TranscriptionClient
+from latency_trace import Tracer, trace_phase
+
+STAGES = ("compress", "upload", "generate", "write")
+
+
+def simulated_compress(input_path: str, output_dir: str, max_bytes: int = MAX_UPLOAD_BYTES,
+                       latency: float = 0.0) -> str:
+    """Offline stand-in for compress_for_upload: waits latency seconds, returns the input."""
+    time.sleep(latency)
+    return input_path
+
+
+class TranscriptionPipeline:
+    """Compress, upload, generate and write stages for one batch of files."""
+
+    def __init__(self, client: TranscriptionClient, prompt: str,
+                 output_dir: Optional[Path] = None,
+                 compress: Optional[Callable[[str, str, int], str]] = compress_for_upload,
+                 max_upload_bytes: int = MAX_UPLOAD_BYTES,
+                 workers: Optional[Dict[str, int]] = None,
+                 timeout: float = 300.0, retries: int = 3, backoff: float = 1.0,
+                 tracer: Optional[Tracer] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            client: Model backend
+            prompt: Prompt sent with every file
+            output_dir: Directory for transcripts (default: next to each input)
+            compress: Compressor run in a thread pool (None: upload as is)
+            max_upload_bytes: Files larger than this are compressed
+            workers: Workers per stage, e.g. {"upload": 2, "generate": 4}
+                (defaults: compress = CPU count, upload 2, generate 4, write 1)
+            timeout: Per-attempt timeout for upload and generate
+            retries: Retries for upload and generate after the first attempt
+            backoff: Base delay for jittered exponential backoff
+            tracer: Records every stage of every file
+        """
+        self.client = client
+        self.prompt = prompt
+        self.output_dir = output_dir
+        self.compress = compress
+        self.max_upload_bytes = max_upload_bytes
+        self.workers = {"compress": os.cpu_count() or 1, "upload": 2, "generate": 4, "write": 1}
+        self.workers.update(workers or {})
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.tracer = tracer
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._tmp: Optional[str] = None
+
+    async def _retry(self, stage: str, item: Dict, call: Callable):
+        attempt = 0
+
+        def counted():
+            nonlocal attempt
+            attempt += 1
+            item["attempts"][stage] = attempt
+            return call()
+
+        try:
+            result, _ = await call_with_retries(counted, self.timeout, self.retries, self.backoff)
+        except TranscriptionFailed as e:
+            raise TranscriptionFailed(f"{stage} failed: {e}", e.attempts) from e
+        return result
+
+    async def _compress(self, item: Dict) -> None:
+        if self.compress is None:
+            item["work_path"] = item["audio"]
+            return
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._pool, self.compress, str(item["audio"]),
+                                            self._tmp, self.max_upload_bytes)
+        item["work_path"] = Path(result)
+
+    async def _upload(self, item: Dict) -> None:
+        item["handle"] = await self._retry("upload", item,
+                                           lambda: self.client.upload(item["work_path"]))
+
+    async def _generate(self, item: Dict) -> None:
+        item["transcript"] = await self._retry(
+            "generate", item, lambda: self.client.generate(self.prompt, item["handle"]))
+
+    async def _write(self, item: Dict) -> None:
+        await asyncio.to_thread(write_transcript, item["output"], item["audio"],
+                                item["transcript"])
+
+    async def _run_stage(self, name: str, item: Dict) -> None:
+        """Run one stage on an item, recording its time; failed items skip later stages."""
+        if "error" in item:
+            return
+        step = getattr(self, f"_{name}")
+        start = time.perf_counter()
+        try:
+            with trace_phase(self.tracer, name, audio=str(item["audio"]), pipeline=True):
+                await step(item)
+        except Exception as e:
+            # Kept on the item so one bad file cannot stall the other workers
+            item["error"] = str(e) or type(e).__name__
+        item["stages"][name] = round(time.perf_counter() - start, 3)
+
+    def _new_item(self, audio_path: Path, output_path: Path) -> Dict:
+        return {"audio": audio_path, "output": output_path,
+                "stages": {}, "attempts": {}, "start": time.perf_counter()}
+
+    @staticmethod
+    def _result(item: Dict) -> Dict:
+        result = {
+            "audio": str(item["audio"]),
+            "status": "error" if "error" in item else "ok",
+            "attempts": max(item["attempts"].values(), default=1),
+            "seconds": round(time.perf_counter() - item["start"], 3),
+            "stages": item["stages"],
+        }
+        if "error" in item:
+            result["error"] = item["error"]
+        else:
+            result["output"] = str(item["output"])
+        return result
+
+    async def run(self, audio_paths: List[Path],
+                  on_result: Optional[Callable[[dict], None]] = None) -> List[Dict]:
+        """
+        Transcribe files through the pipelined stages.
+
+        Args:
+            audio_paths: Files to transcribe
+            on_result: Called with each result as soon as its file completes
+
+        Returns:
+            Results in completion order (same shape as batch_transcribe, plus
+            per-stage seconds under "stages")
+        """
+        results = []
+        outputs = output_paths(audio_paths, self.output_dir)
+        with tempfile.TemporaryDirectory(prefix="pipeline-") as tmp, \
+                ThreadPoolExecutor(self.workers["compress"]) as pool:
+            self._tmp, self._pool = tmp, pool
+            # Each queue holds a couple of items per downstream worker
+            queues = [asyncio.Queue(maxsize=2 * self.workers[name]) for name in STAGES]
+
+            async def worker(index: int) -> None:
+                name = STAGES[index]
+                while True:
+                    item = await queues[index].get()
+                    try:
+                        await self._run_stage(name, item)
+                        if index + 1 < len(STAGES):
+                            await queues[index + 1].put(item)
+                        else:
+                            result = self._result(item)
+                            results.append(result)
+                            if on_result is not None:
+                                on_result(result)
+                    finally:
+                        queues[index].task_done()
+
+            tasks = [asyncio.create_task(worker(i))
+                     for i, name in enumerate(STAGES) for _ in range(self.workers[name])]
+            try:
+                for audio_path in audio_paths:
+                    await queues[0].put(self._new_item(Path(audio_path),
+                                                       outputs[Path(audio_path)]))
+                # Every item leaves a stage before task_done, so joining in order drains the pipeline
+                for queue in queues:
+                    await queue.join()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return results
+
+    async def run_sequential(self, audio_paths: List[Path],
+                             on_result: Optional[Callable[[dict], None]] = None) -> List[Dict]:
+        """Transcribe files one at a time, each stage after the other (for comparison)."""
+        results = []
+        outputs = output_paths(audio_paths, self.output_dir)
+        with tempfile.TemporaryDirectory(prefix="pipeline-") as tmp, \
+                ThreadPoolExecutor(1) as pool:
+            self._tmp, self._pool = tmp, pool
+            for audio_path in audio_paths:
+                item = self._new_item(Path(audio_path), outputs[Path(audio_path)])
+                for name in STAGES:
+                    await self._run_stage(name, item)
+                result = self._result(item)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        return results
+
+
+def bench(files: int = 20, compress_latency: float = 0.05, upload_latency: float = 0.1,
+          generate_latency: float = 0.3, workers: Optional[Dict[str, int]] = None) -> Dict:
+    """
+    Compare sequential and pipelined runs with FakeClient and simulated compression.
+
+    Returns:
+        {"files", "sequential", "pipelined", "speedup", "bound"} where bound is
+        the time the slowest stage alone needs for all files
+    """
+    from gemini_client import FakeClient
+
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as tmp:
+        audio_paths = []
+        for i in range(files):
+            path = Path(tmp) / f"clip-{i:03d}.mp3"
+            path.write_bytes(bytes([i % 256]) * (1000 + i))
+            audio_paths.append(path)
+
+        timings = {}
+        for mode in ("sequential", "pipelined"):
+            pipeline = TranscriptionPipeline(
+                FakeClient(upload_latency=upload_latency, generate_latency=generate_latency),
+                "Benchmark prompt", Path(tmp) / mode,
+                compress=functools.partial(simulated_compress, latency=compress_latency),
+                workers=workers)
+            runner = pipeline.run_sequential if mode == "sequential" else pipeline.run
+            start = time.perf_counter()
+            asyncio.run(runner(audio_paths))
+            timings[mode] = time.perf_counter() - start
+
+    widths = pipeline.workers
+    bound = max(files * compress_latency / widths["compress"],
+                files * upload_latency / widths["upload"],
+                files * generate_latency / widths["generate"])
+    return {"files": files, **{k: round(v, 3) for k, v in timings.items()},
+            "speedup": round(timings["sequential"] / timings["pipelined"], 2),
+            "bound": round(bound, 3)}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Transcribe many audio files with overlapped compress/upload/generate/write stages",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Transcribe a directory with Gemini
+  %(prog)s recordings/ -o transcripts/
+
+  # Offline, with the fake model
+  %(prog)s "recordings/*.mp3" --fake
+
+  # Benchmark sequential vs pipelined with the fake backend
+  %(prog)s --bench 40 --generate-workers 8
+        """
+    )
+    parser.add_argument("audio", nargs="?", help="Directory or glob of audio files")
+    parser.add_argument("-o", "--output", help="Output directory (default: next to each input)")
+    parser.add_argument("--foundational", action="store_true",
+                        help="Use the foundational prompt instead of the built-in cleanup prompt")
+    parser.add_argument("--fake", action="store_true", help="Use the offline fake model")
+    parser.add_argument("--upload-workers", type=int, default=2,
+                        help="Concurrent uploads (default: 2)")
+    parser.add_argument("--generate-workers", type=int, default=4,
+                        help="Concurrent generate requests (default: 4)")
+    parser.add_argument("--compress-workers", type=int, default=os.cpu_count() or 1,
+                        help="Concurrent ffmpeg encodes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=300.0,
+                        help="Per-attempt timeout in seconds (default: 300)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Retries for upload and generate (default: 3)")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Process one file at a time (for comparison)")
+    parser.add_argument("--bench", type=int, metavar="FILES",
+                        help="Benchmark sequential vs pipelined on FILES fake files and exit")
+    args = parser.parse_args()
+
+    workers = {"compress": args.compress_workers, "upload": args.upload_workers,
+               "generate": args.generate_workers}
+
+    if args.bench:
+        result = bench(args.bench, workers=workers)
+        print(f"{result['files']} files: sequential {result['sequential']:.2f}s, "
+              f"pipelined {result['pipelined']:.2f}s ({result['speedup']}x); "
+              f"slowest-stage bound {result['bound']:.2f}s")
+        return
+
+    if not args.audio:
+        parser.error("audio is required (unless using --bench)")
+
+    from batch_transcribe import collect_audio_files, print_result
+    from transcribe_gemini import create_client, select_prompt
+
+    audio_paths = collect_audio_files(args.audio)
+    if not audio_paths:
+        print(f"Error: No audio files found for: {args.audio}", file=sys.stderr)
+        sys.exit(1)
+    output_dir = Path(args.output) if args.output else None
+    try:
+        output_paths(audio_paths, output_dir)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    prompt, _ = select_prompt(args.foundational)
+    pipeline = TranscriptionPipeline(
+        create_client(args.fake), prompt, output_dir,
+        compress=None if args.fake else compress_for_upload, workers=workers,
+        timeout=args.timeout, retries=args.retries)
+
+    print(f"Transcribing {len(audio_paths)} files...")
+    start = time.perf_counter()
+    runner = pipeline.run_sequential if args.sequential else pipeline.run
+    results = asyncio.run(runner(audio_paths, on_result=print_result))
+
+    failed = [r for r in results if r["status"] != "ok"]
+    print(f"Done in {time.perf_counter() - start:.1f}s: "
+          f"{len(results) - len(failed)} succeeded, {len(failed)} failed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Resident Prompt Assembly Server
+
+Loads layers.json, every stack in stacks/ and every layer file into memory
+once, then serves assembled prompts over local HTTP or a Unix socket.
+Changed files are hot-reloaded individually (inotify, or polling where
+inotify is unavailable).
+
+Endpoints:
+    GET /stacks                 JSON list of stack names
+    GET /stacks/<name>          Concatenated stack prompt (?separator=...)
+    GET /foundational           Foundational prompt (?headers=0 to omit headers)
+    GET /health                 JSON status
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List
+from urllib.parse import parse_qs, unquote, urlparse
+
+import yaml
+
+from prompt_stack import (
+    PromptStackConcatenator,
+    extract_foundational_instructions,
+    generate_foundational_prompt,
+    load_layers_config,
+)
+from file_watcher import create_watcher
+
+# Rendered prompts kept in memory (keyed by stack and client-supplied separator)
+RENDERED_MAX_ENTRIES = 128
+
+
+class LayerNotLoadedError(LookupError):
+    """Raised when a stack references a layer that is not in the library."""
+
+
+class ResidentConcatenator(PromptStackConcatenator):
+    """PromptStackConcatenator that reads layers from an in-memory library."""
+
+    def __init__(self, library: "LayerLibrary"):
+        super().__init__(library.repo_root)
+        self.library = library
+
+    def load_layer(self, layer_path: Path) -> str:
+        content = self.library.files.get(Path(layer_path).as_posix())
+        if content is None:
+            raise LayerNotLoadedError(f"Layer file not found: {self.repo_root / layer_path}")
+        return content
+
+
+class LayerLibrary:
+    """In-memory copy of layers.json, stack configurations and layer files."""
+
+    def __init__(self, repo_root: Path):
+        """
+        Initialize the library.
+
+        Args:
+            repo_root: Path to repository root
+        """
+        self.repo_root = Path(repo_root).resolve()
+        self.concatenator = ResidentConcatenator(self)
+        self.config: Dict = {}
+        self.stacks: Dict[str, Dict] = {}
+        self.files: Dict[str, str] = {}
+        self.loaded_at = 0.0
+        self._rendered: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def watch_roots(self) -> List[Path]:
+        """Paths whose changes should trigger a reload."""
+        roots = {self.repo_root / "layers.json", self.repo_root / "layers",
+                 self.repo_root / "stacks"}
+        # Stacks may reference layers outside layers/ (e.g. archive/)
+        for path in self.files:
+            top = self.repo_root / Path(path).parts[0]
+            if top.is_dir():
+                roots.add(top)
+        return sorted(roots)
+
+    def load_all(self) -> None:
+        """Load every configuration and layer file from disk."""
+        with self._lock:
+            self.config = load_layers_config(self.repo_root)
+            self.stacks = {}
+            for stack_file in sorted((self.repo_root / "stacks").glob("*.yaml")):
+                self._load_stack(stack_file)
+            self.files = {}
+            for layer_file in sorted((self.repo_root / "layers").rglob("*.md")):
+                self._load_file(layer_file)
+            for config in self.stacks.values():
+                self._load_referenced(config)
+            self._rendered.clear()
+            self.loaded_at = time.time()
+
+    def _relative(self, path: Path) -> str:
+        return Path(path).resolve().relative_to(self.repo_root).as_posix()
+
+    def _load_stack(self, stack_file: Path) -> Dict:
+        with open(stack_file, "r") as f:
+            config = yaml.safe_load(f) or {}
+        if not isinstance(config, dict):
+            raise ValueError(f"Stack configuration is not a mapping: {stack_file}")
+        self.stacks[stack_file.name] = config
+        return config
+
+    def _load_referenced(self, config: Dict) -> None:
+        # Stacks may reference layers outside layers/ (e.g. archive/)
+        for layer_path in config.get("layers") or []:
+            if Path(layer_path).as_posix() not in self.files:
+                self._load_file(self.repo_root / layer_path)
+
+    def _load_file(self, path: Path) -> None:
+        if path.is_file():
+            self.files[self._relative(path)] = path.read_text().strip()
+
+    def reload(self, paths: Iterable[Path]) -> List[str]:
+        """
+        Reload only the given changed files.
+
+        A file that fails to parse (bad YAML or JSON) is reported on stderr
+        and its last good copy is kept.
+
+        Args:
+            paths: Absolute paths reported by the watcher
+
+        Returns:
+            Repository-relative paths that were reloaded or dropped
+        """
+        reloaded = []
+        with self._lock:
+            for path in paths:
+                try:
+                    rel = self._relative(path)
+                except ValueError:
+                    continue
+                exists = Path(path).is_file()
+                try:
+                    if rel == "layers.json":
+                        if exists:
+                            self.config = load_layers_config(self.repo_root)
+                    elif rel.startswith("stacks/") and rel.endswith(".yaml"):
+                        if exists:
+                            self._load_referenced(self._load_stack(Path(path)))
+                        else:
+                            self.stacks.pop(Path(rel).name, None)
+                    elif rel.endswith(".md"):
+                        if exists:
+                            self._load_file(Path(path))
+                        else:
+                            self.files.pop(rel, None)
+                    else:
+                        continue
+                except (OSError, ValueError, yaml.YAMLError) as e:
+                    print(f"Error reloading {rel} (keeping last good copy): {e}",
+                          file=sys.stderr)
+                    continue
+                reloaded.append(rel)
+            if reloaded:
+                self._rendered.clear()
+                self.loaded_at = time.time()
+        return reloaded
+
+    def read(self, repo_root: Path, file_path: str) -> str:
+        """Reader for extract_foundational_instructions backed by memory."""
+        return self.files.get(Path(file_path).as_posix(), "")
+
+    def stack_prompt(self, name: str, separator: str = "\n\n") -> str:
+        """
+        Return the assembled prompt for a stack.
+
+        Raises:
+            KeyError: If the stack does not exist
+            LayerNotLoadedError: If a referenced layer file is missing
+        """
+        if not name.endswith(".yaml"):
+            name = f"{name}.yaml"
+        key = ("stack", name, separator)
+        with self._lock:
+            prompt = self._cached(key)
+            if prompt is None:
+                config = self.stacks[name]
+                if not config.get("layers"):
+                    raise LayerNotLoadedError(f"No layers defined in stack: {name}")
+                prompt = self.concatenator.concatenate_stack(config, separator)
+                self._remember(key, prompt)
+        return prompt
+
+    def foundational_prompt(self, include_headers: bool = True) -> str:
+        """Return the foundational prompt assembled from layers.json."""
+        key = ("foundational", include_headers)
+        with self._lock:
+            prompt = self._cached(key)
+            if prompt is None:
+                instructions = extract_foundational_instructions(
+                    self.config, self.repo_root, reader=self.read)
+                prompt = generate_foundational_prompt(
+                    instructions, include_headers=include_headers)
+                self._remember(key, prompt)
+        return prompt
+
+    def _cached(self, key: tuple):
+        prompt = self._rendered.get(key)
+        if prompt is not None:
+            self._rendered.move_to_end(key)
+        return prompt
+
+    def _remember(self, key: tuple, prompt: str) -> None:
+        self._rendered[key] = prompt
+        while len(self._rendered) > RENDERED_MAX_ENTRIES:
+            self._rendered.popitem(last=False)
+
+
+class PromptRequestHandler(BaseHTTPRequestHandler):
+    """Serves prompts from the server's LayerLibrary."""
+
+    library: LayerLibrary = None
+    quiet = False
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: str, content_type: str = "text/plain") -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+
+        try:
+            if parts == ["stacks"]:
+                self._send(200, json.dumps(sorted(self.library.stacks)), "application/json")
+            elif len(parts) == 2 and parts[0] == "stacks":
+                separator = query.get("separator", ["\n\n"])[0]
+                self._send(200, self.library.stack_prompt(parts[1], separator))
+            elif parts == ["foundational"]:
+                headers = query.get("headers", ["1"])[0] not in ("0", "false", "no")
+                self._send(200, self.library.foundational_prompt(headers))
+            elif parts == ["health"]:
+                status = {
+                    "stacks": len(self.library.stacks),
+                    "files": len(self.library.files),
+                    "loaded_at": self.library.loaded_at,
+                }
+                self._send(200, json.dumps(status), "application/json")
+            else:
+                self._send(404, f"Unknown endpoint: {url.path}\n")
+        except KeyError as e:
+            self._send(404, f"Stack not found: {e.args[0]}\n")
+        except LayerNotLoadedError as e:
+            self._send(404, f"Error: {e}\n")
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server bound to a Unix domain socket."""
+
+    daemon_threads = True
+
+
+def start_watcher(library: LayerLibrary, polling: bool = False,
+                  interval: float = 0.5, verbose: bool = True):
+    """
+    Start a background thread that hot-reloads changed files.
+
+    Returns:
+        The watcher, so callers can stop() it
+    """
+    watcher = create_watcher(library.watch_roots(), interval=interval, polling=polling)
+
+    def run():
+        for changed in watcher.changes():
+            try:
+                reloaded = library.reload(changed)
+            except Exception as e:
+                # Keep watching; the library still holds the last good copies
+                print(f"Error reloading changed files: {e}", file=sys.stderr)
+                continue
+            if reloaded and verbose:
+                print(f"Reloaded: {', '.join(sorted(reloaded))}", file=sys.stderr)
+
+    threading.Thread(target=run, name="prompt-watcher", daemon=True).start()
+    return watcher
+
+
+def main():
+    """Main entry point for CLI usage."""
+    parser = argparse.ArgumentParser(
+        description="Serve assembled prompts from an in-memory layer library",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Serve on http://127.0.0.1:8765
+  %(prog)s
+
+  # Serve on a Unix socket
+  %(prog)s --socket /tmp/prompt-stack.sock
+
+  # Fetch a prompt
+  curl http://127.0.0.1:8765/stacks/business-email
+  curl http://127.0.0.1:8765/foundational
+        """
+    )
+
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', default=8765, type=int, help='Port (default: 8765)')
+    parser.add_argument('--socket', help='Serve on this Unix socket path instead of TCP')
+    parser.add_argument('--poll', action='store_true',
+                        help='Use polling instead of inotify for hot reload')
+    parser.add_argument('--no-reload', action='store_true', help='Disable hot reload')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not log requests')
+    parser.add_argument(
+        '-r', '--repo-root',
+        help='Repository root directory (default: script directory)',
+        type=str
+    )
+
+    args = parser.parse_args()
+
+    repo_root = Path(args.repo_root) if args.repo_root else Path(__file__).parent.parent
+    library = LayerLibrary(repo_root)
+    try:
+        library.load_all()
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, yaml.YAMLError) as e:
+        print(f"Error parsing configuration: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    PromptRequestHandler.library = library
+    PromptRequestHandler.quiet = args.quiet
+
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = ThreadingUnixHTTPServer(args.socket, PromptRequestHandler)
+        where = f"unix:{args.socket}"
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), PromptRequestHandler)
+        where = f"http://{args.host}:{server.server_address[1]}"
+
+    watcher = None if args.no_reload else start_watcher(library, polling=args.poll)
+
+    print(f"Loaded {len(library.stacks)} stacks and {len(library.files)} layer files",
+          file=sys.stderr)
+    print(f"Serving prompts on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
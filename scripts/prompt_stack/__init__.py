@@ -0,0 +1,40 @@
+"""
+prompt_stack: importable core of the Text Transformation Prompt Stack.
+
+Layer loading, ordering and rendering shared by every script in scripts/.
+
+Example:
+    import sys
+    sys.path.insert(0, 'scripts')
+    from prompt_stack import PromptStackConcatenator, build_foundational_prompt
+
+    prompt = build_foundational_prompt()
+"""
+
+from .files import atomic_write_text
+from .layers import (
+    ORDER_MAP,
+    build_foundational_prompt,
+    default_repo_root,
+    extract_foundational_instructions,
+    format_element_name,
+    generate_foundational_prompt,
+    load_layers_config,
+    read_markdown_file,
+)
+from .stacks import CompiledPromptCache, MissingLayerError, PromptStackConcatenator
+
+__all__ = [
+    "ORDER_MAP",
+    "CompiledPromptCache",
+    "MissingLayerError",
+    "PromptStackConcatenator",
+    "atomic_write_text",
+    "build_foundational_prompt",
+    "default_repo_root",
+    "extract_foundational_instructions",
+    "format_element_name",
+    "generate_foundational_prompt",
+    "load_layers_config",
+    "read_markdown_file",
+]
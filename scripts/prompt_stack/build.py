@@ -0,0 +1,88 @@
+"""
+Incremental builds for generated artifacts.
+
+A BuildManifest records, for every output file, fingerprints of the inputs
+it was built from and of the output itself. A build step asks whether its
+output is current and skips the work when no input (and not the output)
+has changed since the last build.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .files import atomic_write_text, file_fingerprint, fingerprint_is_fresh
+from .layers import default_repo_root
+
+
+def default_manifest_path(repo_root: Optional[Path] = None) -> Path:
+    """Location of the build manifest inside the repository."""
+    return Path(repo_root or default_repo_root()) / "generated" / "cache" / "build-manifest.json"
+
+
+def foundational_inputs(layers_config: Dict, repo_root: Path) -> List[Path]:
+    """layers.json plus every foundational layer file it references."""
+    inputs = [Path(repo_root) / "layers.json"]
+    for layer in layers_config.get("foundational", {}).get("layers", []):
+        for element in layer.get("elements", []):
+            if element.get("file_path"):
+                inputs.append(Path(repo_root) / element["file_path"])
+    return inputs
+
+
+class BuildManifest:
+    """JSON-backed map of output file -> fingerprints of its inputs and itself."""
+
+    def __init__(self, path: Optional[Path] = None, force: bool = False):
+        """
+        Initialize the manifest.
+
+        Args:
+            path: Manifest file (default: generated/cache/build-manifest.json)
+            force: Treat every output as stale
+        """
+        self.path = Path(path) if path else default_manifest_path()
+        self.force = force
+        try:
+            self._entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def _key(output: Path) -> str:
+        return str(Path(output).resolve())
+
+    def is_current(self, output: Path, inputs: Iterable[Path], params: str = "") -> bool:
+        """
+        Return True if output was built from exactly these unchanged inputs.
+
+        Args:
+            output: Output file
+            inputs: Files the output is built from (missing files count as changed)
+            params: Build options that affect the output (e.g. "headers=1")
+        """
+        if self.force:
+            return False
+        entry = self._entries.get(self._key(output))
+        if entry is None or entry["params"] != params:
+            return False
+        if [fp[0] for fp in entry["inputs"]] != [self._key(p) for p in inputs]:
+            return False
+        return all(fingerprint_is_fresh(fp) for fp in entry["inputs"] + [entry["output"]])
+
+    def record(self, output: Path, inputs: Iterable[Path], params: str = "") -> None:
+        """Record that output was just built from inputs (call save() afterwards)."""
+        fingerprints = [file_fingerprint(Path(p).resolve()) for p in inputs]
+        output_fp = file_fingerprint(Path(output).resolve())
+        if output_fp is None or any(fp is None for fp in fingerprints):
+            self._entries.pop(self._key(output), None)
+            return
+        self._entries[self._key(output)] = {
+            "params": params,
+            "inputs": fingerprints,
+            "output": output_fp,
+        }
+
+    def save(self) -> None:
+        """Write the manifest to disk."""
+        atomic_write_text(self.path, json.dumps(self._entries, indent=2) + "\n")
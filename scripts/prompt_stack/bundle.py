@@ -0,0 +1,178 @@
+"""
+Single-file layer bundle.
+
+A bundle holds the stripped content of every layer file plus an index of
+offset, length and SHA-256 keyed by repository-relative path. Readers
+memory-map the file and slice layers out of it, so assembling any number
+of prompts costs one open() instead of one per layer file.
+
+File layout:
+    MAGIC (8 bytes) | index length (8 bytes, little-endian) | index JSON | layer data
+
+Offsets in the index are relative to the start of the layer data.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .layers import default_repo_root
+
+MAGIC = b"PSTBNDL1"
+_HEADER = struct.Struct("<8sQ")
+
+# Directories whose markdown files are bundled (archive/ so legacy stacks still resolve)
+BUNDLE_DIRS = ("layers", "archive")
+
+
+def default_bundle_path(repo_root: Optional[Path] = None) -> Path:
+    """Location of the bundle inside the repository."""
+    return Path(repo_root or default_repo_root()) / "generated" / "cache" / "layers.bundle"
+
+
+def _layer_files(repo_root: Path) -> List[Path]:
+    files = []
+    for top in BUNDLE_DIRS:
+        files.extend(sorted((repo_root / top).rglob("*.md")))
+    return files
+
+
+def write_bundle(output: Optional[Path] = None, repo_root: Optional[Path] = None,
+                 paths: Optional[Iterable[Path]] = None) -> Dict:
+    """
+    Write a bundle of layer files.
+
+    Args:
+        output: Bundle file (default: generated/cache/layers.bundle)
+        repo_root: Repository root (default: this checkout)
+        paths: Layer files to include (default: every .md under layers/ and archive/)
+
+    Returns:
+        The bundle index ({"generated", "layers": {path: {"offset", "length", "sha256"}}})
+    """
+    repo_root = Path(repo_root or default_repo_root())
+    output = Path(output) if output else default_bundle_path(repo_root)
+
+    layers = {}
+    chunks = []
+    offset = 0
+    for path in (paths if paths is not None else _layer_files(repo_root)):
+        path = Path(path)
+        if not path.is_absolute():
+            path = repo_root / path
+        # Stored exactly as read_markdown_file / read_layer_file return it
+        data = path.read_text().strip().encode("utf-8")
+        layers[path.relative_to(repo_root).as_posix()] = {
+            "offset": offset,
+            "length": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        chunks.append(data)
+        offset += len(data)
+
+    index = {"generated": datetime.now().isoformat(timespec="seconds"), "layers": layers}
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temp name so concurrent writers cannot clobber each other's file
+    fd, tmp = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(index_bytes)))
+            f.write(index_bytes)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return index
+
+
+class LayerBundle:
+    """Read-only, memory-mapped view of a bundle file."""
+
+    def __init__(self, path: Path):
+        """
+        Open and map a bundle.
+
+        Raises:
+            FileNotFoundError: If the bundle does not exist
+            ValueError: If the file is not a bundle
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"Not a layer bundle: {self.path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"Not a layer bundle: {self.path}")
+        index_end = _HEADER.size + index_length
+        index_bytes = self._map[_HEADER.size:index_end]
+        index = json.loads(index_bytes)
+        # Identifies this bundle's contents (e.g. for compiled-prompt cache keys)
+        self.index_hash = hashlib.sha256(index_bytes).hexdigest()
+        self._data_start = index_end
+        self.generated = index.get("generated")
+        self.layers: Dict[str, Dict] = index["layers"]
+        self._hashes = {entry["sha256"]: path for path, entry in self.layers.items()}
+
+    def stale_layers(self, repo_root: Path, paths: Iterable) -> List[str]:
+        """
+        Layer paths whose loose file was modified after the bundle was written.
+
+        Args:
+            repo_root: Repository root the paths are relative to
+            paths: Repository-relative layer paths to check
+        """
+        bundle_mtime = os.stat(self.path).st_mtime_ns
+        stale = []
+        for path in paths:
+            try:
+                if os.stat(Path(repo_root) / path).st_mtime_ns > bundle_mtime:
+                    stale.append(Path(path).as_posix())
+            except OSError:
+                continue
+        return stale
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the bundle."""
+        self._map.close()
+
+    def __contains__(self, path) -> bool:
+        return Path(path).as_posix() in self.layers
+
+    def _slice(self, entry: Dict) -> str:
+        start = self._data_start + entry["offset"]
+        return self._map[start:start + entry["length"]].decode("utf-8")
+
+    def get(self, path) -> Optional[str]:
+        """Content of a layer by repository-relative path, or None if not bundled."""
+        entry = self.layers.get(Path(path).as_posix())
+        return None if entry is None else self._slice(entry)
+
+    def get_by_hash(self, sha256: str) -> Optional[str]:
+        """Content of a layer by SHA-256 of its stripped content."""
+        path = self._hashes.get(sha256)
+        return None if path is None else self._slice(self.layers[path])
+
+    def read(self, repo_root: Path, file_path: str) -> str:
+        """Reader for extract_foundational_instructions: "" for unbundled paths."""
+        return self.get(file_path) or ""
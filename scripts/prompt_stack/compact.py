@@ -0,0 +1,169 @@
+"""
+Compact prompt rendering.
+
+Produces a shorter prompt by collapsing whitespace, stripping decorative
+markdown and dropping sentences that nearly duplicate a sentence from an
+earlier layer. Every kept and dropped sentence is mapped back to the layer
+it came from, so the result can be audited.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .tokens import heuristic_count
+
+_HEADING = re.compile(r"^\s{0,3}#{1,6}\s+", re.MULTILINE)
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$", re.MULTILINE)
+_BOLD = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+_ITALIC = re.compile(r"(?<![\w*])\*(?=\S)([^*\n]+?)(?<=\S)\*(?![\w*])")
+_SPACES = re.compile(r"[ \t]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z\"'(])|(?<=[.!?][\"'”’)])\s+(?=[A-Z\"'(])")
+_WORD = re.compile(r"[a-z0-9']+")
+_LIST_ITEM = re.compile(r"^(?:[-*+]|\d+[.)])\s")
+
+
+def _stripped_lines(text: str) -> List[Tuple[str, bool]]:
+    """(line, standalone) pairs; headings and list items are standalone lines."""
+    text = _RULE.sub("", text)
+    text = _BOLD.sub(r"\2", text)
+    text = _ITALIC.sub(r"\1", text)
+    lines = []
+    for line in text.splitlines():
+        heading = _HEADING.match(line) is not None
+        line = _SPACES.sub(" ", _HEADING.sub("", line)).strip()
+        lines.append((line, heading or bool(_LIST_ITEM.match(line))))
+    return lines
+
+
+def strip_markdown(text: str) -> str:
+    """Remove heading markers, rules and emphasis; collapse whitespace."""
+    return "\n".join(line for line, _ in _stripped_lines(text) if line)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, keeping list items and lines separate."""
+    sentences = []
+    for line in text.splitlines():
+        sentences.extend(s.strip() for s in _SENTENCE_END.split(line) if s.strip())
+    return sentences
+
+
+def _lines(text: str) -> List[Tuple[bool, List[str]]]:
+    """
+    (starts_line, sentences) for every non-empty line of stripped text.
+
+    A line starts a new output line if it begins a paragraph, is a heading
+    or list item, or follows one; other lines are soft wraps of the line
+    before.
+    """
+    lines = []
+    new_line = True
+    for line, standalone in _stripped_lines(text):
+        if not line:
+            new_line = True
+            continue
+        lines.append((new_line or standalone, split_sentences(line)))
+        new_line = standalone
+    return lines
+
+
+def _word_set(sentence: str) -> frozenset:
+    return frozenset(_WORD.findall(sentence.lower()))
+
+
+def _similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def compact_sections(sections: List[Tuple[str, str]], similarity: float = 0.8,
+                     min_words: int = 5, baseline: Optional[str] = None,
+                     separator: str = "\n") -> Tuple[str, Dict]:
+    """
+    Render sections compactly, dropping near-duplicate sentences.
+
+    Paragraphs and list items keep a line each, so lists stay lists;
+    soft-wrapped lines within a paragraph are joined.
+
+    Args:
+        sections: (source_id, text) pairs in prompt order
+        similarity: Word-set Jaccard similarity at or above which a sentence
+            counts as a duplicate of an earlier one
+        min_words: Sentences with fewer distinct words are never dropped
+        baseline: The normal rendering, used to report the reduction
+            (default: sections joined by blank lines)
+        separator: String between the sections' compacted blocks
+
+    Returns:
+        Tuple of (compact prompt, report). The report holds character and
+        token counts before and after, plus "kept" and "dropped" sentence
+        lists with their source ids.
+    """
+    if baseline is None:
+        baseline = "\n\n".join(text for _, text in sections)
+
+    kept: List[Dict] = []
+    dropped: List[Dict] = []
+    seen: List[Tuple[frozenset, Dict]] = []
+    blocks = []
+
+    for source, text in sections:
+        lines: List[List[str]] = []
+        for starts_line, sentences in _lines(text):
+            parts = [sentence for sentence in sentences
+                     if _keep(sentence, source, similarity, min_words, seen, kept, dropped)]
+            if not parts:
+                continue
+            if starts_line or not lines:
+                lines.append(parts)
+            else:
+                lines[-1].extend(parts)
+
+        if lines:
+            blocks.append("\n".join(" ".join(parts) for parts in lines))
+
+    prompt = separator.join(blocks)
+    report = {
+        "original_chars": len(baseline),
+        "compact_chars": len(prompt),
+        "original_tokens": heuristic_count(baseline),
+        "compact_tokens": heuristic_count(prompt),
+        "kept": kept,
+        "dropped": dropped,
+    }
+    return prompt, report
+
+
+def _keep(sentence: str, source: str, similarity: float, min_words: int,
+          seen: List[Tuple[frozenset, Dict]], kept: List[Dict], dropped: List[Dict]) -> bool:
+    """Record a sentence as kept or as a duplicate of an earlier one; True if kept."""
+    words = _word_set(sentence)
+    if len(words) >= min_words:
+        for other_words, other in seen:
+            # Jaccard >= t requires the smaller set to be >= t of the larger
+            if min(len(words), len(other_words)) < similarity * max(len(words), len(other_words)):
+                continue
+            score = _similarity(words, other_words)
+            if score >= similarity:
+                dropped.append({"source": source, "text": sentence,
+                                "duplicate_of": other["source"], "similarity": round(score, 3)})
+                return False
+
+    entry = {"source": source, "text": sentence}
+    kept.append(entry)
+    if len(words) >= min_words:
+        seen.append((words, entry))
+    return True
+
+
+def describe_reduction(report: Dict) -> str:
+    """One-line summary of a compact_sections report."""
+    def pct(before: int, after: int) -> str:
+        return f"{(before - after) / before * 100:.1f}%" if before else "0.0%"
+
+    return (f"Compact: {report['original_chars']} -> {report['compact_chars']} chars "
+            f"(-{pct(report['original_chars'], report['compact_chars'])}), "
+            f"~{report['original_tokens']} -> ~{report['compact_tokens']} tokens "
+            f"(-{pct(report['original_tokens'], report['compact_tokens'])}), "
+            f"{len(report['dropped'])} duplicate sentence(s) dropped")
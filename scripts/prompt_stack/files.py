@@ -0,0 +1,67 @@
+"""
+File helpers shared by the prompt stack tools.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """
+    Write text to a file atomically via a temp file and rename.
+
+    Args:
+        path: Destination file path
+        text: Content to write
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def file_fingerprint(path: Path) -> Optional[List]:
+    """
+    Fingerprint a file as [path, mtime_ns, size, sha256].
+
+    Returns:
+        Fingerprint list, or None if the file does not exist
+    """
+    try:
+        st = os.stat(path)
+        digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+    return [str(path), st.st_mtime_ns, st.st_size, digest]
+
+
+def fingerprint_is_fresh(fingerprint: List) -> bool:
+    """
+    Check a stored fingerprint, using stat first and hashing only on mtime drift.
+
+    Updates the stored mtime in place when a touched file turns out unchanged.
+    """
+    path, mtime_ns, size, digest = fingerprint
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if st.st_size != size:
+        return False
+    if st.st_mtime_ns == mtime_ns:
+        return True
+    # Touched but possibly unchanged (e.g. git checkout): compare content
+    if hashlib.sha256(Path(path).read_bytes()).hexdigest() != digest:
+        return False
+    fingerprint[1] = st.st_mtime_ns
+    return True
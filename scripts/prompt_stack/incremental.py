@@ -0,0 +1,190 @@
+"""
+Incremental rendering for watch mode.
+
+IncrementalRenderer keeps every stack config, layer content and a reverse
+index (layer file -> outputs that use it) in memory. Given a batch of
+changed files it re-reads only those files and re-renders only the outputs
+that depend on them, in a thread pool, so an edit to one layer costs a few
+file writes rather than a full render_all().
+"""
+
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .layers import load_layers_config
+from .stacks import foundational_file_paths
+
+# Output name used for the foundational prompt (matches render_all())
+FOUNDATIONAL = "foundational"
+
+
+class IncrementalRenderer:
+    """Renders stacks and the foundational prompt, then keeps them current."""
+
+    def __init__(self, concatenator, output_dir: Path, separator: str = "\n\n",
+                 max_workers: Optional[int] = None):
+        """
+        Initialize the renderer (call render_all() before update()).
+
+        Args:
+            concatenator: PromptStackConcatenator for the repository
+            output_dir: Directory rendered prompts are written to
+            separator: String to use between stack layers
+            max_workers: Thread pool size (default: executor default)
+        """
+        self.concatenator = concatenator
+        self.repo_root = Path(concatenator.repo_root).resolve()
+        self.output_dir = Path(output_dir)
+        self.separator = separator
+        self.stack_configs: Dict[str, Dict] = {}
+        self.layers_config: Dict = {}
+        self.contents: Dict[str, Optional[str]] = {}
+        self.results: Dict[str, Dict] = {}
+        self.dependents: Dict[str, Set[str]] = defaultdict(set)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def close(self) -> None:
+        """Shut down the thread pool."""
+        self._pool.shutdown()
+
+    def watch_roots(self) -> List[Path]:
+        """Paths whose changes can affect an output."""
+        roots = {self.repo_root / "layers.json", self.repo_root / "layers",
+                 self.repo_root / "stacks"}
+        # Stacks may reference layers outside layers/ (e.g. archive/)
+        for path in self.contents:
+            top = self.repo_root / Path(path).parts[0]
+            if top.is_dir():
+                roots.add(top)
+        return sorted(roots)
+
+    def _index(self) -> None:
+        self.dependents = defaultdict(set)
+        for path in foundational_file_paths(self.layers_config):
+            self.dependents[path].add(FOUNDATIONAL)
+        for name, config in self.stack_configs.items():
+            for path in config.get("layers") or []:
+                self.dependents[Path(path).as_posix()].add(name)
+        # Files no output uses any more are not watched for edits, so forget them
+        self.contents = {p: c for p, c in self.contents.items() if p in self.dependents}
+
+    def _read_missing(self) -> None:
+        missing = [p for p in self.dependents if p not in self.contents]
+        for path, content in zip(missing, self._pool.map(
+                lambda p: self.concatenator.read_layer_file(Path(p)), missing)):
+            self.contents[path] = content
+
+    def _render(self, names: Iterable[str]) -> Dict[str, Dict]:
+        futures = {}
+        for name in names:
+            if name == FOUNDATIONAL:
+                futures[name] = self._pool.submit(
+                    self.concatenator.render_foundational_output, self.output_dir,
+                    self.layers_config, self.contents)
+            elif name in self.stack_configs:
+                futures[name] = self._pool.submit(
+                    self.concatenator.render_stack_output, self.output_dir, name,
+                    self.stack_configs[name], self.contents, self.separator)
+        rendered = {name: future.result() for name, future in futures.items()}
+        self.results.update(rendered)
+        self.concatenator.write_manifest(self.output_dir, self.results,
+                                         layer_files_read=len(self.contents))
+        return rendered
+
+    def render_all(self) -> Dict[str, Dict]:
+        """
+        Load everything and render every output.
+
+        Returns:
+            Output name -> manifest entry or {'error': message}
+        """
+        self.stack_configs = self.concatenator.load_all_stack_configs()
+        self.layers_config = load_layers_config(self.repo_root)
+        self.contents = {}
+        self.results = {}
+        self._index()
+        self._read_missing()
+        return self._render([*self.stack_configs, FOUNDATIONAL])
+
+    def affected(self, paths: Iterable[Path]) -> Set[str]:
+        """Outputs that depend on any of the given absolute paths (without re-rendering)."""
+        names = set()
+        for path in paths:
+            rel = self._relative(path)
+            if rel is None:
+                continue
+            if rel == "layers.json":
+                names.add(FOUNDATIONAL)
+            elif rel.startswith("stacks/") and rel.endswith(".yaml"):
+                names.add(Path(rel).name)
+            else:
+                names |= self.dependents.get(rel, set())
+        return names
+
+    def _load_stack(self, name: str, path: Path) -> None:
+        # Parsed here rather than with load_stack_config(), which exits on bad YAML
+        import yaml
+
+        try:
+            self.stack_configs[name] = yaml.safe_load(path.read_text()) or {}
+        except (OSError, yaml.YAMLError) as e:
+            self.stack_configs.pop(name, None)
+            self.results[name] = {'error': f"Error parsing YAML: {e}"}
+
+    def _relative(self, path: Path) -> Optional[str]:
+        try:
+            return Path(path).resolve().relative_to(self.repo_root).as_posix()
+        except ValueError:
+            return None
+
+    def update(self, paths: Iterable[Path]) -> Dict:
+        """
+        Apply a batch of changed files and re-render what depends on them.
+
+        Args:
+            paths: Absolute paths reported by the watcher
+
+        Returns:
+            {"rendered": {name: entry}, "removed": [names], "seconds": float}
+        """
+        start = time.perf_counter()
+        paths = list(paths)
+        affected = self.affected(paths)
+        removed = []
+        reindex = False
+
+        for path in paths:
+            rel = self._relative(path)
+            if rel is None:
+                continue
+            exists = Path(path).is_file()
+            if rel == "layers.json":
+                if exists:
+                    self.layers_config = load_layers_config(self.repo_root)
+                    reindex = True
+            elif rel.startswith("stacks/") and rel.endswith(".yaml"):
+                name = Path(rel).name
+                if exists:
+                    self._load_stack(name, Path(path))
+                else:
+                    self.stack_configs.pop(name, None)
+                    if self.results.pop(name, None) is not None:
+                        output = self.output_dir / f"{Path(name).stem}.md"
+                        output.unlink(missing_ok=True)
+                    removed.append(name)
+                reindex = True
+            elif rel in self.dependents:
+                self.contents[rel] = self.concatenator.read_layer_file(Path(rel)) if exists else None
+
+        if reindex:
+            self._index()
+            self._read_missing()
+        # A changed layers.json can add or drop foundational elements
+        affected = (affected | self.affected(paths)) - set(removed)
+
+        rendered = self._render(sorted(affected)) if affected or removed else {}
+        return {"rendered": rendered, "removed": removed,
+                "seconds": time.perf_counter() - start}
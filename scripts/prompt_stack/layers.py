@@ -0,0 +1,138 @@
+"""
+Foundational layer loading, ordering and rendering.
+
+Reads layers.json and the markdown files it references, orders the
+foundational layers and renders them into a single prompt.
+"""
+
+import json
+from pathlib import Path
+from typing import Callable
+
+# Custom order: context first, then personalization, then the rest
+# This puts user identity info near the start for better prompt flow
+ORDER_MAP = {
+    "01-context": 1,
+    "05-personalization": 2,  # Move personalization early
+    "02-exclusions": 3,
+    "03-corrections": 4,
+    "04-inference": 5,
+}
+
+
+def default_repo_root() -> Path:
+    """Repository root containing layers.json, layers/ and stacks/."""
+    return Path(__file__).resolve().parent.parent.parent
+
+
+def load_layers_config(repo_root: Path) -> dict:
+    """Load the layers.json configuration file."""
+    config_path = repo_root / "layers.json"
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+
+def read_markdown_file(repo_root: Path, file_path: str) -> str:
+    """Read content from a markdown file."""
+    full_path = repo_root / file_path
+    if full_path.exists():
+        return full_path.read_text().strip()
+    return ""
+
+
+def extract_foundational_instructions(config: dict, repo_root: Path,
+                                      reader: Callable[[Path, str], str] = read_markdown_file
+                                      ) -> list[tuple[str, str, str, bool]]:
+    """
+    Extract all foundational layer instructions in optimized order.
+
+    Order: Context -> Personalization -> Exclusions -> Corrections -> Inference
+
+    Args:
+        config: Parsed layers.json
+        repo_root: Repository root the file paths are relative to
+        reader: Function used to read layer files (default: read from disk)
+
+    Returns:
+        List of tuples: (layer_name, element_name, instruction, no_header)
+    """
+    instructions = []
+
+    foundational = config.get("foundational", {})
+    layers = foundational.get("layers", [])
+
+    sorted_layers = sorted(
+        layers,
+        key=lambda x: ORDER_MAP.get(x.get("folder", ""), x.get("order", 99))
+    )
+
+    for layer in sorted_layers:
+        layer_name = layer.get("name", "Unknown")
+        elements = layer.get("elements", [])
+
+        for element in elements:
+            element_name = element.get("name", "unknown")
+            file_path = element.get("file_path", "")
+            no_header = element.get("no_header", False)
+
+            # Read from file if file_path exists, otherwise fall back to instruction
+            if file_path:
+                instruction = reader(repo_root, file_path)
+            else:
+                instruction = element.get("instruction", "")
+
+            if instruction:
+                instructions.append((layer_name, element_name, instruction, no_header))
+
+    return instructions
+
+
+def format_element_name(element_name: str) -> str:
+    """Convert element-name to Title Case Header."""
+    return element_name.replace("-", " ").title()
+
+
+def generate_foundational_prompt(instructions: list[tuple[str, str, str, bool]],
+                                  include_headers: bool = True) -> str:
+    """
+    Generate the concatenated foundational prompt.
+
+    Args:
+        instructions: List of (layer_name, element_name, instruction, no_header) tuples
+        include_headers: If True, include section headers for each element (default: True)
+
+    Returns:
+        Concatenated prompt string
+    """
+    if include_headers:
+        sections = []
+
+        for layer_name, element_name, instruction, no_header in instructions:
+            if no_header:
+                # No header for this element (e.g., task-definition)
+                sections.append(instruction)
+            else:
+                header = format_element_name(element_name)
+                sections.append(f"## {header}\n\n{instruction}")
+
+        return "\n\n".join(sections)
+    else:
+        # Simple concatenation without headers
+        return "\n\n".join(instruction for _, _, instruction, _ in instructions)
+
+
+def build_foundational_prompt(repo_root: Path = None, include_headers: bool = True) -> str:
+    """
+    Load layers.json and render the foundational prompt in one call.
+
+    Args:
+        repo_root: Repository root (default: the checkout containing this package)
+        include_headers: If True, include section headers for each element
+
+    Returns:
+        Concatenated prompt string
+    """
+    repo_root = Path(repo_root) if repo_root else default_repo_root()
+    config = load_layers_config(repo_root)
+    instructions = extract_foundational_instructions(config, repo_root)
+    return generate_foundational_prompt(instructions, include_headers=include_headers)
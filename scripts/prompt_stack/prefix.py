@@ -0,0 +1,105 @@
+"""
+Prefix-stable stack rendering.
+
+Renders a stack as the canonical foundational prompt followed by the
+stack's remaining layers. Every stack therefore starts with byte-identical
+text, which model providers can cache once and reuse (context caching).
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from .layers import (
+    extract_foundational_instructions,
+    generate_foundational_prompt,
+    load_layers_config,
+    read_markdown_file,
+)
+
+# Stack layers under this directory are already part of the canonical prefix
+FOUNDATIONAL_DIR = "layers/foundational/"
+
+
+def prefix_hash(prefix: str) -> str:
+    """SHA-256 of the prefix text; identical prefixes share a provider-side cache."""
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+
+def foundational_paths(layers_config: Dict) -> Set[str]:
+    """File paths of every foundational element in layers.json."""
+    return {
+        element["file_path"]
+        for layer in layers_config.get("foundational", {}).get("layers", [])
+        for element in layer.get("elements", [])
+        if element.get("file_path")
+    }
+
+
+def canonical_prefix(layers_config: Dict, repo_root: Path,
+                     reader: Callable[[Path, str], str] = read_markdown_file,
+                     include_headers: bool = True) -> str:
+    """
+    The foundational prompt used as the shared prefix of every stack.
+
+    Identical to generate-foundational.py output for the same options.
+    """
+    instructions = extract_foundational_instructions(layers_config, repo_root, reader=reader)
+    return generate_foundational_prompt(instructions, include_headers=include_headers)
+
+
+def render_prefix_stable(concatenator, stack_config: Dict, layers_config: Optional[Dict] = None,
+                         separator: str = "\n\n", include_headers: bool = True) -> Dict:
+    """
+    Render a stack as canonical foundational prefix + stylistic suffix.
+
+    Layers the prefix already covers (anything under layers/foundational/ or
+    referenced by layers.json) are skipped; the rest are appended in stack
+    order.
+
+    Args:
+        concatenator: PromptStackConcatenator used to load layer files
+        stack_config: Stack configuration dictionary
+        layers_config: Parsed layers.json (loaded from the repo if None)
+        separator: String between the prefix and each appended layer
+        include_headers: Whether the prefix includes section headers
+
+    Returns:
+        {"prompt", "prefix", "suffix", "prefix_hash", "layers": [appended paths],
+         "skipped": [paths covered by the prefix]}
+    """
+    if layers_config is None:
+        layers_config = load_layers_config(concatenator.repo_root)
+
+    reader = concatenator.bundle.read if concatenator.bundle is not None else read_markdown_file
+    prefix = canonical_prefix(layers_config, concatenator.repo_root, reader=reader,
+                              include_headers=include_headers)
+    covered = foundational_paths(layers_config)
+
+    appended, skipped, contents = [], [], []
+    for layer_path in stack_config.get("layers") or []:
+        posix = Path(layer_path).as_posix()
+        if posix in covered or posix.startswith(FOUNDATIONAL_DIR):
+            skipped.append(layer_path)
+            continue
+        contents.append(concatenator.load_layer(Path(layer_path)))
+        appended.append(layer_path)
+
+    suffix = separator.join(contents)
+    return {
+        "prompt": separator.join(part for part in (prefix, suffix) if part),
+        "prefix": prefix,
+        "suffix": suffix,
+        "prefix_hash": prefix_hash(prefix),
+        "layers": appended,
+        "skipped": skipped,
+    }
+
+
+def render_stack_file_prefix_stable(concatenator, stack_file: str, separator: str = "\n\n",
+                                    include_headers: bool = True) -> Dict:
+    """Resolve and load a stack file, then render it with render_prefix_stable()."""
+    stack_path = concatenator.resolve_stack_path(stack_file)
+    config = concatenator.load_stack_config(stack_path)
+    return render_prefix_stable(concatenator, config, separator=separator,
+                                include_headers=include_headers)
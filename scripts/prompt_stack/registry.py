@@ -0,0 +1,277 @@
+"""
+Compiled layer registry.
+
+One scan of layers/, archive/, stacks/ and layers.json produces an index of
+every layer file by path, category and content hash, plus the layer list of
+every stack. The registry is cached in generated/cache/layer-registry.json
+and reused while no scanned file or directory has changed, so loading it
+costs a few stat calls and a JSON parse (and no YAML import).
+"""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .files import atomic_write_text
+from .layers import default_repo_root
+
+REGISTRY_VERSION = 1
+
+# Directories scanned for layer files; archived layers are only used for suggestions
+LAYER_DIRS = ("layers", "archive")
+
+
+def default_registry_path(repo_root: Optional[Path] = None) -> Path:
+    """Location of the cached registry inside the repository."""
+    return Path(repo_root or default_repo_root()) / "generated" / "cache" / "layer-registry.json"
+
+
+def _stat_key(path: Path) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class LayerRegistry:
+    """Index of layer files and stack references for one repository."""
+
+    def __init__(self, repo_root: Path, layers: Dict[str, Dict], stacks: Dict[str, Dict],
+                 references: Dict[str, List[str]], sources: Dict[str, Optional[List[int]]]):
+        """
+        Initialize the registry (use build() or load() rather than calling this directly).
+
+        Args:
+            repo_root: Repository root
+            layers: Repository-relative path -> {"category", "name", "sha256", "bytes", "archived"}
+            stacks: Stack file name -> {"layers": [...]} or {"error": message}
+            references: layers.json file paths grouped by "foundational"/"stylistic"
+            sources: Scanned file/directory -> [mtime_ns, size], for freshness checks
+        """
+        self.repo_root = Path(repo_root)
+        self.layers = layers
+        self.stacks = stacks
+        self.references = references
+        self.sources = sources
+        self._categories: Dict[str, List[str]] = defaultdict(list)
+        self._hashes: Dict[str, List[str]] = defaultdict(list)
+        self._names: Dict[str, List[str]] = defaultdict(list)
+        for path, entry in sorted(layers.items()):
+            if not entry["archived"]:
+                self._categories[entry["category"]].append(path)
+            self._hashes[entry["sha256"]].append(path)
+            self._names[Path(path).name].append(path)
+
+    @classmethod
+    def build(cls, repo_root: Optional[Path] = None) -> "LayerRegistry":
+        """Scan the repository and build a fresh registry."""
+        repo_root = Path(repo_root or default_repo_root())
+        sources: Dict[str, Optional[List[int]]] = {}
+        layers: Dict[str, Dict] = {}
+
+        for top in LAYER_DIRS:
+            for dirpath, dirnames, filenames in os.walk(repo_root / top):
+                dirnames.sort()
+                directory = Path(dirpath)
+                sources[directory.relative_to(repo_root).as_posix()] = _stat_key(directory)
+                for filename in sorted(filenames):
+                    if not filename.endswith(".md"):
+                        continue
+                    path = directory / filename
+                    rel = path.relative_to(repo_root).as_posix()
+                    data = path.read_bytes()
+                    sources[rel] = _stat_key(path)
+                    layers[rel] = {
+                        "category": "/".join(Path(rel).parts[1:-1]),
+                        "name": path.stem,
+                        "sha256": hashlib.sha256(data).hexdigest(),
+                        "bytes": len(data),
+                        "archived": top != "layers",
+                    }
+
+        references: Dict[str, List[str]] = {"foundational": [], "stylistic": []}
+        layers_json = repo_root / "layers.json"
+        sources["layers.json"] = _stat_key(layers_json)
+        if layers_json.exists():
+            config = json.loads(layers_json.read_text())
+            for section in references:
+                for layer in config.get(section, {}).get("layers", []):
+                    for element in layer.get("elements", []):
+                        if element.get("file_path"):
+                            references[section].append(element["file_path"])
+
+        stacks: Dict[str, Dict] = {}
+        stacks_dir = repo_root / "stacks"
+        sources["stacks"] = _stat_key(stacks_dir)
+        if stacks_dir.exists():
+            # Only needed when the cached registry is stale
+            import yaml
+
+            for stack_file in sorted(stacks_dir.glob("*.yaml")):
+                sources[f"stacks/{stack_file.name}"] = _stat_key(stack_file)
+                try:
+                    config = yaml.safe_load(stack_file.read_text()) or {}
+                    stacks[stack_file.name] = {"layers": list(config.get("layers") or [])}
+                except yaml.YAMLError as e:
+                    stacks[stack_file.name] = {"error": f"Error parsing YAML: {e}"}
+
+        return cls(repo_root, layers, stacks, references, sources)
+
+    @classmethod
+    def load(cls, repo_root: Optional[Path] = None, cache_path: Optional[Path] = None,
+             rebuild: bool = False) -> "LayerRegistry":
+        """
+        Load the cached registry, rebuilding and saving it if anything changed.
+
+        Args:
+            repo_root: Repository root (default: this checkout)
+            cache_path: Registry file (default: generated/cache/layer-registry.json)
+            rebuild: Ignore the cached registry
+        """
+        repo_root = Path(repo_root or default_repo_root())
+        cache_path = Path(cache_path) if cache_path else default_registry_path(repo_root)
+
+        if not rebuild:
+            try:
+                data = json.loads(cache_path.read_text())
+            except (OSError, ValueError):
+                data = None
+            if data and data.get("version") == REGISTRY_VERSION and \
+                    data.get("root") == str(repo_root.resolve()):
+                registry = cls(repo_root, data["layers"], data["stacks"],
+                               data["references"], data["sources"])
+                if registry.is_fresh():
+                    return registry
+
+        registry = cls.build(repo_root)
+        registry.save(cache_path)
+        return registry
+
+    def is_fresh(self) -> bool:
+        """True if no scanned file or directory has changed since the scan."""
+        return all(_stat_key(self.repo_root / rel) == key for rel, key in self.sources.items())
+
+    def save(self, cache_path: Optional[Path] = None) -> bool:
+        """
+        Write the registry to disk.
+
+        Best-effort: the registry is only a cache, so an unwritable cache
+        path is not an error.
+
+        Returns:
+            True if the registry was written
+        """
+        data = {
+            "version": REGISTRY_VERSION,
+            "root": str(self.repo_root.resolve()),
+            "layers": self.layers,
+            "stacks": self.stacks,
+            "references": self.references,
+            "sources": self.sources,
+        }
+        try:
+            atomic_write_text(cache_path or default_registry_path(self.repo_root),
+                              json.dumps(data) + "\n")
+        except OSError:
+            return False
+        return True
+
+    def get(self, path: str) -> Optional[Dict]:
+        """Registry entry for a repository-relative layer path."""
+        return self.layers.get(Path(path).as_posix())
+
+    def categories(self) -> List[str]:
+        """Categories of active (non-archived) layers, e.g. "stylistic/tone"."""
+        return sorted(self._categories)
+
+    def by_category(self, category: str) -> List[str]:
+        """Active layer paths in a category."""
+        return list(self._categories.get(category, []))
+
+    def by_hash(self, sha256: str) -> List[str]:
+        """Layer paths (active or archived) whose content has this SHA-256."""
+        return list(self._hashes.get(sha256, []))
+
+    def exists(self, path: str) -> bool:
+        """True if path is an indexed layer or any other existing file."""
+        return self.get(path) is not None or (self.repo_root / path).is_file()
+
+    def suggest(self, path: str) -> Optional[str]:
+        """
+        Best replacement for a missing layer path.
+
+        Candidates share the file name; a matching parent directory and
+        an active (non-archived) location are preferred.
+        """
+        missing = Path(path)
+        candidates = self._names.get(missing.name, [])
+        if not candidates:
+            return None
+
+        def score(candidate: str):
+            entry = self.layers[candidate]
+            return (Path(candidate).parent.name == missing.parent.name,
+                    not entry["archived"],
+                    -len(candidate))
+
+        return max(candidates, key=score)
+
+    def validate(self, stacks: Optional[List[str]] = None,
+                 include_layers_json: bool = True) -> Dict[str, List[Dict]]:
+        """
+        Check every stack (and layers.json) for broken layer references.
+
+        Args:
+            stacks: Stack file names to check (default: all)
+            include_layers_json: Also check file paths referenced by layers.json
+
+        Returns:
+            Source name -> list of {"layer", "problem", "suggestion"}; only
+            sources with problems are included
+        """
+        problems: Dict[str, List[Dict]] = {}
+
+        def check(source: str, paths: List[str]) -> None:
+            broken = [{"layer": p, "problem": "missing", "suggestion": self.suggest(p)}
+                      for p in paths if not self.exists(p)]
+            if broken:
+                problems[source] = broken
+
+        names = self.stacks if stacks is None else stacks
+        for name in names:
+            stack = self.stacks.get(name)
+            if stack is None:
+                problems[name] = [{"layer": None, "problem": "stack not found", "suggestion": None}]
+            elif "error" in stack:
+                problems[name] = [{"layer": None, "problem": stack["error"], "suggestion": None}]
+            elif not stack["layers"]:
+                problems[name] = [{"layer": None, "problem": "no layers defined", "suggestion": None}]
+            else:
+                check(name, stack["layers"])
+
+        if include_layers_json:
+            check("layers.json", self.references["foundational"] + self.references["stylistic"])
+
+        return problems
+
+
+def format_problems(problems: Dict[str, List[Dict]]) -> List[str]:
+    """Human-readable lines for LayerRegistry.validate() output."""
+    lines = []
+    for source, broken in problems.items():
+        lines.append(f"{source}: {len(broken)} problem(s)")
+        for problem in broken:
+            if problem["layer"] is None:
+                lines.append(f"  {problem['problem']}")
+                continue
+            line = f"  {problem['layer']} ({problem['problem']})"
+            suggestion = problem["suggestion"]
+            if suggestion:
+                verb = "moved to" if suggestion.startswith("archive/") else "did you mean"
+                line += f" -> {verb} {suggestion}"
+            lines.append(line)
+    return lines
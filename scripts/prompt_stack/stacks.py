@@ -0,0 +1,438 @@
+"""
+Stack configuration loading and concatenation.
+"""
+
+import hashlib
+import json
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from .files import atomic_write_text, file_fingerprint, fingerprint_is_fresh
+from .layers import (
+    default_repo_root,
+    extract_foundational_instructions,
+    generate_foundational_prompt,
+    load_layers_config,
+)
+
+
+def foundational_file_paths(layers_config: Dict) -> List[str]:
+    """File paths (POSIX) of every foundational element in layers.json, in file order."""
+    return [
+        Path(element["file_path"]).as_posix()
+        for layer in layers_config.get("foundational", {}).get("layers", [])
+        for element in layer.get("elements", [])
+        if element.get("file_path")
+    ]
+
+
+class MissingLayerError(SystemExit):
+    """
+    Raised when a stack references a layer file that does not exist.
+
+    Subclasses SystemExit (status 1) so scripts that let it propagate still
+    exit as before, while callers can tell it apart from other exits.
+    """
+
+
+class CompiledPromptCache:
+    """
+    LRU cache of compiled prompts with an optional on-disk tier.
+
+    Entries are keyed on the resolved stack file, separator and layer
+    source (loose files, or a bundle's path and index hash). Each entry
+    records a fingerprint (mtime, size and SHA-256) of the stack file and of
+    every layer it references, so any edit to those files invalidates it.
+    """
+
+    def __init__(self, max_entries: int = 128, cache_dir: Optional[Path] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of prompts kept in memory
+            cache_dir: Directory for the on-disk tier. If None, memory only.
+        """
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+    @staticmethod
+    def _key(stack_path: Path, separator: str, source: str) -> str:
+        raw = f"{Path(stack_path).resolve()}\0{separator}\0{source}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    fingerprint = staticmethod(file_fingerprint)
+    _is_fresh = staticmethod(fingerprint_is_fresh)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, stack_path: Path, separator: str, source: str = "files") -> Optional[str]:
+        """
+        Return the cached prompt for a stack if all its inputs are unchanged.
+
+        Args:
+            stack_path: Resolved path to the stack file
+            separator: Separator the prompt was joined with
+            source: Where the layers were read from ("files" or a bundle identifier)
+
+        Returns:
+            Cached prompt string, or None on a miss or stale entry
+        """
+        key = self._key(stack_path, separator, source)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            disk_path = self._disk_path(key)
+            if disk_path is not None and disk_path.exists():
+                try:
+                    entry = json.loads(disk_path.read_text())
+                except (OSError, ValueError):
+                    entry = None
+
+        if entry is None:
+            return None
+
+        if not all(self._is_fresh(fp) for fp in [entry['stack']] + entry['layers']):
+            self.invalidate(stack_path, separator, source)
+            return None
+
+        self._remember(key, entry)
+        return entry['prompt']
+
+    def put(self, stack_path: Path, separator: str,
+            layer_paths: List[Path], prompt: str, source: str = "files") -> None:
+        """
+        Store a compiled prompt together with fingerprints of its inputs.
+
+        Args:
+            stack_path: Resolved path to the stack file
+            separator: Separator the prompt was joined with
+            layer_paths: Full paths of every file the prompt was built from
+            prompt: Compiled prompt string
+            source: Where the layers were read from ("files" or a bundle identifier)
+        """
+        fingerprints = [self.fingerprint(p) for p in [stack_path] + list(layer_paths)]
+        if any(fp is None for fp in fingerprints):
+            return
+
+        key = self._key(stack_path, separator, source)
+        entry = {'stack': fingerprints[0], 'layers': fingerprints[1:], 'prompt': prompt}
+        self._remember(key, entry)
+
+        disk_path = self._disk_path(key)
+        if disk_path is not None:
+            atomic_write_text(disk_path, json.dumps(entry))
+
+    def invalidate(self, stack_path: Path, separator: str, source: str = "files") -> None:
+        """Drop a stack's entry from memory and disk."""
+        key = self._key(stack_path, separator, source)
+        self._entries.pop(key, None)
+        disk_path = self._disk_path(key)
+        if disk_path is not None and disk_path.exists():
+            disk_path.unlink()
+
+    def _remember(self, key: str, entry: Dict) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class PromptStackConcatenator:
+    """Concatenates prompt layers into a complete transformation prompt."""
+
+    def __init__(self, repo_root: Optional[Path] = None,
+                 cache: Optional[CompiledPromptCache] = None, bundle=None):
+        """
+        Initialize the concatenator.
+
+        Args:
+            repo_root: Path to repository root. If None, uses the checkout
+                containing this package.
+            cache: Optional compiled-prompt cache used by concatenate_from_file
+            bundle: Optional LayerBundle to read layers from instead of the
+                loose files under repo_root
+        """
+        if repo_root is None:
+            self.repo_root = default_repo_root()
+        else:
+            self.repo_root = Path(repo_root)
+        self.cache = cache
+        self.bundle = bundle
+
+    def default_cache_dir(self) -> Path:
+        """Return the on-disk cache location for compiled prompts."""
+        return self.repo_root / "generated" / "cache" / "prompts"
+
+    def load_stack_config(self, stack_path: Path) -> Dict:
+        """
+        Load a stack configuration file.
+
+        Args:
+            stack_path: Path to stack YAML file
+
+        Returns:
+            Dictionary containing stack configuration
+        """
+        # Imported here so CLI paths that never parse YAML (--list, --help) skip it
+        import yaml
+
+        try:
+            with open(stack_path, 'r') as f:
+                config = yaml.safe_load(f)
+            return config
+        except FileNotFoundError:
+            print(f"Error: Stack file not found: {stack_path}", file=sys.stderr)
+            sys.exit(1)
+        except yaml.YAMLError as e:
+            print(f"Error parsing YAML: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    def load_layer(self, layer_path: Path) -> str:
+        """
+        Load a single layer file.
+
+        Args:
+            layer_path: Path to layer markdown file
+
+        Returns:
+            Content of the layer file
+
+        Raises:
+            MissingLayerError: If the layer file does not exist
+        """
+        content = self.read_layer_file(layer_path)
+        if content is None:
+            print(f"Error: Layer file not found: {self.repo_root / layer_path}", file=sys.stderr)
+            raise MissingLayerError(1)
+        return content
+
+    def read_layer_file(self, layer_path: Path) -> Optional[str]:
+        """
+        Read a single layer file without exiting on errors.
+
+        Args:
+            layer_path: Path to layer markdown file, relative to repo root
+
+        Returns:
+            Stripped content of the layer file, or None if it does not exist
+        """
+        if self.bundle is not None:
+            return self.bundle.get(layer_path)
+        try:
+            with open(self.repo_root / layer_path, 'r') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def concatenate_stack(self, stack_config: Dict, separator: str = "\n\n") -> str:
+        """
+        Concatenate all layers in a stack.
+
+        Args:
+            stack_config: Stack configuration dictionary
+            separator: String to use between layers
+
+        Returns:
+            Concatenated prompt string
+        """
+        return separator.join(content for _, content in self.stack_sections(stack_config))
+
+    def stack_sections(self, stack_config: Dict) -> List[Tuple[str, str]]:
+        """
+        Load every layer in a stack.
+
+        Args:
+            stack_config: Stack configuration dictionary
+
+        Returns:
+            List of (layer_path, content) tuples in stack order
+        """
+        layers = stack_config.get('layers', [])
+        if not layers:
+            print("Error: No layers defined in stack configuration", file=sys.stderr)
+            sys.exit(1)
+
+        return [(layer_path, self.load_layer(Path(layer_path))) for layer_path in layers]
+
+    def resolve_stack_path(self, stack_file: str) -> Path:
+        """
+        Resolve a stack name or path to a stack file.
+
+        Relative paths are looked up in stacks/ first, then from the repo root.
+
+        Args:
+            stack_file: Stack file name or path
+
+        Returns:
+            Path to the stack configuration file
+        """
+        stack_path = Path(stack_file)
+        if not stack_path.is_absolute():
+            # Try in stacks directory first
+            stack_path = self.repo_root / "stacks" / stack_file
+            if not stack_path.exists():
+                # Try as relative path from repo root
+                stack_path = self.repo_root / stack_file
+        return stack_path
+
+    def concatenate_from_file(self, stack_file: str, separator: str = "\n\n") -> str:
+        """
+        Load and concatenate a stack from a file path.
+
+        Args:
+            stack_file: Path to stack configuration file
+            separator: String to use between layers
+
+        Returns:
+            Concatenated prompt string
+        """
+        stack_path = self.resolve_stack_path(stack_file)
+        source = "files"
+        if self.bundle is not None:
+            source = f"bundle:{self.bundle.path.resolve()}:{self.bundle.index_hash}"
+
+        if self.cache is not None:
+            cached = self.cache.get(stack_path, separator, source)
+            if cached is not None:
+                return cached
+
+        config = self.load_stack_config(stack_path)
+        prompt = self.concatenate_stack(config, separator)
+
+        if self.cache is not None:
+            # Bundle reads never see the loose files, so only the bundle is fingerprinted
+            if self.bundle is not None:
+                layer_paths = [self.bundle.path]
+            else:
+                layer_paths = [self.repo_root / p for p in config.get('layers', [])]
+            self.cache.put(stack_path, separator, layer_paths, prompt, source)
+
+        return prompt
+
+    def list_available_stacks(self) -> List[str]:
+        """
+        List all available stack configurations.
+
+        Returns:
+            List of stack file names
+        """
+        stacks_dir = self.repo_root / "stacks"
+        if not stacks_dir.exists():
+            return []
+
+        return sorted([f.name for f in stacks_dir.glob("*.yaml")])
+
+    def render_all(self, output_dir: Path, separator: str = "\n\n",
+                   max_workers: Optional[int] = None) -> Dict:
+        """
+        Render every stack plus the foundational prompt in one pass.
+
+        Each distinct layer file is read exactly once, even when several
+        stacks share it. Stacks are rendered in a thread pool and every output
+        is written atomically. A manifest.json with sizes and SHA-256 hashes
+        is written alongside the outputs.
+
+        Args:
+            output_dir: Directory to write rendered prompts into
+            separator: String to use between stack layers
+            max_workers: Thread pool size (default: executor default)
+
+        Returns:
+            Manifest dictionary (also written to output_dir/manifest.json)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        output_dir = Path(output_dir)
+        stack_configs = self.load_all_stack_configs()
+        layers_config = load_layers_config(self.repo_root)
+
+        distinct = set(foundational_file_paths(layers_config))
+        for config in stack_configs.values():
+            distinct.update(Path(p).as_posix() for p in config.get('layers') or [])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            ordered = sorted(distinct)
+            contents = dict(zip(ordered, pool.map(lambda p: self.read_layer_file(Path(p)), ordered)))
+
+            futures = {name: pool.submit(self.render_stack_output, output_dir, name,
+                                         stack_configs[name], contents, separator)
+                       for name in stack_configs}
+            futures["foundational"] = pool.submit(self.render_foundational_output, output_dir,
+                                                  layers_config, contents)
+            results = {name: future.result() for name, future in futures.items()}
+
+        return self.write_manifest(output_dir, results, layer_files_read=len(contents))
+
+    def load_all_stack_configs(self) -> Dict[str, Dict]:
+        """Parse every stack in stacks/, keyed by file name."""
+        import yaml
+
+        stack_configs = {}
+        for name in self.list_available_stacks():
+            with open(self.repo_root / "stacks" / name, 'r') as f:
+                stack_configs[name] = yaml.safe_load(f) or {}
+        return stack_configs
+
+    def render_stack_output(self, output_dir: Path, name: str, stack_config: Dict,
+                            contents: Dict[str, Optional[str]], separator: str = "\n\n") -> Dict:
+        """
+        Render one stack from preloaded layer contents and write <stem>.md.
+
+        Args:
+            output_dir: Directory to write into
+            name: Stack file name
+            stack_config: Parsed stack configuration
+            contents: Layer path (POSIX) -> content, or None if the file is missing
+            separator: String to use between layers
+
+        Returns:
+            Manifest entry, or {'error': message}
+        """
+        layers = [Path(p).as_posix() for p in stack_config.get('layers') or []]
+        if not layers:
+            return {'error': "No layers defined in stack configuration"}
+        missing = [p for p in layers if contents.get(p) is None]
+        if missing:
+            return {'error': "Layer file(s) not found: " + ", ".join(missing)}
+        prompt = separator.join(contents[p] for p in layers)
+        return self._write_output(output_dir, f"{Path(name).stem}.md", prompt,
+                                  source=f"stacks/{name}", layers=len(layers))
+
+    def render_foundational_output(self, output_dir: Path, layers_config: Dict,
+                                   contents: Dict[str, Optional[str]]) -> Dict:
+        """Render the foundational prompt from preloaded layer contents and write foundational.md."""
+        instructions = extract_foundational_instructions(
+            layers_config, self.repo_root,
+            reader=lambda root, path: contents.get(Path(path).as_posix()) or "")
+        if not instructions:
+            return {'error': "No foundational instructions found"}
+        prompt = generate_foundational_prompt(instructions)
+        return self._write_output(output_dir, "foundational.md", prompt,
+                                  source="layers.json", layers=len(instructions))
+
+    @staticmethod
+    def write_manifest(output_dir: Path, results: Dict[str, Dict], **info) -> Dict:
+        """Write manifest.json for render results (name -> entry or {'error': ...})."""
+        manifest = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            **info,
+            'outputs': {n: r for n, r in results.items() if 'error' not in r},
+            'errors': {n: r['error'] for n, r in results.items() if 'error' in r},
+        }
+        atomic_write_text(Path(output_dir) / "manifest.json", json.dumps(manifest, indent=2) + "\n")
+        return manifest
+
+    @staticmethod
+    def _write_output(output_dir: Path, filename: str, prompt: str, **info) -> Dict:
+        atomic_write_text(output_dir / filename, prompt)
+        data = prompt.encode('utf-8')
+        return dict(info, file=filename, bytes=len(data),
+                    sha256=hashlib.sha256(data).hexdigest())
@@ -0,0 +1,125 @@
+"""
+Offline token accounting for prompts.
+
+Token counts are estimated with a pluggable tokenizer. The default is a
+fast heuristic that needs no dependencies; tiktoken can be used instead
+when it is installed.
+"""
+
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .layers import extract_foundational_instructions, generate_foundational_prompt
+
+# Word runs and individual punctuation marks
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def heuristic_count(text: str) -> int:
+    """
+    Estimate tokens without a vocabulary.
+
+    Each punctuation mark counts as one token and each word as one token
+    per four characters (rounded up), which tracks BPE tokenizers on
+    English prose closely enough for budgeting.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _PIECES.findall(text))
+
+
+def chars_count(text: str) -> int:
+    """Cruder estimate: one token per four characters."""
+    return (len(text) + 3) // 4
+
+
+def get_tokenizer(name: str = "heuristic") -> Callable[[str], int]:
+    """
+    Return a token-counting function.
+
+    Args:
+        name: "heuristic" (default), "chars", or "tiktoken[:encoding]"
+            (requires the optional tiktoken package; default cl100k_base)
+
+    Raises:
+        ValueError: If the tokenizer name is unknown or unavailable
+    """
+    if name == "heuristic":
+        return heuristic_count
+    if name == "chars":
+        return chars_count
+    if name.startswith("tiktoken"):
+        try:
+            import tiktoken
+        except ImportError:
+            raise ValueError("tiktoken is not installed (pip install tiktoken)")
+        encoding = tiktoken.get_encoding(name.partition(":")[2] or "cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    raise ValueError(f"Unknown tokenizer: {name}")
+
+
+def foundational_token_report(config: dict, repo_root: Path,
+                              count: Callable[[str], int] = heuristic_count,
+                              include_headers: bool = True) -> Dict:
+    """
+    Token counts for each foundational element and the full foundational prompt.
+
+    Returns:
+        {"name": "foundational", "total": int, "layers": [{"layer", "element", "tokens"}]}
+    """
+    instructions = extract_foundational_instructions(config, repo_root)
+    layers = []
+    for instruction in instructions:
+        section = generate_foundational_prompt([instruction], include_headers)
+        layers.append({
+            "layer": instruction[0],
+            "element": instruction[1],
+            "tokens": count(section),
+        })
+    prompt = generate_foundational_prompt(instructions, include_headers)
+    return {"name": "foundational", "total": count(prompt), "layers": layers}
+
+
+def stack_token_report(concatenator, stack_file: str,
+                       count: Callable[[str], int] = heuristic_count,
+                       separator: str = "\n\n") -> Dict:
+    """
+    Token counts for each layer of a stack and the concatenated stack.
+
+    Missing layer files are listed under "missing" instead of aborting.
+
+    Returns:
+        {"name", "total", "budget", "layers": [{"path", "tokens"}], "missing": [...]}
+    """
+    stack_path = concatenator.resolve_stack_path(stack_file)
+    config = concatenator.load_stack_config(stack_path) or {}
+
+    layers: List[Dict] = []
+    missing: List[str] = []
+    contents = []
+    for layer_path in config.get("layers") or []:
+        content = concatenator.read_layer_file(Path(layer_path))
+        if content is None:
+            missing.append(layer_path)
+            continue
+        contents.append(content)
+        layers.append({"path": layer_path, "tokens": count(content)})
+
+    return {
+        "name": stack_path.name,
+        "total": count(separator.join(contents)),
+        "budget": config.get("token_budget"),
+        "layers": layers,
+        "missing": missing,
+    }
+
+
+def over_budget(report: Dict, budget: Optional[int] = None) -> Optional[int]:
+    """
+    Return the effective budget if the report's total exceeds it, else None.
+
+    The explicit budget takes precedence over a "budget" recorded in the report.
+    """
+    limit = budget if budget is not None else report.get("budget")
+    if limit is not None and report["total"] > limit:
+        return limit
+    return None
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of model responses.
+
+Responses are stored in SQLite, keyed on the hashes of the prompt and the
+audio plus the model name and generation parameters. The cache is bounded
+by total response size; least recently used entries are evicted first.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    prompt_hash TEXT NOT NULL,
+    audio_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    params TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def default_cache_path() -> Path:
+    """Location of the response cache inside the repository."""
+    return Path(__file__).parent.parent / "generated" / "cache" / "responses.sqlite"
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 of a string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with size-based LRU eviction."""
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite database file (default: generated/cache/responses.sqlite)
+            max_bytes: Maximum total size of stored responses
+        """
+        self.path = Path(path) if path else default_cache_path()
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    @staticmethod
+    def make_key(prompt_hash: str, audio_hash: str, model: str, params: dict) -> str:
+        """Cache key for a prompt/audio/model/parameters combination."""
+        raw = json.dumps([prompt_hash, audio_hash, model, params], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, prompt_hash: str, audio_hash: str, model: str,
+            params: Optional[dict] = None) -> Optional[str]:
+        """Return the cached response, or None on a miss."""
+        key = self.make_key(prompt_hash, audio_hash, model, params or {})
+        row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+        return row[0]
+
+    def put(self, prompt_hash: str, audio_hash: str, model: str,
+            response: str, params: Optional[dict] = None) -> None:
+        """Store a response and evict old entries if over the size limit."""
+        params = params or {}
+        key = self.make_key(prompt_hash, audio_hash, model, params)
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, prompt_hash, audio_hash, model, json.dumps(params, sort_keys=True),
+             response, len(response.encode("utf-8")), now, now))
+        self._db.commit()
+        self.evict()
+
+    def total_bytes(self) -> int:
+        """Total size of stored responses."""
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def evict(self) -> int:
+        """Delete least recently used entries until under max_bytes. Returns rows removed."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self._db.commit()
+        return removed
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._db.close()
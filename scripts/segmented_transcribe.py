@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Segmented transcription for long recordings.
+
+Long audio is split at silence boundaries into overlapping chunks, the
+chunks are transcribed concurrently, and the transcripts are stitched back
+together with the overlapping text removed.
+"""
+
+import asyncio
+import difflib
+import re
+import tempfile
+from pathlib import Path
+
+from audio_tools import detect_silences, extract_segment, probe_duration
+from batch_transcribe import transcribe_with_retries
+from gemini_client import TranscriptionClient
+
+
+def plan_segments(duration: float, silences: list[tuple[float, float]],
+                  target_length: float = 300.0, overlap: float = 4.0,
+                  search_window: float = 60.0) -> list[tuple[float, float]]:
+    """
+    Choose segment boundaries, preferring the middle of silences.
+
+    Each cut is placed at the silence midpoint closest to the target length
+    (within search_window seconds either side); without a suitable silence
+    the cut falls at the target length. Every segment after the first starts
+    overlap seconds before its cut so words at the boundary are not lost.
+
+    Returns:
+        List of (start, end) times in seconds
+    """
+    if duration <= target_length + search_window:
+        return [(0.0, duration)]
+
+    midpoints = [(start + end) / 2 for start, end in silences]
+    cuts = []
+    position = 0.0
+    while duration - position > target_length + search_window:
+        target = position + target_length
+        candidates = [m for m in midpoints
+                      if abs(m - target) <= search_window and m > position + overlap]
+        cut = min(candidates, key=lambda m: abs(m - target)) if candidates else target
+        cuts.append(cut)
+        position = cut
+
+    boundaries = [0.0] + cuts + [duration]
+    return [(max(0.0, boundaries[i] - (overlap if i else 0.0)), boundaries[i + 1])
+            for i in range(len(boundaries) - 1)]
+
+
+def _normalise(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_pair(left: str, right: str, window: int = 80, min_match: int = 3,
+                slack: int = 20) -> str:
+    """
+    Join two consecutive transcripts, removing text duplicated by the overlap.
+
+    The tail of the left transcript and the head of the right one are
+    aligned word by word (ignoring case and punctuation). The longest shared
+    run is kept once: the left text up to the end of the run, then the right
+    text after it. The run must end within slack words (at most a quarter
+    of the compared text) of the end of the left text and start as close to
+    the start of the right text, otherwise both texts are kept whole.
+    """
+    left_words, right_words = left.split(), right.split()
+    if not left_words or not right_words:
+        return (left + "\n\n" + right).strip()
+
+    tail = left_words[-window:]
+    head = right_words[:window]
+    matcher = difflib.SequenceMatcher(
+        None, [_normalise(w) for w in tail], [_normalise(w) for w in head], autojunk=False)
+    match = matcher.find_longest_match(0, len(tail), 0, len(head))
+
+    slack = min(slack, len(tail) // 4, len(head) // 4)
+    at_boundary = match.a + match.size >= len(tail) - slack and match.b <= slack
+    if match.size < min_match or not at_boundary:
+        return left.rstrip() + "\n\n" + right.lstrip()
+
+    keep_left = len(left_words) - len(tail) + match.a + match.size
+    joined_left = _rejoin(left, keep_left)
+    rest = _rejoin_from(right, match.b + match.size)
+    return joined_left + " " + rest if rest else joined_left
+
+
+def _rejoin(text: str, word_count: int) -> str:
+    """Prefix of text containing its first word_count words, original spacing kept."""
+    spans = [m.span() for m in re.finditer(r"\S+", text)]
+    return text[:spans[word_count - 1][1]] if word_count else ""
+
+
+def _rejoin_from(text: str, word_index: int) -> str:
+    """Suffix of text from word word_index onwards, original spacing kept."""
+    spans = [m.span() for m in re.finditer(r"\S+", text)]
+    return text[spans[word_index][0]:] if word_index < len(spans) else ""
+
+
+def stitch_transcripts(transcripts: list[str]) -> str:
+    """Stitch consecutive segment transcripts into one text."""
+    if not transcripts:
+        return ""
+    result = transcripts[0].strip()
+    for text in transcripts[1:]:
+        result = stitch_pair(result, text.strip())
+    return result
+
+
+async def transcribe_segmented(client: TranscriptionClient, prompt: str, audio_path: Path,
+                               target_length: float = 300.0, overlap: float = 4.0,
+                               concurrency: int = 4, timeout: float = 300.0,
+                               retries: int = 3) -> str:
+    """
+    Transcribe long audio by splitting it at silences into overlapping chunks.
+
+    Args:
+        client: Model backend
+        prompt: Prompt sent with every chunk
+        audio_path: Recording to transcribe
+        target_length: Preferred chunk length in seconds
+        overlap: Seconds of audio shared between consecutive chunks
+        concurrency: Chunks transcribed at once
+        timeout: Per-attempt timeout for each chunk
+        retries: Retries per chunk
+
+    Returns:
+        The stitched transcript
+    """
+    duration = await asyncio.to_thread(probe_duration, audio_path)
+    silences = await asyncio.to_thread(detect_silences, audio_path)
+    segments = plan_segments(duration, silences, target_length, overlap)
+    print(f"Split {duration:.0f}s of audio into {len(segments)} segment(s)")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    with tempfile.TemporaryDirectory(prefix="segments-") as tmp:
+        async def run(index: int, start: float, end: float) -> str:
+            async with semaphore:
+                chunk = Path(tmp) / f"{audio_path.stem}_{index:03d}.mp3"
+                await asyncio.to_thread(extract_segment, audio_path, start, end, chunk)
+                transcript, _ = await transcribe_with_retries(
+                    client, prompt, chunk, timeout, retries)
+                print(f"Segment {index + 1}/{len(segments)} done "
+                      f"({start:.0f}s-{end:.0f}s)")
+                return transcript
+
+        transcripts = await asyncio.gather(
+            *(run(i, start, end) for i, (start, end) in enumerate(segments)))
+
+    return stitch_transcripts(list(transcripts))
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Silence trimming before upload.
+
+Long stretches of dead air still cost upload time and audio tokens even
+though the foundational prompt tells the model to ignore them. This
+module shortens every silence longer than min_silence to keep seconds,
+entirely offline:
+
+- PCM WAV files use a pure-Python energy detector (frame RMS in dBFS)
+- Other formats use ffmpeg's silencedetect and aselect filters
+
+TrimmingClient wraps any TranscriptionClient so audio is trimmed just
+before upload, in every transcription mode.
+"""
+
+import array
+import math
+import operator
+import os
+import sys
+import tempfile
+import wave
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from gemini_client import TranscriptionClient
+
+DEFAULT_THRESHOLD_DB = -40.0
+DEFAULT_MIN_SILENCE = 1.0
+DEFAULT_KEEP = 0.3
+FRAME_SECONDS = 0.03
+
+_TYPECODES = {2: "h", 4: "i"}
+
+
+def keep_ranges(silences: List[Tuple[float, float]], duration: float,
+                min_silence: float = DEFAULT_MIN_SILENCE,
+                keep: float = DEFAULT_KEEP) -> List[Tuple[float, float]]:
+    """
+    Audio ranges to keep once long silences are shortened.
+
+    Every silence of at least min_silence seconds is cut down to keep
+    seconds (half on each side of the cut), so words are never clipped
+    and pauses still read as pauses.
+
+    Returns:
+        Sorted, non-overlapping (start, end) ranges in seconds
+    """
+    ranges = []
+    position = 0.0
+    for start, end in sorted(silences):
+        if end - start < min_silence:
+            continue
+        cut_start, cut_end = start + keep / 2, end - keep / 2
+        if cut_start > position:
+            ranges.append((position, cut_start))
+        position = max(position, cut_end)
+    if position < duration:
+        ranges.append((position, duration))
+    return ranges
+
+
+def _frame_levels(frames: bytes, sample_width: int, channels: int,
+                  frame_rate: int) -> Tuple[List[float], float]:
+    """RMS level (dBFS) of every FRAME_SECONDS window of raw PCM."""
+    if sample_width == 1:
+        # 8-bit WAV is unsigned
+        samples = array.array("b", bytes((b - 128) & 0xFF for b in frames))
+    else:
+        samples = array.array(_TYPECODES[sample_width])
+        samples.frombytes(frames)
+        if sys.byteorder == "big":
+            samples.byteswap()
+    full_scale = float(2 ** (8 * sample_width - 1))
+
+    window = max(1, int(frame_rate * FRAME_SECONDS)) * channels
+    levels = []
+    for offset in range(0, len(samples), window):
+        chunk = samples[offset:offset + window]
+        energy = sum(map(operator.mul, chunk, chunk)) / len(chunk)
+        rms = math.sqrt(energy) / full_scale
+        levels.append(20 * math.log10(rms) if rms > 0 else -120.0)
+    return levels, len(samples) / channels / frame_rate
+
+
+def detect_silences_wav(audio_path: Path, threshold_db: float = DEFAULT_THRESHOLD_DB,
+                        min_silence: float = DEFAULT_MIN_SILENCE
+                        ) -> Tuple[List[Tuple[float, float]], float]:
+    """
+    Find silences in a PCM WAV file with an energy detector.
+
+    Returns:
+        Tuple of ([(start, end), ...] in seconds, duration in seconds)
+
+    Raises:
+        ValueError: If the file is not 8/16/32-bit PCM WAV
+    """
+    try:
+        with wave.open(str(audio_path), "rb") as wav:
+            params = wav.getparams()
+            frames = wav.readframes(params.nframes)
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"Not a PCM WAV file: {audio_path} ({e})")
+    if params.sampwidth not in (1, 2, 4):
+        raise ValueError(f"Unsupported WAV sample width: {params.sampwidth * 8} bits")
+
+    levels, duration = _frame_levels(frames, params.sampwidth, params.nchannels,
+                                     params.framerate)
+    silences = []
+    start = None
+    for index, level in enumerate(levels + [0.0]):
+        if level < threshold_db:
+            if start is None:
+                start = index * FRAME_SECONDS
+        elif start is not None:
+            end = min(index * FRAME_SECONDS, duration)
+            if end - start >= min_silence:
+                silences.append((start, end))
+            start = None
+    return silences, duration
+
+
+def _write_wav_ranges(input_path: Path, output_path: Path,
+                      ranges: List[Tuple[float, float]]) -> None:
+    with wave.open(str(input_path), "rb") as source:
+        params = source.getparams()
+        data = source.readframes(params.nframes)
+    frame_bytes = params.sampwidth * params.nchannels
+    with wave.open(str(output_path), "wb") as target:
+        target.setparams(params)
+        for start, end in ranges:
+            first = int(start * params.framerate) * frame_bytes
+            last = int(end * params.framerate) * frame_bytes
+            target.writeframes(data[first:last])
+
+
+def _write_ffmpeg_ranges(input_path: Path, output_path: Path,
+                         ranges: List[Tuple[float, float]]) -> None:
+    from audio_tools import _run
+
+    select = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in ranges)
+    _run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', str(input_path),
+        '-af', f"aselect='{select}',asetpts=N/SR/TB", str(output_path), '-y'
+    ])
+
+
+def trim_silence(audio_path: Path, output_dir: Path,
+                 threshold_db: float = DEFAULT_THRESHOLD_DB,
+                 min_silence: float = DEFAULT_MIN_SILENCE,
+                 keep: float = DEFAULT_KEEP, method: str = "auto") -> Dict:
+    """
+    Shorten long silences in an audio file.
+
+    Args:
+        audio_path: Audio to trim
+        output_dir: Directory for the trimmed copy
+        threshold_db: Level (dBFS) below which audio counts as silence
+        min_silence: Only silences at least this long (seconds) are shortened
+        keep: Seconds of each shortened silence that are kept
+        method: "python" (PCM WAV only), "ffmpeg" or "auto" (python for WAV)
+
+    Returns:
+        {"output": path to upload (the input if nothing was trimmed), "method",
+         "input_bytes", "output_bytes", "input_seconds", "output_seconds",
+         "saved_bytes", "saved_seconds", "silences"}
+
+    Raises:
+        AudioToolError: If ffmpeg is needed and fails or is missing
+        ValueError: If method is "python" and the file is not PCM WAV
+    """
+    from audio_tools import detect_silences, probe_duration
+
+    audio_path = Path(audio_path)
+    use_python = method == "python" or (method == "auto" and audio_path.suffix.lower() == ".wav")
+    silences = duration = None
+    if use_python:
+        try:
+            silences, duration = detect_silences_wav(audio_path, threshold_db, min_silence)
+        except ValueError:
+            if method == "python":
+                raise
+            use_python = False
+    if not use_python:
+        duration = probe_duration(audio_path)
+        silences = detect_silences(audio_path, threshold_db, min_silence)
+
+    ranges = keep_ranges(silences, duration, min_silence, keep)
+    kept = sum(end - start for start, end in ranges)
+    output = audio_path
+    if kept < duration - 0.01:
+        # Unique name: callers share one temp dir and inputs may share a stem
+        fd, name = tempfile.mkstemp(dir=output_dir, prefix=f"{audio_path.stem}_",
+                                    suffix=f"_trimmed{audio_path.suffix}")
+        os.close(fd)
+        output = Path(name)
+        writer = _write_wav_ranges if use_python else _write_ffmpeg_ranges
+        try:
+            writer(audio_path, output, ranges)
+        except BaseException:
+            output.unlink(missing_ok=True)
+            raise
+    else:
+        kept = duration
+
+    input_bytes = audio_path.stat().st_size
+    output_bytes = output.stat().st_size
+    return {
+        "output": output,
+        "method": "python" if use_python else "ffmpeg",
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "input_seconds": round(duration, 3),
+        "output_seconds": round(kept, 3),
+        "saved_bytes": input_bytes - output_bytes,
+        "saved_seconds": round(duration - kept, 3),
+        "silences": sum(1 for s, e in silences if e - s >= min_silence),
+    }
+
+
+def format_trim_stats(stats: Dict) -> str:
+    """One-line summary of a trim_silence() result."""
+    return (f"Trimmed {stats['silences']} silence(s): "
+            f"{stats['input_seconds']:.1f}s -> {stats['output_seconds']:.1f}s "
+            f"(saved {stats['saved_seconds']:.1f}s), "
+            f"{stats['input_bytes'] / 1024:.0f}KB -> {stats['output_bytes'] / 1024:.0f}KB "
+            f"(saved {stats['saved_bytes'] / 1024:.0f}KB)")
+
+
+def total_savings(results: List[Dict]) -> Dict:
+    """Sum the savings of several trim_silence() results."""
+    return {key: sum(r[key] for r in results)
+            for key in ("input_bytes", "output_bytes", "saved_bytes",
+                        "input_seconds", "output_seconds", "saved_seconds", "silences")}
+
+
+class TrimmingClient(TranscriptionClient):
+    """Wraps a client so every upload is silence-trimmed first."""
+
+    def __init__(self, client: TranscriptionClient, threshold_db: float = DEFAULT_THRESHOLD_DB,
+                 min_silence: float = DEFAULT_MIN_SILENCE, keep: float = DEFAULT_KEEP,
+                 method: str = "auto", verbose: bool = True, tracer=None):
+        """
+        Initialize the wrapper.
+
+        Args:
+            client: Client that performs the actual upload and generation
+            threshold_db, min_silence, keep, method: See trim_silence()
+            verbose: Print a summary line per trimmed file
+            tracer: latency_trace.Tracer that records a "trim" phase per file
+        """
+        self.client = client
+        self.options = {"threshold_db": threshold_db, "min_silence": min_silence,
+                        "keep": keep, "method": method}
+        self.verbose = verbose
+        self.tracer = tracer
+        self.results: List[Dict] = []
+        self._tmp = tempfile.TemporaryDirectory(prefix="trimmed-")
+
+    def __getattr__(self, name):
+        # calls, model_name, ... of the wrapped client
+        return getattr(self.client, name)
+
+    async def upload(self, audio_path: Path):
+        import asyncio
+        from latency_trace import trace_phase
+
+        with trace_phase(self.tracer, "trim", audio=str(audio_path)) as trace:
+            stats = await asyncio.to_thread(trim_silence, Path(audio_path), Path(self._tmp.name),
+                                            **self.options)
+            trace.update(bytes=stats["output_bytes"], saved_bytes=stats["saved_bytes"],
+                         saved_seconds=stats["saved_seconds"])
+        self.results.append(stats)
+        if self.verbose:
+            print(f"{Path(audio_path).name}: {format_trim_stats(stats)}")
+        return await self.client.upload(stats["output"])
+
+    async def generate(self, prompt: str, audio_handle) -> str:
+        return await self.client.generate(prompt, audio_handle)
+
+    async def generate_stream(self, prompt: str, audio_handle):
+        async for chunk in self.client.generate_stream(prompt, audio_handle):
+            yield chunk
+
+    async def prepare_prefix(self, prefix: str):
+        return await self.client.prepare_prefix(prefix)
+
+    def close(self) -> None:
+        """Delete the trimmed copies."""
+        self._tmp.cleanup()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Shorten long silences in audio files (offline)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s note.wav -o trimmed/
+  %(prog)s meeting.mp3 -o trimmed/ --threshold -35 --min-silence 2
+        """
+    )
+    parser.add_argument("audio", nargs="+", help="Audio files")
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory for trimmed copies")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_DB,
+                        help=f"Silence level in dBFS (default: {DEFAULT_THRESHOLD_DB})")
+    parser.add_argument("--min-silence", type=float, default=DEFAULT_MIN_SILENCE,
+                        help=f"Shortest silence to trim, seconds (default: {DEFAULT_MIN_SILENCE})")
+    parser.add_argument("--keep", type=float, default=DEFAULT_KEEP,
+                        help=f"Seconds of each trimmed silence to keep (default: {DEFAULT_KEEP})")
+    parser.add_argument("--method", choices=["auto", "python", "ffmpeg"], default="auto",
+                        help="Detector: pure Python (PCM WAV) or ffmpeg (default: auto)")
+    args = parser.parse_args()
+
+    from audio_tools import AudioToolError
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    for audio in args.audio:
+        try:
+            stats = trim_silence(Path(audio), output_dir, args.threshold, args.min_silence,
+                                 args.keep, args.method)
+        except (AudioToolError, ValueError, OSError) as e:
+            print(f"Error: {audio}: {e}", file=sys.stderr)
+            sys.exit(1)
+        results.append(stats)
+        print(f"{stats['output']}: {format_trim_stats(stats)}")
+    if len(results) > 1:
+        total = total_savings(results)
+        print(f"Total saved: {total['saved_seconds']:.1f}s, {total['saved_bytes'] / 1024:.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
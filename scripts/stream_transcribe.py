@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Streaming transcription output.
+
+Writes transcript chunks to the output markdown file (and optionally
+stdout) as the model produces them, instead of waiting for the complete
+response, and records time to first token and total generation time.
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Optional, TextIO
+
+from gemini_client import TranscriptionClient
+from latency_trace import Tracer, audio_seconds, prompt_attributes, trace_phase
+from upload_cache import submission_path
+
+
+async def stream_transcript(client: TranscriptionClient, prompt: str, audio_handle,
+                            output_path: Path, header: str = "", echo: bool = True,
+                            out: Optional[TextIO] = None, tracer: Optional[Tracer] = None) -> dict:
+    """
+    Stream a transcript for already-uploaded audio into a file.
+
+    Each chunk is appended and flushed as it arrives, so the file can be
+    followed while the model is still generating.
+
+    Args:
+        client: TranscriptionClient to generate with
+        prompt: Prompt sent with the audio
+        audio_handle: Handle returned by client.upload()
+        output_path: Markdown file to write
+        header: Text written before the first chunk
+        echo: Also write chunks to out as they arrive
+        out: Stream for echo (default: sys.stdout)
+        tracer: Records the generation as a "generate" phase (with ttft)
+
+    Returns:
+        {"ttft": seconds to first chunk (None if nothing was generated),
+         "total": seconds for the whole generation, "chunks": int, "chars": int}
+    """
+    out = out or sys.stdout
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    chunks = chars = 0
+    ttft = None
+    prompt_info = prompt_attributes(prompt) if tracer is not None else {}
+    start = time.perf_counter()
+    with trace_phase(tracer, "generate", stream=True, output=str(output_path),
+                     **prompt_info) as trace, open(output_path, 'w') as f:
+        f.write(header)
+        f.flush()
+        async for chunk in client.generate_stream(prompt, audio_handle):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+                trace["ttft"] = round(ttft, 6)
+            f.write(chunk)
+            f.flush()
+            if echo:
+                out.write(chunk)
+                out.flush()
+            chunks += 1
+            chars += len(chunk)
+        trace.update(chunks=chunks, output_chars=chars)
+
+    if echo and chars:
+        out.write("\n")
+        out.flush()
+    return {"ttft": ttft, "total": time.perf_counter() - start, "chunks": chunks, "chars": chars}
+
+
+async def transcribe_streaming(client: TranscriptionClient, prompt: str, audio_path: Path,
+                               output_path: Path, header: str = "", echo: bool = True,
+                               tracer: Optional[Tracer] = None) -> dict:
+    """Upload audio, then stream its transcript with stream_transcript()."""
+    audio_path = Path(audio_path)
+    start = time.perf_counter()
+    audio = {"audio": str(audio_path)}
+    if tracer is not None:
+        audio.update(bytes=audio_path.stat().st_size, audio_seconds=audio_seconds(audio_path))
+    with trace_phase(tracer, "upload", **audio) as trace:
+        audio_handle = await client.upload(audio_path)
+        trace["path"] = submission_path(audio_handle)
+    upload = time.perf_counter() - start
+    stats = await stream_transcript(client, prompt, audio_handle, output_path, header, echo,
+                                    tracer=tracer)
+    stats.update(upload=upload, submission=trace["path"])
+    return stats
+
+
+def format_stream_stats(stats: dict) -> str:
+    """One-line timing summary for a stream_transcript() result."""
+    ttft = "n/a" if stats["ttft"] is None else f"{stats['ttft']:.2f}s"
+    line = (f"Time to first token: {ttft}, generation: {stats['total']:.2f}s, "
+            f"{stats['chunks']} chunks, {stats['chars']} chars")
+    if "upload" in stats:
+        label = "Inline audio" if stats.get("submission") == "inline" else "Upload"
+        line = f"{label}: {stats['upload']:.2f}s, {line}"
+    return line
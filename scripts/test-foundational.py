@@ -6,25 +6,34 @@ Tests the current state of the foundational prompt against an audio file.
 Drop an audio file (e.g., note.mp3) into the planning/ directory and run this script.
 
 Usage:
-    python test-foundational.py [audio_file]
+    python test-foundational.py [audio_file] [--no-cache]
 
 Examples:
     python test-foundational.py                    # Uses planning/note.mp3 by default
     python test-foundational.py my-recording.mp3   # Uses specified file
     python test-foundational.py planning/test.mp3  # Full path
+    python test-foundational.py --no-cache         # Always call the model
+    python test-foundational.py long.mp3 --segment # Split long audio at silences
+    python test-foundational.py --context-cache    # Reuse a provider-cached prompt
+    python test-foundational.py --stream           # Print the transcript as it arrives
+    python test-foundational.py --trace-summary    # Per-phase timing table
+
+Responses are cached in generated/cache/responses.sqlite, keyed on the
+prompt, audio, model and generation parameters, so re-running unchanged
+inputs returns instantly.
 """
 
 import os
 import sys
-import subprocess
 import tempfile
 from pathlib import Path
 
-# Suppress deprecation warning
-import warnings
-warnings.filterwarnings("ignore", category=FutureWarning)
+from latency_trace import trace_phase
+from prompt_stack import build_foundational_prompt
 
-import google.generativeai as genai
+MODEL_NAME = 'gemini-2.5-flash'
+# Generation parameters passed to the model; part of the response cache key
+GENERATION_PARAMS = {}
 
 
 def load_api_key():
@@ -45,20 +54,27 @@ def load_api_key():
 
 def get_foundational_prompt():
     """Generate the current foundational prompt."""
-    script_dir = Path(__file__).parent
-    repo_root = script_dir.parent
-    result = subprocess.run(
-        ['python3', str(script_dir / 'generate-foundational.py'), '--stdout'],
-        capture_output=True, text=True, cwd=repo_root
-    )
-    if result.returncode != 0:
-        print(f"Error generating foundational prompt: {result.stderr}", file=sys.stderr)
+    try:
+        prompt = build_foundational_prompt(Path(__file__).parent.parent)
+    except (OSError, ValueError) as e:
+        print(f"Error generating foundational prompt: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not prompt:
+        print("Error generating foundational prompt: no instructions found", file=sys.stderr)
         sys.exit(1)
-    return result.stdout.strip()
+    return prompt
+
 
+def compress_audio(input_path: Path, max_size_mb: float = 19.0, tracer=None) -> Path:
+    """
+    Compress audio if needed to stay under Gemini's size limit.
+
+    The bitrate is chosen from the audio's duration so the result just fits
+    (see audio_tools.encode_to_size()); the file is written to a temporary
+    directory rather than next to the source.
+    """
+    from audio_tools import AudioToolError, compress_for_upload
 
-def compress_audio(input_path: Path, max_size_mb: float = 19.0) -> Path:
-    """Compress audio if needed to stay under Gemini's size limit."""
     file_size_mb = input_path.stat().st_size / (1024 * 1024)
 
     if file_size_mb <= max_size_mb:
@@ -66,17 +82,16 @@ def compress_audio(input_path: Path, max_size_mb: float = 19.0) -> Path:
 
     print(f"Compressing audio ({file_size_mb:.1f}MB -> target <{max_size_mb}MB)...")
 
-    # Create temp file for compressed audio
-    compressed_path = input_path.parent / f"{input_path.stem}_compressed.mp3"
-
-    result = subprocess.run([
-        'ffmpeg', '-i', str(input_path),
-        '-b:a', '64k', '-ar', '22050',
-        str(compressed_path), '-y'
-    ], capture_output=True, text=True)
-
-    if result.returncode != 0:
-        print(f"Error compressing audio: {result.stderr}", file=sys.stderr)
+    output_dir = tempfile.mkdtemp(prefix="compressed-")
+    try:
+        with trace_phase(tracer, "compress", audio=str(input_path),
+                         input_bytes=input_path.stat().st_size) as trace:
+            compressed_path = Path(compress_for_upload(str(input_path), output_dir,
+                                                       int(max_size_mb * 1024 * 1024)))
+            trace["bytes"] = compressed_path.stat().st_size
+    except AudioToolError as e:
+        os.rmdir(output_dir)
+        print(f"Error compressing audio: {e}", file=sys.stderr)
         sys.exit(1)
 
     new_size = compressed_path.stat().st_size / (1024 * 1024)
@@ -85,28 +100,248 @@ def compress_audio(input_path: Path, max_size_mb: float = 19.0) -> Path:
     return compressed_path
 
 
-def transcribe(audio_path: Path, prompt: str) -> str:
-    """Send audio to Gemini with the foundational prompt."""
+def trim_audio(input_path: Path, threshold_db: float, min_silence: float, tracer=None) -> Path:
+    """
+    Shorten long silences; returns input_path if there were none to trim.
+
+    Like compress_audio(), the trimmed copy goes to a temporary directory
+    rather than next to the source.
+    """
+    from audio_tools import AudioToolError
+    from silence_trim import format_trim_stats, trim_silence
+
+    output_dir = tempfile.mkdtemp(prefix="trimmed-")
+    try:
+        with trace_phase(tracer, "trim", audio=str(input_path)) as trace:
+            stats = trim_silence(input_path, output_dir, threshold_db, min_silence)
+            trace.update(bytes=stats["output_bytes"], saved_bytes=stats["saved_bytes"],
+                         saved_seconds=stats["saved_seconds"])
+    except (AudioToolError, ValueError) as e:
+        os.rmdir(output_dir)
+        print(f"Error trimming silence: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(format_trim_stats(stats))
+    if stats["output"] == input_path:
+        os.rmdir(output_dir)
+    return stats["output"]
+
+
+def remove_temp_audio(path: Path) -> None:
+    """Delete a trimmed or compressed copy and its temporary directory."""
+    if path.exists():
+        path.unlink()
+    path.parent.rmdir()
+
+
+def import_genai():
+    """Import the Gemini SDK on first use; it is slow to import."""
+    # Suppress deprecation warning
+    import warnings
+    warnings.filterwarnings("ignore", category=FutureWarning)
+
+    import google.generativeai as genai
+    return genai
+
+
+def transcribe(audio_path: Path, prompt: str, context_cache: bool = False, tracer=None,
+               inline_max_bytes: int = None) -> str:
+    """
+    Send audio to Gemini with the foundational prompt (optionally as cached content).
+
+    Audio up to inline_max_bytes (default: upload_cache.INLINE_MAX_BYTES) is
+    sent inline in the request, skipping the upload round trip.
+    """
+    from latency_trace import audio_seconds, prompt_attributes
+    from upload_cache import INLINE_MAX_BYTES, cache_for_api_key, submit_audio
+
+    genai = import_genai()
     api_key = load_api_key()
     genai.configure(api_key=api_key)
 
-    print(f"Uploading: {audio_path.name}")
-    audio_file = genai.upload_file(str(audio_path))
-    print("Upload complete")
-
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    if inline_max_bytes is None:
+        inline_max_bytes = INLINE_MAX_BYTES
+    audio = {"audio": str(audio_path)}
+    if tracer is not None:
+        audio.update(bytes=audio_path.stat().st_size, audio_seconds=audio_seconds(audio_path))
+    with trace_phase(tracer, "upload", **audio) as trace:
+        audio_file, path = submit_audio(genai, audio_path, cache_for_api_key(api_key),
+                                        inline_max_bytes)
+        trace.update(path=path, reused=path == "reused")
+    print({"inline": f"Sending inline: {audio_path.name}",
+           "reused": f"Reusing previous upload: {audio_path.name}",
+           "upload": f"Uploaded: {audio_path.name}"}[path])
+
+    model = genai.GenerativeModel(MODEL_NAME)
+    contents = [prompt, audio_file]
+    if context_cache:
+        from context_cache import cached_content_for_prefix, context_cache_for_api_key
+
+        with trace_phase(tracer, "context_cache", prefix_chars=len(prompt)) as trace:
+            cached = cached_content_for_prefix(genai, MODEL_NAME, prompt,
+                                               context_cache_for_api_key(api_key))
+            trace["hit"] = cached is not None
+        if cached is not None:
+            print(f"Using cached prompt: {cached.name}")
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            contents = [audio_file]
     print("Transcribing with foundational prompt...")
 
-    response = model.generate_content([prompt, audio_file])
-    return response.text
+    prompt_info = prompt_attributes(prompt) if tracer is not None else {}
+    with trace_phase(tracer, "generate", **prompt_info) as trace:
+        response = model.generate_content(contents,
+                                          generation_config=GENERATION_PARAMS or None)
+        transcript = response.text
+        trace["output_chars"] = len(transcript)
+    return transcript
+
+
+def transcribe_segmented(audio_path: Path, prompt: str, segment_length: float,
+                         overlap: float, concurrency: int, context_cache: bool = False,
+                         tracer=None, inline_max_bytes: int = None) -> str:
+    """Transcribe long audio as overlapping silence-aligned chunks in parallel."""
+    import asyncio
+    from gemini_client import GeminiClient
+    from segmented_transcribe import transcribe_segmented as run_segmented
+
+    client = GeminiClient(load_api_key(), MODEL_NAME, inline_max_bytes=inline_max_bytes)
+
+    async def run():
+        # Every segment shares the prompt, so cache it once for all of them
+        if context_cache and await client.prepare_prefix(prompt) is not None:
+            print("Using cached prompt for all segments")
+        return await run_segmented(client, prompt, audio_path, segment_length,
+                                   overlap, concurrency)
+
+    print("Transcribing segments with foundational prompt...")
+    with trace_phase(tracer, "segmented", audio=str(audio_path),
+                     bytes=audio_path.stat().st_size, prompt_chars=len(prompt)) as trace:
+        transcript = asyncio.run(run())
+        trace["output_chars"] = len(transcript)
+    return transcript
+
+
+def transcribe_stream(client, audio_path: Path, output_path: Path, prompt: str,
+                      context_cache: bool = False, tracer=None) -> dict:
+    """
+    Stream the transcript into output_path and stdout as it is generated.
+
+    Args:
+        client: TranscriptionClient (GeminiClient, or FakeClient offline)
+
+    Returns:
+        Timing statistics (time to first token, generation time, ...)
+    """
+    import asyncio
+    from stream_transcribe import format_stream_stats, transcribe_streaming
+
+    async def run():
+        if context_cache:
+            with trace_phase(tracer, "context_cache", prefix_chars=len(prompt)) as trace:
+                trace["hit"] = await client.prepare_prefix(prompt) is not None
+            if trace["hit"]:
+                print("Using cached prompt")
+        return await transcribe_streaming(client, prompt, audio_path, output_path, tracer=tracer)
+
+    print("Transcribing with foundational prompt (streaming)...")
+    print("-" * 50)
+    stats = asyncio.run(run())
+    print("-" * 50)
+    print(format_stream_stats(stats))
+    print(f"Transcript saved to: {output_path}")
+    return stats
+
+
+def save_transcript(audio_path: Path, transcript: str, tracer=None) -> Path:
+    """Save the transcript next to the audio file and print a preview."""
+    output_path = audio_path.parent / f"{audio_path.stem}_transcript.md"
+    with trace_phase(tracer, "write", output=str(output_path)) as trace:
+        with open(output_path, 'w') as f:
+            f.write(transcript)
+        trace["bytes"] = output_path.stat().st_size
+
+    print("-" * 50)
+    print(f"Transcript saved to: {output_path}")
+    print(f"\nFirst 500 characters:")
+    print(transcript[:500])
+    return output_path
 
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Test the foundational prompt against an audio file")
+    parser.add_argument("audio_file", nargs="?", help="Audio file (default: planning/note.mp3)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore and do not update the response cache")
+    parser.add_argument("--cache-max-mb", type=float, default=100.0,
+                        help="Maximum response cache size in MB (default: 100)")
+    parser.add_argument("--segment", action="store_true",
+                        help="Split long audio at silences and transcribe chunks in parallel")
+    parser.add_argument("--segment-length", type=float, default=300.0,
+                        help="Target segment length in seconds (default: 300)")
+    parser.add_argument("--overlap", type=float, default=4.0,
+                        help="Seconds of overlap between segments (default: 4)")
+    parser.add_argument("-j", "--concurrency", type=int, default=4,
+                        help="Segments transcribed at once (default: 4)")
+    parser.add_argument("--context-cache", action="store_true",
+                        help="Reuse a provider-side cached copy of the foundational prompt")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write and print the transcript as it is generated "
+                             "and report time to first token")
+    parser.add_argument("--inline-max-mb", type=float, default=None,
+                        help="Send audio up to this size inline in the request instead of "
+                             "uploading it first (default: 4, 0 to always upload)")
+    parser.add_argument("--trim-silence", action="store_true",
+                        help="Shorten long silences before upload (pure Python for WAV, "
+                             "ffmpeg otherwise)")
+    parser.add_argument("--silence-threshold", type=float, default=-40.0,
+                        help="With --trim-silence, level in dBFS counted as silence (default: -40)")
+    parser.add_argument("--min-silence", type=float, default=1.0,
+                        help="With --trim-silence, shortest silence trimmed in seconds (default: 1)")
+    parser.add_argument("--trace", nargs="?", const="", metavar="FILE",
+                        help="Append per-phase timings as JSON lines "
+                             "(default file: generated/traces/transcription.jsonl)")
+    parser.add_argument("--trace-summary", action="store_true",
+                        help="Print a per-phase timing table at the end of the run")
+    args = parser.parse_args()
+
+    tracer = None
+    if args.trace is not None or args.trace_summary:
+        from latency_trace import Tracer, default_trace_path
+
+        trace_path = None if args.trace is None else Path(args.trace or default_trace_path())
+        tracer = Tracer(trace_path, script="test-foundational", model=MODEL_NAME)
+
+    try:
+        run_test(args, tracer)
+    finally:
+        if tracer is not None and args.trace_summary and tracer.records:
+            from latency_trace import format_summary
+
+            print(format_summary(tracer.summary()))
+        if tracer is not None and tracer.path is not None:
+            print(f"Trace appended to: {tracer.path}")
+
+
+def run_test(args, tracer=None):
+    """Transcribe the selected audio file with the foundational prompt."""
+
+    params = dict(GENERATION_PARAMS)
+    if args.segment:
+        params.update(segment_length=args.segment_length, overlap=args.overlap)
+    if args.trim_silence:
+        params.update(silence_threshold=args.silence_threshold, min_silence=args.min_silence)
+
+    inline_max_bytes = None
+    if args.inline_max_mb is not None:
+        inline_max_bytes = int(args.inline_max_mb * 1024 * 1024)
+
     repo_root = Path(__file__).parent.parent
 
     # Determine audio file path
-    if len(sys.argv) > 1:
-        audio_input = sys.argv[1]
+    if args.audio_file:
+        audio_input = args.audio_file
         audio_path = Path(audio_input)
         if not audio_path.is_absolute():
             # Check if it exists relative to repo root
@@ -128,31 +363,85 @@ def main():
     print("-" * 50)
 
     # Get the current foundational prompt
-    prompt = get_foundational_prompt()
-
-    # Compress if needed
-    working_audio = compress_audio(audio_path)
-    compressed = working_audio != audio_path
+    with trace_phase(tracer, "prompt") as trace:
+        prompt = get_foundational_prompt()
+        trace["prompt_chars"] = len(prompt)
+
+    # Return a cached response if prompt, audio and model are unchanged
+    cache = None
+    if not args.no_cache:
+        from response_cache import ResponseCache, hash_text
+        from upload_cache import hash_file
+
+        with trace_phase(tracer, "response_cache", bytes=audio_path.stat().st_size) as trace:
+            cache = ResponseCache(max_bytes=int(args.cache_max_mb * 1024 * 1024))
+            cache_key = (hash_text(prompt), hash_file(audio_path), MODEL_NAME)
+            cached = cache.get(*cache_key, params)
+            trace["hit"] = cached is not None
+        if cached is not None:
+            print("Using cached response (unchanged prompt, audio and model)")
+            save_transcript(audio_path, cached, tracer)
+            return
+
+    # Shorten long silences if requested
+    source_audio = audio_path
+    if args.trim_silence:
+        source_audio = trim_audio(audio_path, args.silence_threshold, args.min_silence, tracer)
+    trimmed = source_audio != audio_path
 
     try:
-        # Transcribe
-        transcript = transcribe(working_audio, prompt)
-
-        # Save output
-        output_path = audio_path.parent / f"{audio_path.stem}_transcript.md"
-        with open(output_path, 'w') as f:
-            f.write(transcript)
-
-        print("-" * 50)
-        print(f"Transcript saved to: {output_path}")
-        print(f"\nFirst 500 characters:")
-        print(transcript[:500])
+        if args.segment:
+            from audio_tools import AudioToolError
+            from batch_transcribe import TranscriptionFailed
+
+            try:
+                transcript = transcribe_segmented(source_audio, prompt, args.segment_length,
+                                                  args.overlap, args.concurrency,
+                                                  args.context_cache, tracer, inline_max_bytes)
+            except (AudioToolError, TranscriptionFailed) as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+            if cache is not None:
+                cache.put(*cache_key, transcript, params)
+            save_transcript(audio_path, transcript, tracer)
+            return
+
+        # Compress if needed
+        working_audio = compress_audio(source_audio, tracer=tracer)
+        compressed = working_audio != source_audio
+
+        try:
+            if args.stream:
+                from gemini_client import GeminiClient
+
+                client = GeminiClient(load_api_key(), MODEL_NAME,
+                                      generation_config=GENERATION_PARAMS,
+                                      inline_max_bytes=inline_max_bytes)
+                output_path = audio_path.parent / f"{audio_path.stem}_transcript.md"
+                transcribe_stream(client, working_audio, output_path, prompt,
+                                  args.context_cache, tracer)
+                if cache is not None:
+                    cache.put(*cache_key, output_path.read_text(), params)
+                return
+
+            # Transcribe
+            transcript = transcribe(working_audio, prompt, args.context_cache, tracer,
+                                    inline_max_bytes)
+            if cache is not None:
+                cache.put(*cache_key, transcript, params)
+
+            save_transcript(audio_path, transcript, tracer)
+
+        finally:
+            # Clean up compressed file if we created one
+            if compressed:
+                remove_temp_audio(working_audio)
+                print(f"\nCleaned up temporary compressed file")
 
     finally:
-        # Clean up compressed file if we created one
-        if compressed and working_audio.exists():
-            working_audio.unlink()
-            print(f"\nCleaned up temporary compressed file")
+        # Clean up trimmed file (also when compression or transcription exits)
+        if trimmed:
+            remove_temp_audio(source_audio)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Token Report
+
+Estimates how many tokens each layer adds to the foundational prompt and
+to each stack, offline. Fails (exit 1) when a prompt exceeds its budget
+or references layer files that do not exist, so it can gate builds.
+
+Budgets come from --budget / --foundational-budget, or from a
+`token_budget:` key in a stack's YAML file.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from prompt_stack import PromptStackConcatenator, load_layers_config
+from prompt_stack.tokens import (
+    foundational_token_report,
+    get_tokenizer,
+    over_budget,
+    stack_token_report,
+)
+
+
+def print_report(report: dict) -> None:
+    """Print one report as an aligned table."""
+    print(f"\n{report['name']}")
+    for layer in report["layers"]:
+        label = layer.get("path") or f"{layer['layer']} / {layer['element']}"
+        print(f"  {layer['tokens']:>6}  {label}")
+    for path in report.get("missing", []):
+        print(f"  {'-':>6}  {path} (missing)")
+    budget = report.get("budget")
+    suffix = f" (budget {budget})" if budget is not None else ""
+    print(f"  {report['total']:>6}  TOTAL{suffix}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report prompt token counts per layer, per stack and for the foundational prompt",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Foundational prompt and every stack
+  %(prog)s
+
+  # One stack, failing if it exceeds 3000 tokens
+  %(prog)s business-email.yaml --budget 3000
+
+  # Use tiktoken instead of the built-in heuristic
+  %(prog)s --tokenizer tiktoken:cl100k_base --json
+        """
+    )
+
+    parser.add_argument('stacks', nargs='*', help='Stacks to report (default: all stacks)')
+    parser.add_argument('--no-foundational', action='store_true',
+                        help='Skip the foundational prompt')
+    parser.add_argument('--no-headers', action='store_true',
+                        help='Count the foundational prompt without section headers')
+    parser.add_argument('--tokenizer', default='heuristic',
+                        help='heuristic (default), chars, or tiktoken[:encoding]')
+    parser.add_argument('--budget', type=int, help='Token budget for every stack')
+    parser.add_argument('--foundational-budget', type=int,
+                        help='Token budget for the foundational prompt')
+    parser.add_argument('--json', action='store_true', help='Print reports as JSON')
+    parser.add_argument(
+        '-r', '--repo-root',
+        help='Repository root directory (default: script directory)',
+        type=str
+    )
+
+    args = parser.parse_args()
+
+    repo_root = Path(args.repo_root) if args.repo_root else Path(__file__).parent.parent
+    concatenator = PromptStackConcatenator(repo_root)
+
+    try:
+        count = get_tokenizer(args.tokenizer)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    reports = []
+    failures = []
+
+    if not args.no_foundational:
+        try:
+            config = load_layers_config(repo_root)
+        except (OSError, ValueError) as e:
+            print(f"Error loading layers.json: {e}", file=sys.stderr)
+            sys.exit(1)
+        report = foundational_token_report(config, repo_root, count, not args.no_headers)
+        report["budget"] = args.foundational_budget
+        reports.append((report, None))
+
+    for stack in args.stacks or concatenator.list_available_stacks():
+        reports.append((stack_token_report(concatenator, stack, count), args.budget))
+
+    for report, budget in reports:
+        missing = report.get("missing") or []
+        if missing:
+            failures.append(f"{report['name']}: {len(missing)} missing layer file(s): "
+                            f"{', '.join(missing)}")
+        limit = over_budget(report, budget)
+        if limit is not None:
+            failures.append(f"{report['name']}: {report['total']} tokens exceeds budget of {limit}")
+    reports = [report for report, _ in reports]
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+
+    if failures:
+        print("", file=sys.stderr)
+        for failure in failures:
+            print(f"Error: {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,11 +7,6 @@ Transcribes audio files and cleans up the transcript.
 import os
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
-import google.generativeai as genai
-
-# Load environment variables
-load_dotenv()
 
 CLEANUP_PROMPT = """You are a speech-to-text transcript cleanup assistant.
 
@@ -27,10 +22,59 @@ Instructions:
 
 Please transcribe and clean up the following audio:"""
 
+MODEL_NAME = "gemini-2.0-flash-exp"
+
+
+def load_environment():
+    """Load environment variables from .env (imported lazily to keep startup fast)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def select_prompt(foundational: bool = False, stack: str = None,
+                  prefix_stable: bool = False) -> tuple[str, str]:
+    """
+    Return the prompt to use: a stack, the foundational prompt, or the built-in cleanup prompt.
+
+    With prefix_stable, stacks are rendered as the canonical foundational
+    prefix followed by their stylistic layers, so the prefix can be cached.
+
+    Returns:
+        Tuple of (prompt, cacheable prefix or None)
+    """
+    from prompt_stack import PromptStackConcatenator, build_foundational_prompt
 
-def transcribe_audio(audio_path: Path, output_path: Path = None):
-    """Transcribe audio file using Gemini API."""
+    if stack and prefix_stable:
+        from prompt_stack.prefix import render_stack_file_prefix_stable
 
+        rendered = render_stack_file_prefix_stable(PromptStackConcatenator(), stack)
+        return rendered["prompt"], rendered["prefix"]
+    if stack:
+        return PromptStackConcatenator().concatenate_from_file(stack), None
+    if foundational:
+        prompt = build_foundational_prompt()
+        return prompt, prompt if prefix_stable else None
+    return CLEANUP_PROMPT, None
+
+
+def transcribe_audio(audio_path: Path, output_path: Path = None, use_upload_cache: bool = True,
+                     prompt: str = CLEANUP_PROMPT, prefix: str = None, tracer=None,
+                     trim: dict = None, inline_max_bytes: int = None):
+    """
+    Transcribe audio file using Gemini API, reusing cached content for prefix if given.
+
+    With a latency_trace.Tracer, the upload, context cache, generate and
+    write phases are recorded. With trim (silence_trim.trim_silence()
+    options), long silences are shortened before upload. Audio up to
+    inline_max_bytes (default: upload_cache.INLINE_MAX_BYTES) is sent
+    inline in the request instead of being uploaded.
+    """
+    import google.generativeai as genai
+    from latency_trace import audio_seconds, prompt_attributes, trace_phase
+    from upload_cache import INLINE_MAX_BYTES, cache_for_api_key, submit_audio
+
+    load_environment()
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         print("Error: GEMINI_API_KEY not found in environment", file=sys.stderr)
@@ -38,40 +82,339 @@ def transcribe_audio(audio_path: Path, output_path: Path = None):
 
     genai.configure(api_key=api_key)
 
-    # Upload the audio file
-    print(f"Uploading audio file: {audio_path}")
-    audio_file = genai.upload_file(str(audio_path))
-    print(f"Upload complete: {audio_file.uri}")
+    upload_path = audio_path
+    if trim is not None:
+        import tempfile
+        from audio_tools import AudioToolError
+        from silence_trim import format_trim_stats, trim_silence
+
+        trim_dir = tempfile.TemporaryDirectory(prefix="trimmed-")
+        try:
+            with trace_phase(tracer, "trim", audio=str(audio_path)) as trace:
+                stats = trim_silence(audio_path, Path(trim_dir.name), **trim)
+                trace.update(bytes=stats["output_bytes"], saved_bytes=stats["saved_bytes"],
+                             saved_seconds=stats["saved_seconds"])
+        except (AudioToolError, ValueError) as e:
+            print(f"Error trimming silence: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(format_trim_stats(stats))
+        upload_path = stats["output"]
+
+    # Send small audio inline; upload the rest (reusing an identical earlier
+    # upload if still valid)
+    if inline_max_bytes is None:
+        inline_max_bytes = INLINE_MAX_BYTES
+    cache = cache_for_api_key(api_key) if use_upload_cache else None
+    audio = {"audio": str(upload_path)}
+    if tracer is not None:
+        audio.update(bytes=upload_path.stat().st_size, audio_seconds=audio_seconds(upload_path))
+    with trace_phase(tracer, "upload", **audio) as trace:
+        audio_file, path = submit_audio(genai, upload_path, cache, inline_max_bytes)
+        trace.update(path=path, reused=path == "reused")
+    if path == "inline":
+        print(f"Sending audio inline: {upload_path} ({upload_path.stat().st_size / 1024:.0f}KB)")
+    elif path == "reused":
+        print(f"Reusing previous upload: {audio_file.uri}")
+    else:
+        print(f"Upload complete: {audio_file.uri}")
 
     # Use Gemini 2.0 Flash for audio processing
-    model = genai.GenerativeModel("gemini-2.0-flash-exp")
+    model = genai.GenerativeModel(MODEL_NAME)
+    contents = [prompt, audio_file]
 
-    print("Transcribing and cleaning up...")
-    response = model.generate_content([CLEANUP_PROMPT, audio_file])
+    if prefix:
+        from context_cache import cached_content_for_prefix, context_cache_for_api_key
 
-    transcript = response.text
+        with trace_phase(tracer, "context_cache", prefix_chars=len(prefix)) as trace:
+            cached = cached_content_for_prefix(genai, MODEL_NAME, prefix,
+                                               context_cache_for_api_key(api_key))
+            trace["hit"] = cached is not None
+        if cached is not None:
+            print(f"Using cached prompt prefix: {cached.name}")
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            rest = prompt[len(prefix):].strip()
+            contents = [rest, audio_file] if rest else [audio_file]
+
+    print("Transcribing and cleaning up...")
+    prompt_info = prompt_attributes(prompt) if tracer is not None else {}
+    with trace_phase(tracer, "generate", **prompt_info) as trace:
+        response = model.generate_content(contents)
+        transcript = response.text
+        trace["output_chars"] = len(transcript)
 
     # Determine output path
     if output_path is None:
         output_path = audio_path.parent / f"{audio_path.stem}_transcript.md"
 
     # Save transcript
-    with open(output_path, 'w') as f:
-        f.write(f"# Transcript: {audio_path.name}\n\n")
-        f.write(transcript)
+    with trace_phase(tracer, "write", output=str(output_path)) as trace:
+        with open(output_path, 'w') as f:
+            f.write(f"# Transcript: {audio_path.name}\n\n")
+            f.write(transcript)
+        trace["bytes"] = output_path.stat().st_size
 
     print(f"Transcript saved to: {output_path}")
     return transcript
 
 
+def create_client(fake: bool = False, use_upload_cache: bool = True, trim: dict = None,
+                  tracer=None, inline_max_bytes: int = None):
+    """
+    Return a GeminiClient, or the offline FakeClient when fake is set.
+
+    Audio up to inline_max_bytes (default: upload_cache.INLINE_MAX_BYTES)
+    is sent inline instead of uploaded. With trim (silence_trim.trim_silence()
+    options) the client is wrapped in a TrimmingClient, so every upload is
+    silence-trimmed first.
+    """
+    from gemini_client import FakeClient, GeminiClient
+    from upload_cache import INLINE_MAX_BYTES
+
+    if inline_max_bytes is None:
+        inline_max_bytes = INLINE_MAX_BYTES
+    if fake:
+        client = FakeClient(inline_max_bytes=inline_max_bytes)
+    else:
+        load_environment()
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            print("Error: GEMINI_API_KEY not found in environment", file=sys.stderr)
+            sys.exit(1)
+        client = GeminiClient(api_key, MODEL_NAME, upload_cache=use_upload_cache,
+                              inline_max_bytes=inline_max_bytes)
+    if trim is not None:
+        from silence_trim import TrimmingClient
+
+        client = TrimmingClient(client, tracer=tracer, **trim)
+    return client
+
+
+def close_client(client) -> None:
+    """Delete a TrimmingClient's trimmed copies; other clients hold no files."""
+    close = getattr(client, "close", None)
+    if close is not None:
+        close()
+
+
+def print_submissions(client) -> None:
+    """Print how many files were sent inline and how many were uploaded."""
+    counts = getattr(client, "submissions", None)
+    if counts and sum(counts.values()):
+        print(f"Audio sent inline: {counts['inline']}, uploaded: {counts['upload']}, "
+              f"reused uploads: {counts['reused']}")
+
+
+def print_trim_savings(client) -> None:
+    """Print the total silence-trimming savings of a TrimmingClient."""
+    results = getattr(client, "results", None)
+    if not results:
+        return
+    from silence_trim import total_savings
+
+    total = total_savings(results)
+    print(f"Silence trimming saved {total['saved_seconds']:.1f}s of audio and "
+          f"{total['saved_bytes'] / 1024:.0f}KB across {len(results)} upload(s)")
+
+
+def transcribe_audio_streaming(audio_path: Path, output_path: Path = None, fake: bool = False,
+                               use_upload_cache: bool = True, prompt: str = CLEANUP_PROMPT,
+                               prefix: str = None, tracer=None, trim: dict = None,
+                               inline_max_bytes: int = None) -> dict:
+    """
+    Transcribe one file, writing and echoing the transcript as it is generated.
+
+    Returns:
+        Timing statistics from stream_transcribe.transcribe_streaming()
+    """
+    import asyncio
+    from latency_trace import trace_phase
+    from stream_transcribe import format_stream_stats, transcribe_streaming
+
+    client = create_client(fake, use_upload_cache, trim, tracer, inline_max_bytes)
+    if output_path is None:
+        output_path = audio_path.parent / f"{audio_path.stem}_transcript.md"
+
+    async def run():
+        if prefix:
+            with trace_phase(tracer, "context_cache", prefix_chars=len(prefix)) as trace:
+                trace["hit"] = await client.prepare_prefix(prefix) is not None
+        return await transcribe_streaming(client, prompt, audio_path, output_path,
+                                          header=f"# Transcript: {audio_path.name}\n\n",
+                                          tracer=tracer)
+
+    print(f"Streaming transcript of {audio_path}...")
+    print("-" * 50)
+    try:
+        stats = asyncio.run(run())
+    finally:
+        close_client(client)
+    print("-" * 50)
+    print(format_stream_stats(stats))
+    print_trim_savings(client)
+    print(f"Transcript saved to: {output_path}")
+    return stats
+
+
+def transcribe_directory(audio_spec: str, output_dir: Path = None, concurrency: int = 4,
+                         timeout: float = 300.0, retries: int = 3, fake: bool = False,
+                         use_upload_cache: bool = True, prompt: str = CLEANUP_PROMPT,
+                         prefix: str = None, tracer=None, pipeline: bool = False,
+                         trim: dict = None, inline_max_bytes: int = None):
+    """
+    Transcribe every audio file in a directory or glob concurrently.
+
+    With pipeline, files go through pipeline_transcribe's overlapped
+    compress/upload/generate/write stages (concurrency generate workers).
+    """
+    import asyncio
+    from audio_tools import compress_for_upload
+    from batch_transcribe import (collect_audio_files, output_paths, print_result,
+                                  transcribe_batch)
+    from latency_trace import trace_phase
+
+    audio_paths = collect_audio_files(audio_spec)
+    if not audio_paths:
+        print(f"Error: No audio files found for: {audio_spec}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        output_paths(audio_paths, output_dir)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    client = create_client(fake, use_upload_cache, trim, tracer, inline_max_bytes)
+
+    async def run():
+        if prefix:
+            with trace_phase(tracer, "context_cache", prefix_chars=len(prefix)) as trace:
+                handle = await client.prepare_prefix(prefix)
+                trace["hit"] = handle is not None
+            if handle is not None:
+                name = handle["name"] if isinstance(handle, dict) else handle.name
+                print(f"Using cached prompt prefix: {name}")
+        if pipeline:
+            from pipeline_transcribe import TranscriptionPipeline
+
+            runner = TranscriptionPipeline(
+                client, prompt, output_dir, compress=None if fake else compress_for_upload,
+                workers={"generate": concurrency}, timeout=timeout, retries=retries,
+                tracer=tracer)
+            return await runner.run(audio_paths, on_result=print_result)
+        return await transcribe_batch(
+            client, prompt, audio_paths, output_dir,
+            concurrency=concurrency, timeout=timeout, retries=retries,
+            on_result=print_result, tracer=tracer)
+
+    print(f"Transcribing {len(audio_paths)} files (concurrency {concurrency})...")
+    try:
+        results = asyncio.run(run())
+    finally:
+        close_client(client)
+
+    print_submissions(client)
+    print_trim_savings(client)
+    failed = [r for r in results if r["status"] != "ok"]
+    print(f"Done: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    if failed:
+        sys.exit(1)
+    return results
+
+
 def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="Transcribe audio using Gemini API")
-    parser.add_argument("audio_file", help="Path to audio file")
-    parser.add_argument("-o", "--output", help="Output file path (default: same dir as input)")
+    parser.add_argument("audio_file", help="Path to audio file, or a directory/glob for batch mode")
+    parser.add_argument("-o", "--output",
+                        help="Output file path (default: same dir as input); output directory in batch mode")
+    parser.add_argument("-j", "--concurrency", type=int, default=4,
+                        help="Batch mode: files transcribed at once (default: 4)")
+    parser.add_argument("--timeout", type=float, default=300.0,
+                        help="Batch mode: per-file timeout in seconds (default: 300)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Batch mode: retries per file with jittered backoff (default: 3)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Batch mode: overlap compression, uploads and generation across files "
+                             "(compress/upload/generate/write stages connected by queues)")
+    parser.add_argument("--fake", action="store_true",
+                        help="Batch and --stream modes: use the offline fake model instead of Gemini")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write and print the transcript as it is generated, and report "
+                             "time to first token")
+    parser.add_argument("--foundational", action="store_true",
+                        help="Use the foundational prompt from layers.json instead of the built-in prompt")
+    parser.add_argument("--stack", help="Use a prompt stack from stacks/ instead of the built-in prompt")
+    parser.add_argument("--no-upload-cache", action="store_true",
+                        help="Always upload, even if identical audio was uploaded recently")
+    parser.add_argument("--context-cache", action="store_true",
+                        help="With --foundational/--stack, put the foundational prefix first and "
+                             "reuse a provider-side cached copy of it")
+    parser.add_argument("--inline-max-mb", type=float, default=None,
+                        help="Send audio up to this size inline in the request instead of "
+                             "uploading it first (default: 4, 0 to always upload)")
+    parser.add_argument("--trim-silence", action="store_true",
+                        help="Shorten long silences before upload (pure Python for WAV, "
+                             "ffmpeg otherwise)")
+    parser.add_argument("--silence-threshold", type=float, default=-40.0,
+                        help="With --trim-silence, level in dBFS counted as silence (default: -40)")
+    parser.add_argument("--min-silence", type=float, default=1.0,
+                        help="With --trim-silence, shortest silence trimmed in seconds (default: 1)")
+    parser.add_argument("--trace", nargs="?", const="", metavar="FILE",
+                        help="Append per-phase timings as JSON lines "
+                             "(default file: generated/traces/transcription.jsonl)")
+    parser.add_argument("--trace-summary", action="store_true",
+                        help="Print a per-phase timing table at the end of the run")
 
     args = parser.parse_args()
+    if args.context_cache and not (args.foundational or args.stack):
+        parser.error("--context-cache requires --foundational or --stack")
+
+    tracer = None
+    if args.trace is not None or args.trace_summary:
+        from latency_trace import Tracer, default_trace_path
+
+        trace_path = None if args.trace is None else Path(args.trace or default_trace_path())
+        tracer = Tracer(trace_path, script="transcribe_gemini",
+                        model="fake" if args.fake else MODEL_NAME)
+
+    try:
+        run_transcription(args, tracer)
+    finally:
+        if tracer is not None and args.trace_summary and tracer.records:
+            from latency_trace import format_summary
+
+            print(format_summary(tracer.summary()))
+        if tracer is not None and tracer.path is not None:
+            print(f"Trace appended to: {tracer.path}")
+
+
+def run_transcription(args, tracer=None):
+    """Run the transcription selected by the parsed command-line arguments."""
+    from latency_trace import trace_phase
+
+    inline_max_bytes = None
+    if args.inline_max_mb is not None:
+        inline_max_bytes = int(args.inline_max_mb * 1024 * 1024)
+    trim = None
+    if args.trim_silence:
+        trim = {"threshold_db": args.silence_threshold, "min_silence": args.min_silence}
+
+    with trace_phase(tracer, "prompt", foundational=args.foundational, stack=args.stack) as trace:
+        prompt, prefix = select_prompt(args.foundational, args.stack, args.context_cache)
+        trace["prompt_chars"] = len(prompt)
+    if prefix:
+        from prompt_stack.prefix import prefix_hash
+
+        print(f"Prompt prefix hash: {prefix_hash(prefix)[:16]}")
+
+    if Path(args.audio_file).is_dir() or any(c in args.audio_file for c in "*?["):
+        output_dir = Path(args.output) if args.output else None
+        transcribe_directory(args.audio_file, output_dir, args.concurrency,
+                             args.timeout, args.retries, args.fake,
+                             use_upload_cache=not args.no_upload_cache, prompt=prompt,
+                             prefix=prefix, tracer=tracer, pipeline=args.pipeline, trim=trim,
+                             inline_max_bytes=inline_max_bytes)
+        return
 
     audio_path = Path(args.audio_file)
     if not audio_path.exists():
@@ -80,7 +423,16 @@ def main():
 
     output_path = Path(args.output) if args.output else None
 
-    transcribe_audio(audio_path, output_path)
+    if args.stream:
+        transcribe_audio_streaming(audio_path, output_path, args.fake,
+                                   use_upload_cache=not args.no_upload_cache,
+                                   prompt=prompt, prefix=prefix, tracer=tracer, trim=trim,
+                                   inline_max_bytes=inline_max_bytes)
+        return
+
+    transcribe_audio(audio_path, output_path, use_upload_cache=not args.no_upload_cache,
+                     prompt=prompt, prefix=prefix, tracer=tracer, trim=trim,
+                     inline_max_bytes=inline_max_bytes)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of Gemini file uploads.
+
+Maps the SHA-256 of audio bytes to the remote file handle returned by
+genai.upload_file, together with its expiry. Re-transcribing the same
+audio reuses the existing remote file instead of uploading it again.
+
+submit_audio() skips the upload entirely for small files, sending their
+bytes inline in the generate request instead.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from prompt_stack import atomic_write_text
+
+# Gemini keeps uploaded files for 48 hours
+DEFAULT_TTL = timedelta(hours=48)
+# Treat handles as expired this long before their actual expiry
+EXPIRY_MARGIN = timedelta(minutes=30)
+# Requests are limited to 20MB including the prompt and encoding overhead,
+# so only clearly small audio is sent inline
+INLINE_MAX_BYTES = 4 * 1024 * 1024
+
+_AUDIO_MIME_TYPES = {
+    ".mp3": "audio/mp3", ".wav": "audio/wav", ".ogg": "audio/ogg", ".opus": "audio/ogg",
+    ".flac": "audio/flac", ".aac": "audio/aac", ".m4a": "audio/mp4", ".aiff": "audio/aiff",
+}
+
+
+def default_cache_path() -> Path:
+    """Location of the upload cache inside the repository."""
+    return Path(__file__).parent.parent / "generated" / "cache" / "uploads.json"
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """JSON-backed map of audio hash -> remote file handle and expiry."""
+
+    def __init__(self, path: Optional[Path] = None, namespace: str = ""):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache file (default: generated/cache/uploads.json)
+            namespace: Separates entries per account (e.g. an API key hash),
+                since uploaded files are only visible to the account that
+                uploaded them
+        """
+        self.path = Path(path) if path else default_cache_path()
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        try:
+            self._entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _key(self, digest: str) -> str:
+        return f"{self.namespace}:{digest}" if self.namespace else digest
+
+    def _save(self) -> None:
+        atomic_write_text(self.path, json.dumps(self._entries, indent=2) + "\n")
+
+    def lookup(self, digest: str) -> Optional[dict]:
+        """
+        Return the cached entry for an audio hash if it has not expired.
+
+        Expired entries are evicted.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(digest))
+            if entry is None:
+                return None
+            expires = datetime.fromisoformat(entry["expires_at"])
+            if expires - EXPIRY_MARGIN <= datetime.now(timezone.utc):
+                del self._entries[self._key(digest)]
+                self._save()
+                return None
+            return entry
+
+    def store(self, digest: str, name: str, uri: str = "", mime_type: str = "",
+              expires_at: Optional[datetime] = None) -> None:
+        """Record the remote handle for an audio hash."""
+        if expires_at is None:
+            expires_at = datetime.now(timezone.utc) + DEFAULT_TTL
+        elif expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        with self._lock:
+            self._entries[self._key(digest)] = {
+                "name": name,
+                "uri": uri,
+                "mime_type": mime_type,
+                "expires_at": expires_at.isoformat(),
+            }
+            self._save()
+
+    def evict(self, digest: str) -> None:
+        """Remove an entry (e.g. when the remote file has disappeared)."""
+        with self._lock:
+            if self._entries.pop(self._key(digest), None) is not None:
+                self._save()
+
+    def prune(self) -> int:
+        """Remove every expired entry. Returns the number removed."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            expired = [k for k, e in self._entries.items()
+                       if datetime.fromisoformat(e["expires_at"]) - EXPIRY_MARGIN <= now]
+            for key in expired:
+                del self._entries[key]
+            if expired:
+                self._save()
+        return len(expired)
+
+
+def cache_for_api_key(api_key: str, path: Optional[Path] = None) -> UploadCache:
+    """UploadCache namespaced by a hash of the API key."""
+    namespace = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    return UploadCache(path, namespace)
+
+
+def upload_with_cache(genai, audio_path: Path, cache: Optional[UploadCache]):
+    """
+    Upload an audio file, reusing a still-valid remote file with the same bytes.
+
+    Args:
+        genai: The google.generativeai module (already configured)
+        audio_path: Audio file to upload
+        cache: UploadCache, or None to always upload
+
+    Returns:
+        Tuple of (file handle, reused) where reused is True on a cache hit
+    """
+    if cache is None:
+        return genai.upload_file(str(audio_path)), False
+
+    digest = hash_file(audio_path)
+    entry = cache.lookup(digest)
+    if entry is not None:
+        try:
+            audio_file = genai.get_file(entry["name"])
+            if getattr(audio_file.state, "name", "ACTIVE") == "ACTIVE":
+                return audio_file, True
+        except Exception:
+            pass
+        cache.evict(digest)
+
+    audio_file = genai.upload_file(str(audio_path))
+    cache.store(digest, audio_file.name,
+                uri=getattr(audio_file, "uri", ""),
+                mime_type=getattr(audio_file, "mime_type", ""),
+                expires_at=getattr(audio_file, "expiration_time", None))
+    return audio_file, False
+
+
+def audio_mime_type(audio_path: Path) -> str:
+    """MIME type Gemini expects for an audio file, from its extension."""
+    import mimetypes
+
+    suffix = Path(audio_path).suffix.lower()
+    return _AUDIO_MIME_TYPES.get(suffix) or mimetypes.guess_type(str(audio_path))[0] or "audio/mpeg"
+
+
+def inline_audio(audio_path: Path) -> dict:
+    """Inline content part holding the audio bytes."""
+    return {"mime_type": audio_mime_type(audio_path), "data": Path(audio_path).read_bytes()}
+
+
+def submission_path(audio_handle) -> str:
+    """"inline" for a handle from inline_audio() (or FakeClient's inline handle), else "upload"."""
+    if isinstance(audio_handle, dict) and ("data" in audio_handle or audio_handle.get("inline")):
+        return "inline"
+    return "upload"
+
+
+def submit_audio(genai, audio_path: Path, cache: Optional[UploadCache],
+                 inline_max_bytes: int = INLINE_MAX_BYTES):
+    """
+    Prepare audio for generate_content: inline if small, uploaded otherwise.
+
+    Inline audio saves the whole upload round trip, which dominates the
+    latency of short recordings.
+
+    Args:
+        genai: The google.generativeai module (already configured)
+        audio_path: Audio file to send
+        cache: UploadCache for the upload path, or None to always upload
+        inline_max_bytes: Largest file sent inline (0: always upload)
+
+    Returns:
+        Tuple of (content part, path) where path is "inline", "reused" or "upload"
+    """
+    if Path(audio_path).stat().st_size <= inline_max_bytes:
+        return inline_audio(audio_path), "inline"
+    audio_file, reused = upload_with_cache(genai, audio_path, cache)
+    return audio_file, "reused" if reused else "upload"